@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+日志配置模块 - 可配置级别、敏感信息脱敏、日志文件轮转（不依赖PyQt6）
+
+默认只输出WARNING及以上的日志，渲染大量账号卡片时不会产生成千上万次同步的控制台输出；
+调试时通过环境变量调整:
+    ACCOUNT_MANAGER_LOG_LEVEL=DEBUG          日志级别（DEBUG/INFO/WARNING/ERROR 或数字）
+    ACCOUNT_MANAGER_LOG_FILE=路径            日志文件路径，设为空字符串时不写文件
+
+日志调用请使用 %-style 参数（logger.debug("账号: %s", account)），
+低于当前级别的日志不会格式化消息。写出前所有日志都经过脱敏过滤。
+"""
+
+import os
+import re
+import logging
+from logging.handlers import RotatingFileHandler
+
+LEVEL_ENV = 'ACCOUNT_MANAGER_LOG_LEVEL'
+FILE_ENV = 'ACCOUNT_MANAGER_LOG_FILE'
+
+DEFAULT_LEVEL = logging.WARNING
+DEFAULT_LOG_NAME = 'account_manager.log'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+# 日志文件超过该大小(字节)时轮转，保留的旧日志个数
+MAX_LOG_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+REDACTED = '***'
+
+# 键值形式的敏感字段: 密码=xxx、password: xxx、"密码": "xxx"
+_SECRET_KEYS = r'密码|口令|密钥|password|passwd|pwd|secret|token'
+_SECRET_PAIR_RE = re.compile(
+    r'''(?P<key>["']?(?:%s)["']?\s*[=:：]\s*)(?:"[^"]*"|'[^']*'|[^\s,;)}\]]+)''' % _SECRET_KEYS,
+    re.IGNORECASE)
+# Fernet 密文（gAAAAA开头的base64）
+_FERNET_TOKEN_RE = re.compile(r'gAAAAA[A-Za-z0-9_\-]{20,}={0,2}')
+
+
+def redact(text):
+    """把文本中的密码、密钥和密文替换为 ***"""
+    text = _SECRET_PAIR_RE.sub(lambda m: m.group('key') + REDACTED, text)
+    return _FERNET_TOKEN_RE.sub(REDACTED, text)
+
+
+class RedactingFilter(logging.Filter):
+    """
+    脱敏过滤器（挂在输出端上）
+    只对实际要输出的日志生效：格式化消息后脱敏，异常堆栈同样处理
+    """
+    def filter(self, record):
+        try:
+            message = record.getMessage()
+        except Exception:
+            message = str(record.msg)
+        record.msg = redact(message)
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        if record.exc_text:
+            record.exc_text = redact(record.exc_text)
+        return True
+
+
+def parse_level(value, default=DEFAULT_LEVEL):
+    """把 "DEBUG"、"10" 等转换为日志级别，无法识别时返回default"""
+    if value is None:
+        return default
+    if isinstance(value, int):
+        return value
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value.upper())
+    return level if isinstance(level, int) else default
+
+
+def default_log_file():
+    """默认日志文件路径（与数据文件同目录）"""
+    from vault_storage import get_data_dir
+    return os.path.join(get_data_dir(), DEFAULT_LOG_NAME)
+
+
+def setup_logging(level=None, log_file=None):
+    """
+    配置根日志器，可重复调用（会替换之前由本函数添加的输出端）
+    参数:
+    level: int/str - 日志级别，默认读取环境变量，未设置时为WARNING
+    log_file: str - 日志文件路径，默认读取环境变量，未设置时写到数据目录；传入空字符串不写文件
+    返回:
+    logging.Logger - 根日志器
+    """
+    if level is None:
+        level = os.environ.get(LEVEL_ENV)
+    level = parse_level(level)
+    if log_file is None:
+        log_file = os.environ.get(FILE_ENV)
+        if log_file is None:
+            log_file = default_log_file()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if getattr(handler, '_app_logging', False):
+            root.removeHandler(handler)
+            handler.close()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    redactor = RedactingFilter()
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        try:
+            # delay=True: 没有日志输出时不创建文件
+            handlers.append(RotatingFileHandler(log_file, maxBytes=MAX_LOG_BYTES, backupCount=LOG_BACKUPS,
+                                                encoding='utf-8', delay=True))
+        except OSError as e:
+            logging.getLogger(__name__).warning("无法打开日志文件 %s: %s", log_file, e)
+    for handler in handlers:
+        handler._app_logging = True
+        handler.setFormatter(formatter)
+        handler.addFilter(redactor)
+        root.addHandler(handler)
+    root.setLevel(level)
+    return root
@@ -1,3 +1,6 @@
+import time
+# 启动时间线的起点（位于所有导入之前，包含模块导入耗时）
+_STARTUP_T0 = time.perf_counter()
 import sys
 import ctypes
 from ctypes import wintypes
@@ -5,35 +8,75 @@ import logging
 import base64
 import hashlib
 
-# 导入使用统计模块
-from usage_stats import record_app_launch, record_feature_usage, get_stats_summary
+# 使用统计模块在窗口首次显示后才导入（见 TitleBarColorWindow._deferred_init）
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, 
-    QGridLayout, QLabel, QScrollArea, QListWidget, QPushButton, QSizePolicy, 
-    QLineEdit, QMessageBox, QMenu, QInputDialog
+    QGridLayout, QLabel, QScrollArea, QListWidget, QListWidgetItem, QPushButton, QSizePolicy, 
+    QLineEdit, QMessageBox, QMenu, QInputDialog, QFileDialog, QListView, QAbstractItemView, QStyledItemDelegate,
+    QFrame
 )
-from PyQt6.QtGui import QIcon, QColor, QFont, QPalette, QDesktopServices
-from PyQt6.QtCore import Qt, QEvent, QUrl, QTimer
+from PyQt6.QtGui import (
+    QIcon, QColor, QFont, QPalette, QDesktopServices, QShortcut, QKeySequence, QPainter, QPen, QPixmap
+)
+from PyQt6.QtCore import (
+    Qt, QEvent, QUrl, QTimer, QObject, QRunnable, QThreadPool, QEventLoop, pyqtSignal,
+    QAbstractListModel, QModelIndex, QPersistentModelIndex, QRect, QRectF, QSize, QByteArray
+)
+from PyQt6.QtSvg import QSvgRenderer
 import json
 import os
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.backends import default_backend
-
-# 需要预加载的图标列表
-REQUIRED_ICONS = ['copy', 'eye', 'eye2']
-
-# 预加载所有SVG图标
-def preload_all_icons():
-    # 获取系统文本颜色
-    app = QApplication.instance()
-    if app:
-        palette = app.palette()
-        text_color = palette.color(QPalette.ColorRole.WindowText).name()
-        for icon_name in REQUIRED_ICONS:
-            create_temporary_svg(icon_name, text_color)
-        print(f"所有图标已预加载完成，颜色: {text_color}")
+import copy
+from vault_crypto import PasswordBasedEncryption, UnlockSession, preferred_kdf_params
+from vault_storage import VaultStore, VaultConflictError, get_data_dir, get_data_file_path
+from vault_model import Vault, SEARCH_LIMIT
+import perf_metrics
+from app_logging import setup_logging
+from perf_metrics import timed
+
+# 解锁会话空闲超时时间(秒)
+SESSION_TIMEOUT = 15 * 60
+
+# 延迟写入的静默时间(毫秒)：最后一次修改后经过该时间才写入磁盘
+SAVE_QUIET_MS = 800
+
+# 逐条解密数据文件时，每批交给界面的网站数及最长间隔(秒)
+LOAD_BATCH_SIZE = 200
+LOAD_BATCH_INTERVAL = 0.05
+
+# 账号卡片尺寸及间距
+CARD_WIDTH = 260
+CARD_HEIGHT = 160
+CARD_SPACING = 10
+
+# 网站账号数达到该值时改用虚拟化卡片视图（只绘制可见卡片，不为每个账号创建控件）
+VIRTUAL_GRID_THRESHOLD = 100
+
+# 启动时间线输出文件（设置后把各阶段耗时写入该JSON文件，便于跟踪启动速度）
+STARTUP_TIMELINE_ENV = 'ACCOUNT_MANAGER_STARTUP_TIMELINE'
+
+# 启动时间线: [(阶段名, 距启动的毫秒数), ...]
+STARTUP_TIMELINE = []
+
+def mark_startup(stage):
+    """记录启动阶段完成的时间点（同一阶段只记录第一次）"""
+    if any(name == stage for name, _ in STARTUP_TIMELINE):
+        return
+    STARTUP_TIMELINE.append((stage, round((time.perf_counter() - _STARTUP_T0) * 1000, 1)))
+
+def get_startup_timeline():
+    """返回启动时间线 {阶段名: 毫秒}"""
+    return dict(STARTUP_TIMELINE)
+
+def report_startup_timeline():
+    """输出启动时间线到日志，设置了 ACCOUNT_MANAGER_STARTUP_TIMELINE 时同时写入JSON文件"""
+    logger.info("启动时间线(ms): %s", ", ".join(f"{name}={ms}" for name, ms in STARTUP_TIMELINE))
+    path = os.environ.get(STARTUP_TIMELINE_ENV)
+    if path:
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"timeline": get_startup_timeline()}, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logger.warning("写入启动时间线失败: %s", e)
 
 
 # 获取资源文件路径（适配PyInstaller打包环境）
@@ -45,76 +88,59 @@ def get_resource_path(relative_path):
         # 开发模式
         return os.path.join(os.path.dirname(os.path.abspath(__file__)), relative_path)
 
-# 使用内置SVG图标数据创建临时SVG文件
 # 导入内置SVG图标数据
 from svg_icons_data import SVG_ICONS
 
-def create_temporary_svg(icon_name, color):
-    # 从内置SVG_ICONS字典获取图标内容
-    if icon_name in SVG_ICONS:
-        svg_content = SVG_ICONS[icon_name]
-    else:
-        # 使用默认图标
-        svg_content = SVG_ICONS['default']
-
-    # 替换颜色占位符
-    svg_content = svg_content.replace('{color}', color)
-
-    # 创建临时文件
-    temp_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp')
-    os.makedirs(temp_dir, exist_ok=True)
-    temp_svg_path = os.path.join(temp_dir, f'{icon_name}.svg')
-
-    try:
-        with open(temp_svg_path, 'w', encoding='utf-8') as f:
-            f.write(svg_content)
-        return temp_svg_path
-    except Exception as e:
-        logger.error(f"创建临时SVG文件失败: {str(e)}")
-        return None
+# 图标渲染尺寸（含高分屏使用的2倍尺寸）
+ICON_SIZES = (16, 20, 24, 32, 40, 48, 64)
 
-    # 查找对应图标的SVG内容
-    icon_start = f'{icon_name}.svg:'
-    icon_end = f'\n\n'
-    start_index = svg_content.find(icon_start)
-    if start_index == -1:
-        print(f"找不到图标: {icon_name}")
-        return None
+# 进程内图标缓存：(图标名, 颜色) -> QIcon
+_icon_cache = {}
 
-    start_index += len(icon_start)
-    end_index = svg_content.find(icon_end, start_index)
-    if end_index == -1:
-        # 如果是最后一个图标，则结束索引为文件末尾
-        end_index = len(svg_content)
-
-    # 提取图标SVG内容
-    icon_svg = svg_content[start_index:end_index].strip()
-
-    # 替换颜色占位符
-    icon_svg = icon_svg.replace('{color}', color)
-
-    # 获取运行目录
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # 创建temp文件夹路径
-    temp_dir = os.path.join(current_dir, 'temp')
-    # 确保temp文件夹存在
-    os.makedirs(temp_dir, exist_ok=True)
-    # 创建临时文件（在temp文件夹中，不包含颜色变量名）
-    temp_file_path = os.path.join(temp_dir, f'{icon_name}.svg')
-
-    try:
-        with open(temp_file_path, 'w', encoding='utf-8') as f:
-            f.write(icon_svg)
-        print(f"创建临时SVG文件成功: {temp_file_path}")
-        return temp_file_path
-    except Exception as e:
-        print(f"创建临时SVG文件失败: {str(e)}")
-        return None
+@timed('get_icon')
+def get_icon(icon_name, color):
+    """
+    获取指定颜色的图标
+    直接在内存中渲染SVG_ICONS中的模板，不写临时文件；同一图标和颜色只渲染一次
+    参数:
+    icon_name: str - 图标名称（SVG_ICONS字典中的键，不存在时使用默认图标）
+    color: str - 图标颜色
+    返回:
+    QIcon - 图标
+    """
+    key = (icon_name, color)
+    icon = _icon_cache.get(key)
+    if icon is not None:
+        return icon
+    
+    svg_content = SVG_ICONS.get(icon_name, SVG_ICONS['default']).replace('{color}', color)
+    renderer = QSvgRenderer(QByteArray(svg_content.encode('utf-8')))
+    icon = QIcon()
+    if renderer.isValid():
+        for size in ICON_SIZES:
+            pixmap = QPixmap(size, size)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            renderer.render(painter)
+            painter.end()
+            icon.addPixmap(pixmap)
+        # 确保SVG作为蒙版处理
+        icon.setIsMask(True)
+    else:
+        logger.error("无法渲染SVG图标: %s", icon_name)
+    _icon_cache[key] = icon
+    return icon
 
-# 配置日志
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+def clear_icon_cache():
+    """清空图标缓存（系统主题颜色变化时调用）"""
+    _icon_cache.clear()
+
+# 配置日志（默认只输出警告和错误，调试时设置 ACCOUNT_MANAGER_LOG_LEVEL=DEBUG）
+setup_logging()
 logger = logging.getLogger(__name__)
 
+mark_startup('imports')
+
 # ======================= 公共工具函数 =======================
 def show_status_message(parent, message, duration=3000):
     """
@@ -124,13 +150,14 @@ def show_status_message(parent, message, duration=3000):
     message: str - 提示消息
     duration: int - 提示持续时间(毫秒)
     """
-    print(f"状态栏提示: {message}")
+    logger.debug("状态栏提示: %s", message)
     status_bar = parent.statusBar()
     status_bar.show()  # 确保状态栏可见
     status_bar.showMessage(message, duration)  # 显示提示
-    # 在提示消失后隐藏状态栏
+    # 在提示消失后隐藏状态栏（后台任务进度提示仍在显示时保留）
     from PyQt6.QtCore import QTimer
-    QTimer.singleShot(duration, lambda: status_bar.hide())
+    busy_label = getattr(parent, 'busy_label', None)
+    QTimer.singleShot(duration, lambda: status_bar.hide() if not (busy_label and busy_label.isVisible()) else None)
 
 def create_styled_button(button_type, text='', icon_name=None, fixed_width=None, color=None, show_border=False):
     """
@@ -153,15 +180,6 @@ def create_styled_button(button_type, text='', icon_name=None, fixed_width=None,
     
     if button_type == 'icon':
         if icon_name:
-            if color:
-                # 使用create_temporary_svg创建带颜色的临时SVG文件
-                temp_svg_path = create_temporary_svg(icon_name, color)
-                if temp_svg_path:
-                    print(f"加载临时SVG路径: {temp_svg_path}")
-                    icon = QIcon(temp_svg_path)
-                    # 确保SVG作为蒙版处理
-                    icon.setIsMask(True)
-                    btn.setIcon(icon)
             # 如果没有指定颜色，则使用默认颜色
             if not color:
                 # 获取系统文本颜色
@@ -171,15 +189,8 @@ def create_styled_button(button_type, text='', icon_name=None, fixed_width=None,
                     color = palette.color(QPalette.ColorRole.WindowText).name()
                 else:
                     color = "#000000"  # 默认黑色
-
-            # 使用create_temporary_svg创建带颜色的临时SVG文件
-            temp_svg_path = create_temporary_svg(icon_name, color)
-            if temp_svg_path:
-                print(f"加载临时SVG路径: {temp_svg_path}")
-                icon = QIcon(temp_svg_path)
-                # 确保SVG作为蒙版处理
-                icon.setIsMask(True)
-                btn.setIcon(icon)
+            
+            btn.setIcon(get_icon(icon_name, color))
         
         # 图标按钮样式
         if show_border:
@@ -226,11 +237,11 @@ def create_styled_button(button_type, text='', icon_name=None, fixed_width=None,
 def create_account_info_layout(account_data, parent, copy_callback, toggle_callback, delete_callback, edit_callback, color):
     """
     创建账号信息布局
-    返回: QVBoxLayout - 包含账号信息的布局
+    按钮回调读取 parent.account_data，容器重新绑定账号数据后无需重建布局
+    返回: (QVBoxLayout, 账号标签, 密码标签, 备注标签, 显示密码按钮)
     """
     layout = QVBoxLayout()
     account = account_data.get("账号", "")
-    password = account_data.get("密码", "")
     remark = account_data.get("备注", "")
     
     # 账号标签和按钮
@@ -244,7 +255,7 @@ def create_account_info_layout(account_data, parent, copy_callback, toggle_callb
     
     account_button = create_styled_button('icon', icon_name='copy', color=color)
     account_button.setFixedSize(30, 30)
-    account_button.clicked.connect(lambda: copy_callback(account))
+    account_button.clicked.connect(lambda: copy_callback(parent.account_data.get("账号", "")))
     account_layout.addWidget(account_button)
     
     layout.addLayout(account_layout)
@@ -262,12 +273,13 @@ def create_account_info_layout(account_data, parent, copy_callback, toggle_callb
     password_button1 = create_styled_button('icon', icon_name='eye2', color=color)
     password_button1.setFixedSize(30, 30)
     password_button1.is_closed = True
-    password_button1.clicked.connect(lambda: toggle_callback(password_label, password, password_button1))
+    password_button1.clicked.connect(lambda: toggle_callback(
+        password_label, parent.account_data.get("密码", ""), password_button1))
     password_layout.addWidget(password_button1)
     
     password_button2 = create_styled_button('icon', icon_name='copy', color=color)
     password_button2.setFixedSize(30, 30)
-    password_button2.clicked.connect(lambda: copy_callback(password))
+    password_button2.clicked.connect(lambda: copy_callback(parent.account_data.get("密码", "")))
     password_layout.addWidget(password_button2)
     
     layout.addLayout(password_layout)
@@ -297,7 +309,7 @@ def create_account_info_layout(account_data, parent, copy_callback, toggle_callb
     button_layout.addWidget(edit_button)
     
     layout.addLayout(button_layout)
-    return layout
+    return layout, account_label, password_label, remark_label, password_button1
 
 def create_input_form(parent, account="", password="", remark="", submit_callback=None, cancel_callback=None):
     """
@@ -419,27 +431,15 @@ def create_plus_button_layout(parent, click_callback):
     layout.addStretch(1)
     return layout, plus_button, text_label
 
-def clear_layout(layout):
-    """清除布局中的所有元素"""
-    while layout.count() > 0:
-        item = layout.takeAt(0)
-        widget = item.widget()
-        if widget:
-            widget.hide()
-            layout.removeWidget(widget)
-        else:
-            sub_layout = item.layout()
-            if sub_layout:
-                clear_layout(sub_layout)
-                layout.removeItem(sub_layout)
-
 # ======================= 组件类 =======================
 class AccountContainer(QWidget):
     """账号信息容器组件"""
-    def __init__(self, account_data=None, index=0, bg_color=None, parent=None):
+    def __init__(self, account_data=None, index=0, bg_color=None, parent=None, account_id=None):
         super().__init__(parent)
         self.account_data = account_data or {}
+        self.account_id = account_id
         self.index = index
+        self.close_callback = None  # 在卡片视图中作为编辑器使用时，取消后关闭编辑器
         
         # 获取系统文本颜色
         app = QApplication.instance()
@@ -457,30 +457,62 @@ class AccountContainer(QWidget):
         self.layout.setContentsMargins(10, 10, 10, 10)
         self.layout.setSpacing(0)
         
+        self.display_widget = None  # 账号显示部分，只创建一次
+        self.form_widget = None     # 修改表单，只在修改时存在
+        
         # 创建账号信息布局
         self.create_account_display()
     
+    def bind(self, account_data, index, account_id=None):
+        """
+        重新绑定账号数据（卡片池复用容器时调用，只更新文本，不重建布局）
+        参数:
+        account_data: dict - 账号信息
+        index: int - 卡片序号
+        account_id: int - 账号id
+        """
+        self.account_data = account_data or {}
+        self.account_id = account_id
+        self.index = index
+        self.create_account_display()
+        self.account_label.setText(self.account_data.get("账号", ""))
+        self.remark_label.setText(self.account_data.get("备注", ""))
+        # 复用前若密码处于显示状态，恢复为隐藏
+        if self.password_label.text() != ' ●●●●●●':
+            self.toggle_password_visibility(self.password_label, '', self.toggle_button)
+    
     def create_account_display(self):
-        """创建账号显示布局"""
-        clear_layout(self.layout)
-        
-        layout = create_account_info_layout(
-            self.account_data,
-            self,
-            self.copy_to_clipboard,
-            self.toggle_password_visibility,
-            self.on_delete_button_clicked,
-            self.on_edit_button_clicked,
-            self.icon_color
-        )
-        self.layout.addLayout(layout)
-        
-        # 打印验证颜色值（调试用）
-        print(f"实际使用的图标颜色: {self.icon_color}")
+        """显示账号信息（显示部分只创建一次，之后只切换可见性）"""
+        if self.form_widget is not None:
+            self.form_widget.hide()
+            self.layout.removeWidget(self.form_widget)
+            self.form_widget.deleteLater()
+            self.form_widget = None
+        
+        if self.display_widget is None:
+            layout, self.account_label, self.password_label, self.remark_label, self.toggle_button = \
+                create_account_info_layout(
+                    self.account_data,
+                    self,
+                    self.copy_to_clipboard,
+                    self.toggle_password_visibility,
+                    self.on_delete_button_clicked,
+                    self.on_edit_button_clicked,
+                    self.icon_color
+                )
+            layout.setContentsMargins(0, 0, 0, 0)
+            self.display_widget = QWidget()
+            self.display_widget.setLayout(layout)
+            self.layout.addWidget(self.display_widget)
+            
+            # 打印验证颜色值（调试用）
+            logger.debug("实际使用的图标颜色: %s", self.icon_color)
+        self.display_widget.show()
     
     def create_input_form(self):
         """创建输入表单布局"""
-        clear_layout(self.layout)
+        if self.form_widget is not None:
+            return
         
         layout, self.account_input, self.password_input, self.remark_input = create_input_form(
             self,
@@ -490,8 +522,12 @@ class AccountContainer(QWidget):
             self.on_submit_button_clicked,
             self.on_cancel_button_clicked
         )
-        self.layout.addLayout(layout)
-        self.layout.addStretch(1)
+        layout.addStretch(1)
+        self.form_widget = QWidget()
+        self.form_widget.setLayout(layout)
+        if self.display_widget is not None:
+            self.display_widget.hide()
+        self.layout.addWidget(self.form_widget)
     
     def copy_to_clipboard(self, text):
         """将文本复制到剪贴板"""
@@ -508,19 +544,12 @@ class AccountContainer(QWidget):
         """切换密码显示/隐藏状态、图标和字体大小"""
         if label.text() == ' ●●●●●●':
             label.setText(original_password)
-            # 创建带颜色的临时SVG文件
-            temp_svg_path = create_temporary_svg('eye', self.icon_color)
-            if temp_svg_path:
-                button.setIcon(QIcon(temp_svg_path))
-                button.setIcon(QIcon(temp_svg_path))
+            button.setIcon(get_icon('eye', self.icon_color))
             button.is_closed = False
             label.setFont(QFont("SimHei", 12))
         else:
             label.setText(' ●●●●●●')
-            # 创建带颜色的临时SVG文件
-            temp_svg_path = create_temporary_svg('eye2', self.icon_color)
-            if temp_svg_path:
-                button.setIcon(QIcon(temp_svg_path))
+            button.setIcon(get_icon('eye2', self.icon_color))
             button.is_closed = True
             label.setFont(QFont("SimHei", 6))
             
@@ -533,13 +562,13 @@ class AccountContainer(QWidget):
                 main_window = main_window.parentWidget()
             
             if main_window:
-                main_window.delete_account(self.account_data)
+                main_window.delete_account(self.account_id)
         except Exception as e:
             QMessageBox.critical(self, "错误", f"删除账号时出错：{str(e)}")
     
     def on_submit_button_clicked(self, account, password, remark):
         """处理表单提交事件，验证输入并更新账号信息"""
-        print(f"调用函数: AccountContainer.on_submit_button_clicked(账号={account}, 密码={password}, 备注={remark})")
+        logger.debug("调用函数: AccountContainer.on_submit_button_clicked(账号=%s)", account)
         if not account or not password:
             QMessageBox.warning(self, "输入错误", "账号和密码不能为空！")
             return
@@ -552,7 +581,7 @@ class AccountContainer(QWidget):
             
             if main_window:
                 main_window.update_account(
-                    self.account_data,
+                    self.account_id,
                     account,
                     password,
                     remark
@@ -566,6 +595,9 @@ class AccountContainer(QWidget):
 
     def on_cancel_button_clicked(self):
         """处理取消按钮点击事件"""
+        if self.close_callback:
+            self.close_callback()
+            return
         self.create_account_display()
 
 
@@ -574,6 +606,7 @@ class AddAccountContainer(QWidget):
     def __init__(self, website_key=None, bg_color=None, parent=None):
         super().__init__(parent)
         self.website_key = website_key
+        self.close_callback = None  # 在卡片视图中作为编辑器使用时，取消后关闭编辑器
         
         # 透明背景，无边框
         self.setStyleSheet("background-color: transparent; border: none; border-radius: 5px; padding: 10px;")
@@ -583,29 +616,48 @@ class AddAccountContainer(QWidget):
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(5, 5, 5, 5)
         
+        self.plus_widget = None  # 加号按钮部分，只创建一次
+        self.form_widget = None  # 输入表单，只在添加时存在
+        self.account_input = None
+        
         self.create_plus_button()
     
     def create_plus_button(self):
-        """创建加号按钮布局"""
-        clear_layout(self.layout)
-        
-        layout, self.plus_button, self.text_label = create_plus_button_layout(
-            self,
-            self.on_plus_button_clicked
-        )
-        self.layout.addLayout(layout)
+        """显示加号按钮（丢弃尚未提交的输入表单）"""
+        if self.form_widget is not None:
+            self.form_widget.hide()
+            self.layout.removeWidget(self.form_widget)
+            self.form_widget.deleteLater()
+            self.form_widget = None
+            self.account_input = self.password_input = self.remark_input = None
+        
+        if self.plus_widget is None:
+            layout, self.plus_button, self.text_label = create_plus_button_layout(
+                self,
+                self.on_plus_button_clicked
+            )
+            layout.setContentsMargins(0, 0, 0, 0)
+            self.plus_widget = QWidget()
+            self.plus_widget.setLayout(layout)
+            self.layout.addWidget(self.plus_widget)
+        self.plus_widget.show()
     
     def create_input_form(self):
         """创建输入表单布局"""
-        clear_layout(self.layout)
+        if self.form_widget is not None:
+            return
         
         layout, self.account_input, self.password_input, self.remark_input = create_input_form(
             self,
             submit_callback=self.on_submit_button_clicked,
             cancel_callback=self.on_cancel_button_clicked
         )
-        self.layout.addLayout(layout)
-        self.layout.addStretch(1)
+        layout.addStretch(1)
+        self.form_widget = QWidget()
+        self.form_widget.setLayout(layout)
+        if self.plus_widget is not None:
+            self.plus_widget.hide()
+        self.layout.addWidget(self.form_widget)
     
     def on_plus_button_clicked(self):
         """处理圆形按钮点击事件"""
@@ -613,11 +665,14 @@ class AddAccountContainer(QWidget):
     
     def on_cancel_button_clicked(self):
         """处理取消按钮点击事件"""
+        if self.close_callback:
+            self.close_callback()
+            return
         self.create_plus_button()
     
     def on_submit_button_clicked(self, account, password, remark):
         """处理表单提交事件 - 根据is_adding_website决定调用函数"""
-        print(f"调用函数: AddAccountContainer.on_submit_button_clicked(账号={account}, 密码={password}, 备注={remark})")
+        logger.debug("调用函数: AddAccountContainer.on_submit_button_clicked(账号=%s)", account)
         # 获取主窗口实例
         main_window = self.window()
         if not isinstance(main_window, TitleBarColorWindow):
@@ -632,13 +687,13 @@ class AddAccountContainer(QWidget):
         if main_window:
             if hasattr(main_window, 'is_adding_website') and main_window.is_adding_website:
                 # 如果正在添加新网站，则调用保存网站函数
-                print("检测到正在添加新网站，调用保存网站函数")
+                logger.debug("检测到正在添加新网站，调用保存网站函数")
                 # 设置账号信息到容器
                 if hasattr(main_window, 'current_add_container') and main_window.current_add_container == self:
                     main_window.on_confirm_new_website()
             elif hasattr(main_window, 'submit_new_account'):
                 # 否则调用添加账号函数
-                print("正常添加账号")
+                logger.debug("正常添加账号")
                 main_window.submit_new_account(
                     account, 
                     password, 
@@ -647,77 +702,355 @@ class AddAccountContainer(QWidget):
                 )
 
 
-# ======================= 密码派生加密类 =======================
-class PasswordBasedEncryption:
-    """基于密码的加密系统 - 无需密钥文件"""
-    
-    def __init__(self):
-        self.salt_size = 16  # 盐的长度
-        self.iterations = 100000  # 迭代次数，提高安全性
-        
-    def _derive_key_from_password(self, password: str, salt: bytes = None) -> tuple:
+# ======================= 虚拟化账号卡片视图 =======================
+class AccountCardModel(QAbstractListModel):
+    """
+    账号卡片数据模型
+    只保存当前显示的账号id列表（某个网站的账号或搜索结果），账号内容按需从数据模型中读取；
+    显示网站时最后一行为"添加新账号"卡片
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.vault = None
+        self.list_key = None  # 网站id，或搜索结果的标识
+        self.account_ids = []
+        self.show_add = True
+        self.revealed = set()  # 显示明文密码的账号id
+
+    def set_accounts(self, vault, account_ids, list_key=None, show_add=True):
         """
-        从密码派生密钥
-        
+        切换显示的账号（vault为None时清空）
         参数:
-            password: 用户密码
-            salt: 盐值，如果不提供则生成新的
-            
-        返回:
-            (key, salt) 密钥和盐值
+        account_ids: list - 账号id
+        list_key: 列表标识（网站id或搜索内容）
+        show_add: bool - 是否显示"添加新账号"卡片
         """
-        if salt is None:
-            salt = os.urandom(self.salt_size)
-            
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,  # 256位密钥
-            salt=salt,
-            iterations=self.iterations,
-            backend=default_backend()
-        )
-        
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-        return key, salt
-    
-    def encrypt_data(self, data: str, password: str) -> bytes:
-        """加密数据"""
-        key, salt = self._derive_key_from_password(password)
-        f = Fernet(key)
-        encrypted = f.encrypt(data.encode('utf-8'))
-        
-        # 将盐和加密数据一起存储
-        return salt + encrypted
-    
-    def decrypt_data(self, encrypted_data: bytes, password: str) -> str:
-        """解密数据"""
-        if len(encrypted_data) < self.salt_size:
-            raise ValueError("无效的数据格式")
-            
-        # 提取盐（前16字节）
-        salt = encrypted_data[:self.salt_size]
-        encrypted = encrypted_data[self.salt_size:]
-        
-        # 重新派生密钥
-        key, _ = self._derive_key_from_password(password, salt)
-        f = Fernet(key)
-        
+        self.beginResetModel()
+        self.vault = vault
+        self.list_key = list_key
+        self.account_ids = list(account_ids) if vault is not None else []
+        self.show_add = show_add
+        self.revealed &= set(self.account_ids)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.vault is None:
+            return 0
+        return len(self.account_ids) + (1 if self.show_add else 0)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or self.is_add_row(index.row()):
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.account_at(index.row()).get('账号', '')
+        if role == Qt.ItemDataRole.UserRole:
+            return self.account_ids[index.row()]
+        return None
+
+    def is_add_row(self, row):
+        return self.show_add and row == len(self.account_ids)
+
+    def account_id(self, row):
+        return self.account_ids[row]
+
+    def account_at(self, row):
+        return self.vault.account(self.account_ids[row]) or {}
+
+    def is_revealed(self, row):
+        return self.account_ids[row] in self.revealed
+
+    def toggle_revealed(self, row):
+        """切换密码明文显示，只重绘这一张卡片"""
+        account_id = self.account_ids[row]
+        if account_id in self.revealed:
+            self.revealed.discard(account_id)
+        else:
+            self.revealed.add(account_id)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+
+class AccountCardDelegate(QStyledItemDelegate):
+    """
+    账号卡片绘制代理
+    直接绘制卡片边框、账号、密码、备注、图标和按钮，不为每个账号创建控件；
+    鼠标点击按区域换算为操作名，通过 actionTriggered 信号交给主窗口处理
+    """
+    actionTriggered = pyqtSignal(str, QModelIndex)
+
+    ACCOUNT_ACTIONS = ('copy_account', 'toggle', 'copy_password', 'delete', 'edit')
+
+    def sizeHint(self, option, index):
+        return QSize(CARD_WIDTH, CARD_HEIGHT)
+
+    @staticmethod
+    def card_rects(rect):
+        """卡片内各区域的位置（与 create_account_info_layout 的排布一致）"""
+        card = QRect(0, 0, CARD_WIDTH, CARD_HEIGHT)
+        card.moveCenter(rect.center())
+        inner = card.adjusted(15, 15, -15, -15)
+        x, y, right, bottom = inner.left(), inner.top(), inner.right(), inner.bottom()
+        return {
+            'card': card,
+            'account': QRect(x, y, inner.width() - 35, 30),
+            'copy_account': QRect(right - 29, y, 30, 30),
+            'password': QRect(x, y + 35, inner.width() - 70, 30),
+            'toggle': QRect(right - 64, y + 35, 30, 30),
+            'copy_password': QRect(right - 29, y + 35, 30, 30),
+            'remark': QRect(x, y + 70, inner.width(), 30),
+            'delete': QRect(right - 124, bottom - 27, 60, 28),
+            'edit': QRect(right - 59, bottom - 27, 60, 28),
+            'add': QRect(card.center().x() - 30, card.center().y() - 42, 60, 60),
+            'add_text': QRect(card.left(), card.center().y() + 22, card.width(), 20),
+        }
+
+    def paint(self, painter, option, index):
+        view = self.parent()
+        if view is not None and view.indexWidget(index) is not None:
+            # 正在编辑的卡片由表单控件自行绘制
+            return
+        model = index.model()
+        rects = self.card_rects(option.rect)
+        color = option.palette.color(QPalette.ColorRole.WindowText)
+        
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(color, 1))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRoundedRect(QRectF(rects['card']).adjusted(0.5, 0.5, -0.5, -0.5), 8, 8)
+        
+        if model.is_add_row(index.row()):
+            self._paint_add_card(painter, rects, color)
+        else:
+            self._paint_account_card(painter, rects, model.account_at(index.row()),
+                                     model.is_revealed(index.row()), color)
+        painter.restore()
+
+    def _paint_account_card(self, painter, rects, account_data, revealed, color):
+        align = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+        font = QFont("SimHei", 12)
+        painter.setFont(font)
+        metrics = painter.fontMetrics()
+        
+        account = account_data.get("账号", "")
+        painter.drawText(rects['account'], align,
+                         metrics.elidedText(account, Qt.TextElideMode.ElideRight, rects['account'].width()))
+        
+        if revealed:
+            password = account_data.get("密码", "")
+            painter.drawText(rects['password'], align,
+                             metrics.elidedText(password, Qt.TextElideMode.ElideRight, rects['password'].width()))
+        else:
+            painter.setFont(QFont("SimHei", 6))
+            painter.drawText(rects['password'], align, ' ●●●●●●')
+            painter.setFont(font)
+        
+        remark = account_data.get("备注", "")
+        if remark:
+            painter.drawText(rects['remark'], align | Qt.TextFlag.TextWordWrap, remark)
+        
+        color_name = color.name()
+        get_icon('copy', color_name).paint(painter, rects['copy_account'].adjusted(7, 7, -7, -7))
+        get_icon('eye' if revealed else 'eye2', color_name).paint(painter, rects['toggle'].adjusted(7, 7, -7, -7))
+        get_icon('copy', color_name).paint(painter, rects['copy_password'].adjusted(7, 7, -7, -7))
+        
+        # 按钮（与 create_styled_button 的带边框文本按钮外观一致）
+        painter.setPen(QPen(QColor('#ccc'), 1))
+        for name, text in (('delete', '删除'), ('edit', '修改')):
+            painter.drawRoundedRect(QRectF(rects[name]).adjusted(0.5, 0.5, -0.5, -0.5), 4, 4)
+            painter.setPen(QPen(color, 1))
+            painter.drawText(rects[name], Qt.AlignmentFlag.AlignCenter, text)
+            painter.setPen(QPen(QColor('#ccc'), 1))
+
+    def _paint_add_card(self, painter, rects, color):
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor('#2E8B57'))
+        painter.drawEllipse(rects['add'])
+        painter.setPen(QColor('white'))
+        painter.setFont(QFont("SimHei", 24, QFont.Weight.Bold))
+        painter.drawText(rects['add'], Qt.AlignmentFlag.AlignCenter, "+")
+        painter.setPen(color)
+        painter.setFont(QFont("SimHei", 10))
+        painter.drawText(rects['add_text'], Qt.AlignmentFlag.AlignCenter, "添加新账号")
+
+    def hit_test(self, rect, pos, is_add_row):
+        """返回点击位置对应的操作名，未点中任何按钮时返回None"""
+        rects = self.card_rects(rect)
+        names = ('add',) if is_add_row else self.ACCOUNT_ACTIONS
+        for name in names:
+            if rects[name].contains(pos):
+                return name
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton):
+            action = self.hit_test(option.rect, event.position().toPoint(), model.is_add_row(index.row()))
+            if action:
+                self.actionTriggered.emit(action, index)
+                return True
+        return super().editorEvent(event, model, option, index)
+
+
+class AccountCardView(QListView):
+    """
+    虚拟化的账号卡片网格
+    卡片由 AccountCardDelegate 绘制，只有可见区域内的卡片会被绘制，
+    窗口宽度变化时自动重新排列；只有正在编辑的卡片才创建表单控件
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMovement(QListView.Movement.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(500)
+        self.setGridSize(QSize(CARD_WIDTH + CARD_SPACING, CARD_HEIGHT + CARD_SPACING))
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setFrameShape(QFrame.Shape.NoFrame)
+        self.setStyleSheet("QListView { background-color: transparent; border: none; }")
+        
+        self.card_model = AccountCardModel(self)
+        self.setModel(self.card_model)
+        self.card_delegate = AccountCardDelegate(self)
+        self.setItemDelegate(self.card_delegate)
+        self._editor_index = None
+
+    def show_accounts(self, vault, account_ids, list_key, show_add=True):
+        """显示指定的账号（同一网站或同一搜索重新显示时保持滚动位置）"""
+        same_list = list_key == self.card_model.list_key
+        scroll = self.verticalScrollBar().value()
+        # 重置模型时视图会释放编辑器控件
+        self._editor_index = None
+        self.card_model.set_accounts(vault, account_ids, list_key, show_add)
+        if same_list:
+            self.doItemsLayout()
+            self.verticalScrollBar().setValue(scroll)
+
+    def clear(self):
+        self.show_accounts(None, [], None)
+
+    def open_editor(self, index, widget):
+        """在指定卡片位置显示编辑表单（同一时间只保留一个）"""
+        self.close_editor()
+        self._editor_index = QPersistentModelIndex(index)
+        self.setIndexWidget(index, widget)
+
+    def close_editor(self):
+        """关闭编辑表单，恢复绘制的卡片"""
+        if self._editor_index is not None and self._editor_index.isValid():
+            # 旧控件由视图延迟删除，可在控件自身的按钮回调中调用
+            self.setIndexWidget(QModelIndex(self._editor_index), None)
+        self._editor_index = None
+
+
+# ======================= 后台加密任务 =======================
+class CryptoSignals(QObject):
+    """后台加密任务的信号（在主线程中接收）"""
+    progress = pyqtSignal(str)
+    partial = pyqtSignal(object)  # 分批产出的部分结果（例如逐批解密的网站）
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+
+class CryptoTask(QRunnable):
+    """
+    在线程池中执行密钥派生、加密、解密等耗时操作，避免阻塞界面
+    参数:
+    fn: callable - 要执行的函数，接收 progress 回调作为关键字参数
+    streaming: bool - 为True时 fn 还接收 partial 回调，用于分批把结果交给主线程
+    """
+    def __init__(self, fn, streaming=False):
+        super().__init__()
+        self.fn = fn
+        self.streaming = streaming
+        self.signals = CryptoSignals()
+        # 执行结果也保存在任务上，事件循环不再分发信号时（如关闭窗口）可以直接读取
+        self.result = None
+        self.error = None
+
+    def run(self):
         try:
-            decrypted = f.decrypt(encrypted)
-            return decrypted.decode('utf-8')
+            if self.streaming:
+                result = self.fn(progress=self.signals.progress.emit, partial=self.signals.partial.emit)
+            else:
+                result = self.fn(progress=self.signals.progress.emit)
         except Exception as e:
-            raise ValueError("密码错误或数据已损坏") from e
+            self.error = e
+            self.signals.failed.emit(e)
+        else:
+            self.result = result
+            self.signals.finished.emit(result)
+
+
+class SaveScheduler(QObject):
+    """
+    延迟写入调度器
+    修改只标记为待保存，最后一次修改后静默 quiet_ms 毫秒才触发保存，
+    连续的多次修改合并为一次加密和一次磁盘写入
+    参数:
+    flush_callback: callable - 执行保存的函数
+    quiet_ms: int - 静默时间(毫秒)
+    """
+    def __init__(self, flush_callback, quiet_ms=SAVE_QUIET_MS, parent=None):
+        super().__init__(parent)
+        self.flush_callback = flush_callback
+        self.quiet_ms = quiet_ms
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+        
+        # 统计计数，用于确认合并写入是否生效
+        self.flushes = 0
+        self.coalesced_edits = 0
+        self.bytes_written = 0
+        self._edits_since_flush = 0
+
+    def mark_dirty(self):
+        """标记有未保存的修改，并重新开始静默计时"""
+        self._edits_since_flush += 1
+        self.timer.start(self.quiet_ms)
+
+    def is_dirty(self):
+        return self._edits_since_flush > 0
+
+    def flush(self, callback=None):
+        """
+        立即保存（静默期结束、关闭窗口、锁定或手动保存时调用）
+        参数:
+        callback: callable - 代替 flush_callback 执行保存（如关闭窗口时同步写入）
+        """
+        self.timer.stop()
+        if not self._edits_since_flush:
+            return False
+        self.flushes += 1
+        self.coalesced_edits += self._edits_since_flush - 1
+        self._edits_since_flush = 0
+        (callback or self.flush_callback)()
+        return True
+
+    def record_bytes(self, count):
+        """累计写入磁盘的字节数（可在后台线程中调用）"""
+        self.bytes_written += count or 0
+
+    def stats(self):
+        """返回保存统计"""
+        return {
+            "flushes": self.flushes,
+            "coalesced_edits": self.coalesced_edits,
+            "bytes_written": self.bytes_written,
+        }
 
 
 class TitleBarColorWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        # 记录应用启动统计
-        try:
-            record_app_launch()
-        except:
-            pass
-            
         # 初始化状态栏
         self.statusBar().hide()  # 初始状态下隐藏状态栏
         self.setWindowTitle("账号记事本")
@@ -726,21 +1059,83 @@ class TitleBarColorWindow(QMainWindow):
         self.resize(710, 430)
         self.setMinimumSize(710, 430)  # 设置最小窗口尺寸
         
-        self.website_data = {}
+        self.vault = Vault()  # 内存中的权威数据，带网站/账号索引
+        self.site_items = {}  # 网站id -> 左侧列表项
         self.current_website_key = None
         self.title_bar_color = None
         self.resize_timer = None
         self.is_adding_website = False  # 添加逻辑型变量，默认为False
         self.current_columns = 2  # 初始列数，与默认设置保持一致
         
+        # 账号卡片池：切换网站时复用已创建的卡片，控件数量不超过单个网站的最大账号数
+        self.card_pool = []
+        self.active_cards = []
+        self.add_card = None
+        
+        # 解锁会话：解锁一次后复用派生密钥，保存时不再重复输入密码；
+        # 第一次解锁时才连接解锁代理（vault_agent），代理正在运行时由代理保存密钥，再次启动时无需输入密码
+        self.session = UnlockSession(timeout=SESSION_TIMEOUT)
+        self._agent_checked = False
+        self._uses_agent = False
+        self.session_timer = QTimer(self)
+        self.session_timer.timeout.connect(self._expire_session_if_idle)
+        self.session_timer.start(60 * 1000)
+        
+        # 加密追加日志存储：保存时只追加变化的网站
+        self.store = VaultStore(get_data_file_path(), self.session)
+        # 首选密钥派生设置（环境变量 ACCOUNT_MANAGER_KDF），与数据文件不一致时在下次保存时升级
+        self.store.kdf_policy = preferred_kdf_params
+        # 数据文件变更检测：只有文件在磁盘上被修改时才重新加载
+        self.data_monitor = self.store.monitor
+        
+        # 加密线程池：单线程执行，保证写入顺序
+        self.crypto_pool = QThreadPool(self)
+        self.crypto_pool.setMaxThreadCount(1)
+        self._crypto_tasks = set()
+        self._save_in_flight = False
+        self._save_task = None  # 正在执行的后台保存任务
+        self._loading = False  # 正在逐条解密数据文件
+        self._save_failed = False  # 上次保存失败，修改只在内存中
+        self._pinned_sites = set()  # 正在显示的网站，其账号明文不会被丢弃
+        self._pending_full_save = False
+        self._pending_changed = set()
+        self._pending_deleted = set()
+        # 延迟写入：连续修改在静默期后合并为一次保存
+        self.save_scheduler = SaveScheduler(self._flush_saves, parent=self)
+        # 搜索索引分批建立的定时器（0毫秒：事件循环空闲时执行）
+        self.search_index_timer = QTimer(self)
+        self.search_index_timer.setInterval(0)
+        self.search_index_timer.timeout.connect(self._index_search_step)
+        perf_metrics.registry.extra_sections['save_stats'] = self.get_save_stats
+        
         # 获取系统文本颜色
         palette = self.palette()
         self.icon_color = palette.color(QPalette.ColorRole.WindowText).name()
         
         self._init_ui()
         self.apply_system_theme_color()  # 先应用主题颜色
+        self.show()  # 先显示窗口，解锁时可显示进度提示
         self._load_data()  # 再加载数据
-        self.show()
+        mark_startup('unlock')
+        # 非关键的初始化推迟到界面显示之后
+        QTimer.singleShot(0, self._deferred_init)
+    
+    def _deferred_init(self):
+        """窗口显示并解锁后再执行的初始化（导入使用统计模块并记录启动）"""
+        # 记录应用启动统计
+        try:
+            from usage_stats import record_app_launch
+            record_app_launch()
+        except Exception:
+            pass
+        # 搜索索引在界面空闲时分批建立，第一次搜索时不必等待
+        self.search_index_timer.start()
+        mark_startup('deferred_init')
+        report_startup_timeline()
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        mark_startup('first_paint')
         
     def create_visit_button(self):
         """创建访问按钮 - 确保使用正确的颜色"""
@@ -848,6 +1243,16 @@ class TitleBarColorWindow(QMainWindow):
         
         self.top_layout.addStretch(1)
         
+        # 搜索框：在所有网站的网站名、网址、账号、备注中搜索
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("搜索网站/账号/备注")
+        self.search_input.setFixedWidth(180)
+        self.search_input.setFixedHeight(30)
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self.on_search_text_changed)
+        self.top_layout.addWidget(self.search_input)
+        self.search_query = ''
+        
         self.add_account_button = create_styled_button('text', '添加新网站', fixed_width=100)
         self.add_account_button.setFixedHeight(30)
         self.add_account_button.clicked.connect(self.on_add_website_clicked)
@@ -879,37 +1284,130 @@ class TitleBarColorWindow(QMainWindow):
         self.scroll_area.setWidget(self.flow_container)
         self.bottom_layout.addWidget(self.scroll_area)
         
+        # 账号较多的网站使用虚拟化卡片视图（第一次需要时才创建）
+        self.card_view = None
+        
         self.right_layout.addWidget(self.right_top_widget)
         self.right_layout.addWidget(self.right_bottom_widget)
         
         self.main_layout.addWidget(self.left_widget, 1)
         self.main_layout.addWidget(self.right_widget, 3)
         
+        # Ctrl+S 立即保存未写入的修改
+        self.save_shortcut = QShortcut(QKeySequence(QKeySequence.StandardKey.Save), self)
+        self.save_shortcut.activated.connect(lambda: self.save_scheduler.flush())
+        # Ctrl+F 跳到搜索框
+        self.search_shortcut = QShortcut(QKeySequence(QKeySequence.StandardKey.Find), self)
+        self.search_shortcut.activated.connect(self.focus_search)
+        
+        # 状态栏中的后台任务进度提示（解锁、保存）
+        self.busy_label = QLabel()
+        self.busy_label.hide()
+        self.statusBar().addPermanentWidget(self.busy_label)
+        
         self.installEventFilter(self)
 
     def on_list_item_clicked(self, item):
         """列表项点击事件处理"""
-        website_name = item.text()
+        self.leave_search()
+        # 列表项中保存了网站id，直接按索引定位
+        key = item.data(Qt.ItemDataRole.UserRole)
+        if key is None:
+            key = self.vault.find_site_by_name(item.text())
+        if key not in self.vault:
+            return
+        # 网站的账号列表在第一次打开时才解密
+        if not self._ensure_sites_readable([key]):
+            return
         
-        for key, info in self.website_data.items():
-            if info.get('网站名') == website_name:
-                self.current_website_key = key
-                website_url = info.get('网址', '未知网址')
-                
-                # 去除网址中的http://和https://前缀
-                if website_url.startswith('http://'):
-                    website_url =  website_url[7:]
-                elif website_url.startswith('https://'):
-                    website_url =  website_url[8:]
-                
-                self.website_label.setText('网址：'+ website_url)
-                self.display_accounts(info)
-                break
+        self.current_website_key = key
+        info = self.vault.site(key)
+        website_url = info.get('网址', '未知网址')
+        
+        # 去除网址中的http://和https://前缀
+        if website_url.startswith('http://'):
+            website_url =  website_url[7:]
+        elif website_url.startswith('https://'):
+            website_url =  website_url[8:]
+        
+        self.website_label.setText('网址：'+ website_url)
+        try:
+            self._run_unlocked(lambda: self.display_accounts(key), [key])
+        except (RuntimeError, ValueError) as e:
+            logger.error("解密网站账号失败: %s", e)
+            QMessageBox.critical(self, "错误", f"无法读取该网站的账号：{str(e)}")
      
+    # ---------- 搜索 ----------
+    def focus_search(self):
+        if self.search_input.isVisible():
+            self.search_input.setFocus()
+            self.search_input.selectAll()
+
+    def on_search_text_changed(self, text):
+        """搜索框内容变化时立即搜索，清空后恢复显示当前网站"""
+        self.search_query = text.strip()
+        if self.search_query:
+            self.show_search_results()
+            return
+        self.visit_button.show()
+        item = self.site_items.get(self.current_website_key)
+        if item is not None:
+            self.list_widget.setCurrentItem(item)
+            self.on_list_item_clicked(item)
+
+    @timed('search')
+    def show_search_results(self):
+        """在卡片网格中显示搜索结果（不显示"添加账号"卡片）"""
+        # 尚未建立索引的网站和结果所在的网站可能需要解密
+        if not self._ensure_sites_readable():
+            return
+        def search():
+            account_ids = self.vault.search(self.search_query)
+            return account_ids, [(account_id, self.vault.account(account_id)) for account_id in account_ids]
+        
+        try:
+            account_ids, accounts = self._run_unlocked(search)
+            self._pinned_sites = {self.vault.site_of(account_id) for account_id in account_ids}
+        except (RuntimeError, ValueError) as e:
+            logger.error("搜索时解密网站账号失败: %s", e)
+            self.website_label.setText('搜索失败：部分网站的账号无法读取')
+            return
+        self.list_widget.clearSelection()
+        self.visit_button.hide()
+        if len(account_ids) >= SEARCH_LIMIT:
+            self.website_label.setText(f'搜索结果：前 {len(account_ids)} 个账号')
+        else:
+            self.website_label.setText(f'搜索结果：{len(account_ids)} 个账号')
+        self.show_account_cards(accounts, ('search', self.search_query), show_add=False)
+
+    def leave_search(self):
+        """退出搜索（不触发搜索框的内容变化处理）"""
+        if not self.search_query and not self.search_input.text():
+            return
+        self.search_query = ''
+        self.search_input.blockSignals(True)
+        self.search_input.clear()
+        self.search_input.blockSignals(False)
+        self.visit_button.show()
+
+    def _index_search_step(self):
+        """界面空闲时分批建立搜索索引，建完后停止定时器（会话锁定时不再解密，留到搜索时建立）"""
+        if not self.session.is_unlocked():
+            self.search_index_timer.stop()
+            return
+        try:
+            more = self.vault.index_search_step()
+        except (RuntimeError, ValueError) as e:
+            # RuntimeError: 解锁代理中的密钥已被清除，留到搜索时解锁后再建立
+            logger.warning("建立搜索索引失败: %s", e)
+            more = False
+        if not more:
+            self.search_index_timer.stop()
+
     def on_visit_button_clicked(self):
         """访问按钮点击事件处理"""
-        if hasattr(self, 'current_website_key') and self.current_website_key:
-            website_info = self.website_data.get(self.current_website_key, {})
+        if hasattr(self, 'current_website_key') and self.current_website_key in self.vault:
+            website_info = self.vault.site(self.current_website_key)
             website_url = website_info.get('网址', '')
             
             if website_url:
@@ -924,26 +1422,95 @@ class TitleBarColorWindow(QMainWindow):
         else:
             QMessageBox.warning(self, "提示", "请先选择一个网站！")
 
-    def display_accounts(self, website_info):
-        """显示指定网站的账号"""
+    @timed('display_accounts')
+    def display_accounts(self, website_key):
+        """显示指定网站的账号（账号列表尚未解密时在此解密）"""
+        self._pinned_sites = {website_key}
+        self.show_account_cards(self.vault.accounts(website_key), website_key)
+
+    def show_account_cards(self, accounts, list_key, show_add=True):
+        """
+        在卡片网格中显示账号
+        参数:
+        accounts: list - [(账号id, 账号信息), ...]
+        list_key: 列表标识（网站id或搜索内容），同一列表重新显示时保持滚动位置
+        show_add: bool - 是否在末尾显示"添加账号"卡片
+        """
         self.clear_flow_layout()
-        accounts = website_info.get('列表', [])
+        if len(accounts) >= VIRTUAL_GRID_THRESHOLD:
+            # 账号较多时只绘制可见卡片，不再逐个创建控件
+            self.set_card_view_visible(True)
+            self.card_view.show_accounts(self.vault, [account_id for account_id, _ in accounts], list_key, show_add)
+            return
+        self.set_card_view_visible(False)
         
-        # 创建账号容器
-        for i, account in enumerate(accounts):
-            outer_container = self.create_account_container(account, i)
+        # 账号容器优先从卡片池中复用
+        for i, (account_id, account) in enumerate(accounts):
+            outer_container = self.acquire_account_card(account, i, account_id)
             self.add_to_flow_layout(outer_container, i)
         
         # 添加"添加账号"容器
-        add_outer_container = self.create_add_account_container()
-        self.add_to_flow_layout(add_outer_container, len(accounts))
+        if show_add:
+            add_outer_container = self.acquire_add_card()
+            self.add_to_flow_layout(add_outer_container, len(accounts))
         
         # 更新布局
         self.flow_layout.update()
         self.scroll_area.update()
         self.flow_layout.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
 
-    def create_account_container(self, account_data, index):
+    def set_card_view_visible(self, visible):
+        """在虚拟化卡片视图和控件网格之间切换"""
+        if self.card_view is None:
+            if not visible:
+                return
+            self.card_view = AccountCardView()
+            self.card_view.card_delegate.actionTriggered.connect(self.on_card_action)
+            self.bottom_layout.addWidget(self.card_view)
+        if not visible:
+            self.card_view.clear()
+        self.card_view.setVisible(visible)
+        self.scroll_area.setVisible(not visible)
+
+    def on_card_action(self, action, index):
+        """
+        处理虚拟化卡片视图中的点击操作
+        参数:
+        action: str - 操作名 (copy_account/toggle/copy_password/delete/edit/add)
+        index: QModelIndex - 被点击的卡片
+        """
+        model = self.card_view.card_model
+        if action == 'add':
+            add_outer_container = self.create_add_account_container()
+            add_container = add_outer_container.findChild(AddAccountContainer)
+            add_container.close_callback = self.card_view.close_editor
+            add_container.create_input_form()
+            self.card_view.open_editor(index, add_outer_container)
+            return
+        
+        account_id = model.account_id(index.row())
+        account_data = self.vault.account(account_id)
+        if account_data is None:
+            return
+        
+        if action == 'copy_account':
+            QApplication.clipboard().setText(account_data.get('账号', ''))
+            show_status_message(self, '已复制到剪贴板')
+        elif action == 'copy_password':
+            QApplication.clipboard().setText(account_data.get('密码', ''))
+            show_status_message(self, '已复制到剪贴板')
+        elif action == 'toggle':
+            model.toggle_revealed(index.row())
+        elif action == 'delete':
+            self.delete_account(account_id)
+        elif action == 'edit':
+            outer_container = self.create_account_container(account_data, index.row(), account_id)
+            container = outer_container.findChild(AccountContainer)
+            container.close_callback = self.card_view.close_editor
+            container.create_input_form()
+            self.card_view.open_editor(index, outer_container)
+
+    def create_account_container(self, account_data, index, account_id=None):
         """创建账号容器"""
         outer_container = QWidget()
         outer_container.setFixedSize(260, 160)
@@ -962,11 +1529,43 @@ class TitleBarColorWindow(QMainWindow):
         outer_layout = QVBoxLayout(outer_container)
         outer_layout.setContentsMargins(0, 0, 0, 0)
         
-        container = AccountContainer(account_data, index, self.title_bar_color)
+        container = AccountContainer(account_data, index, self.title_bar_color, account_id=account_id)
         outer_layout.addWidget(container)
+        outer_container.account_container = container
         
         return outer_container
 
+    def acquire_account_card(self, account_data, index, account_id=None):
+        """
+        获取账号卡片：卡片池中有空闲卡片时重新绑定数据后复用，池空时才新建
+        返回: QWidget - 外层容器
+        """
+        if self.card_pool:
+            outer_container = self.card_pool.pop()
+            outer_container.account_container.bind(account_data, index, account_id)
+        else:
+            outer_container = self.create_account_container(account_data, index, account_id)
+        self.active_cards.append(outer_container)
+        return outer_container
+
+    def acquire_add_card(self):
+        """获取"添加账号"卡片（整个窗口只保留一个，复用时恢复为加号按钮）"""
+        if self.add_card is None:
+            self.add_card = self.create_add_account_container()
+        else:
+            self.add_card.findChild(AddAccountContainer).create_plus_button()
+        return self.add_card
+
+    def reset_card_pool(self):
+        """丢弃所有卡片（主题颜色变化时调用，之后按新颜色重新创建）"""
+        self.clear_flow_layout()
+        for outer_container in self.card_pool:
+            outer_container.deleteLater()
+        self.card_pool = []
+        if self.add_card is not None:
+            self.add_card.deleteLater()
+            self.add_card = None
+
     def create_add_account_container(self):
         """创建添加账号容器"""
         add_outer_container = QWidget()
@@ -1013,15 +1612,18 @@ class TitleBarColorWindow(QMainWindow):
         row = index // max_columns
         col = index % max_columns
         self.flow_layout.addWidget(widget, row, col)
+        widget.show()  # 复用的卡片在移出布局时被隐藏过
 
     def clear_flow_layout(self):
-        """清空流布局中的所有控件"""
+        """清空流布局中的所有控件，账号卡片放回卡片池等待复用"""
         while self.flow_layout.count() > 0:
             item = self.flow_layout.itemAt(0)
             widget = item.widget()
             if widget:
                 widget.hide()
                 self.flow_layout.removeWidget(widget)
+        self.card_pool.extend(self.active_cards)
+        self.active_cards = []
 
     def _get_encryption_instance(self):
         """获取基于密码的加密实例"""
@@ -1081,27 +1683,35 @@ class TitleBarColorWindow(QMainWindow):
                 return None
         return None
 
+    @timed('_load_data')
     def _load_data(self):
         """加载数据，要求必须输入正确密码才能加载主界面"""
         try:
-            # 获取程序运行目录
-            if hasattr(sys, '_MEIPASS'):
-                # 当程序被PyInstaller打包后
-                current_dir = os.path.dirname(sys.executable)
-            else:
-                # 开发模式
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-            
-            file_path = os.path.join(current_dir, 'data.json')
-            logger.debug(f"数据保存路径: {file_path}")
-            logger.debug(f"数据加载路径: {file_path}")
+            # 程序运行目录（或 ACCOUNT_MANAGER_DATA_DIR 指定的目录）
+            current_dir = get_data_dir()
+            file_path = get_data_file_path()
+            logger.debug("数据保存路径: %s", file_path)
+            logger.debug("数据加载路径: %s", file_path)
             
             data_loaded_successfully = False
-            self.website_data = {}
+            streamed = False
+            self.vault = Vault()
+            # 新建数据文件时也通过代理派生并保存密钥
+            self._connect_agent()
             
             if os.path.exists(file_path):
                 # 数据文件存在，要求密码验证
                 max_attempts = 3  # 最多尝试3次
+                if self._attach_agent_key():
+                    # 解锁代理中已有该数据文件的密钥，无需输入密码
+                    try:
+                        self._stream_load(None)
+                        data_loaded_successfully = True
+                        streamed = True
+                        max_attempts = 0
+                    except (RuntimeError, ValueError) as e:
+                        logger.warning("使用解锁代理中的密钥加载失败: %s", e)
+                        self.session.lock()
                 for attempt in range(max_attempts):
                     password = self._get_password_from_user()
                     if not password:
@@ -1109,29 +1719,27 @@ class TitleBarColorWindow(QMainWindow):
                         logger.warning("用户取消密码输入，程序退出")
                         sys.exit(0)
                     
-                    cipher = PasswordBasedEncryption()
-                    
-                    with open(file_path, 'rb') as f:
-                        encrypted_data = f.read()
-                        
                     try:
-                        decrypted_data = cipher.decrypt_data(encrypted_data, password)
-                        data = json.loads(decrypted_data)
-                        self.website_data = data.get('记录网站', {})
+                        # 解锁成功后会话保存派生密钥，供后续保存复用；
+                        # 网站记录在后台线程中逐条解密，左侧列表随之逐步显示
+                        self._stream_load(password)
                         data_loaded_successfully = True
+                        streamed = True
                         
                         # 记录密码验证成功统计
                         try:
+                            from usage_stats import record_feature_usage
                             record_feature_usage("password_verify_success")
                         except:
                             pass
                             
                         break  # 密码正确，退出循环
                     except ValueError as e:
-                        logger.warning(f"密码错误 (尝试 {attempt + 1}/{max_attempts}): {str(e)}")
+                        logger.warning("密码错误 (尝试 %s/%s): %s", attempt + 1, max_attempts, e)
                         
                         # 记录密码验证失败统计
                         try:
+                            from usage_stats import record_feature_usage
                             record_feature_usage("password_verify_failed")
                         except:
                             pass
@@ -1151,29 +1759,38 @@ class TitleBarColorWindow(QMainWindow):
                         if os.path.exists(key_path):
                             with open(key_path, 'rb') as f:
                                 key = f.read()
+                            # 只有旧密钥文件存在时才需要整个数据文件的内容
+                            with open(file_path, 'rb') as f:
+                                encrypted_data = f.read()
                             fernet = Fernet(key)
                             decrypted_data = fernet.decrypt(encrypted_data).decode('utf-8')
                             data = json.loads(decrypted_data)
-                            self.website_data = data.get('记录网站', {})
+                            self.vault = Vault(data.get('记录网站', {}))
                             data_loaded_successfully = True
+                            # 旧格式数据在下次保存时使用本次输入的密码加密
+                            self.session.start(password)
+                            self.store.needs_rewrite = True
                             logger.info("成功使用旧密钥文件解密")
                             break
                     except Exception as e2:
-                        logger.warning(f"旧密钥解密失败: {str(e2)}")
+                        logger.warning("旧密钥解密失败: %s", e2)
                         
                     # 尝试以明文方式读取（用于向后兼容）
                     try:
                         with open(file_path, 'r', encoding='utf-8') as f:
                             data = json.load(f)
-                            self.website_data = data.get('记录网站', {})
+                            self.vault = Vault(data.get('记录网站', {}))
                             data_loaded_successfully = True
+                            self.session.start(password)
+                            self.store.needs_rewrite = True
                             break
                     except Exception as e3:
-                        logger.error(f"明文读取失败: {e3}")
+                        logger.error("明文读取失败: %s", e3)
                         
                 if not data_loaded_successfully:
                     QMessageBox.critical(self, "错误", "无法解密数据，程序将退出！")
                     sys.exit(0)
+                self.data_monitor.remember()
             else:
                 # 首次使用，创建初始数据文件
                 QMessageBox.information(self, "首次使用", "欢迎使用账号记事本！\n\n请设置一个密码来保护您的数据。")
@@ -1188,41 +1805,151 @@ class TitleBarColorWindow(QMainWindow):
                                                        QMessageBox.StandardButton.Yes | 
                                                        QMessageBox.StandardButton.No)
                             if reply == QMessageBox.StandardButton.Yes:
-                                self.website_data = self._create_default_data()
+                                self.vault = Vault(self._create_default_data())
                                 return
                             else:
                                 continue
                         else:
                             QMessageBox.warning(self, "提示", "您取消了密码设置，数据将无加密保护！")
-                            self.website_data = self._create_default_data()
+                            self.vault = Vault(self._create_default_data())
                             return
                     else:
                         self._create_initial_data_file(file_path, password)
                         QMessageBox.information(self, "成功", "密码设置成功！您的数据已加密保护。")
-                        self.website_data = self._create_default_data()
+                        self.vault = Vault(self._create_default_data())
                         break
             
-            self.update_website_list()
+            if not streamed:
+                self.update_website_list()
                 
         except Exception as e:
-            logger.error(f"加载数据时出错: {str(e)}")
+            logger.error("加载数据时出错: %s", e)
             QMessageBox.critical(self, "错误", f"加载数据失败：{str(e)}\n程序将退出！")
             sys.exit(0)
     
+    def _stream_load(self, password):
+        """
+        在后台线程中逐条解密网站记录，主线程分批加入数据模型，左侧列表随解密进度逐步显示
+        密码错误时在显示任何数据前抛出 ValueError；加载期间的修改等加载完成后再保存
+        """
+        self.vault = self._new_vault()
+        self.list_widget.clear()
+        self.site_items = {}
+        
+        def load(progress, partial):
+            batch = []
+            count = 0
+            deadline = time.monotonic() + LOAD_BATCH_INTERVAL
+            # 只解密网站目录，账号列表在打开网站时才解密
+            for event in self.store.iter_load(password, lazy=True):
+                batch.append(event)
+                count += 1
+                if len(batch) >= LOAD_BATCH_SIZE or time.monotonic() >= deadline:
+                    partial(batch)
+                    progress(f"正在加载… 已解密 {count} 个网站")
+                    batch = []
+                    deadline = time.monotonic() + LOAD_BATCH_INTERVAL
+            if batch:
+                partial(batch)
+        
+        self._loading = True
+        try:
+            self._run_crypto_blocking(load, "正在解锁…", on_partial=self._apply_loaded_sites)
+        finally:
+            self._loading = False
+        if self._has_pending_save():
+            self.save_scheduler.mark_dirty()
+
+    def _new_vault(self, website_data=None):
+        """创建从 self.store 按需解密账号列表的数据模型"""
+        vault = Vault(website_data, segments=self.store)
+        vault.can_evict = self._can_evict_site
+        return vault
+
+    def _can_evict_site(self, website_key):
+        """
+        网站的账号明文能否从缓存中丢弃：正在显示的网站保留明文，
+        保存进行中或上次保存失败时全部保留（文件中的数据可能不是最新的）
+        """
+        return (website_key not in self._pinned_sites
+                and not self._save_in_flight
+                and not self._save_failed)
+
+    def _ensure_sites_readable(self, website_keys=None):
+        """
+        需要解密账号列表而会话已锁定时，先提示输入密码
+        参数:
+        website_keys: list - 要访问的网站id，默认为所有网站
+        返回:
+        bool - 可以访问（用户取消或密码错误时为False）
+        """
+        if self.session.is_unlocked():
+            return True
+        if website_keys is None:
+            encrypted = self.vault.has_encrypted_sites()
+        else:
+            encrypted = not all(self.vault.is_decrypted(key) for key in website_keys)
+        return not encrypted or self._ensure_session_unlocked(get_data_file_path())
+
+    def _run_unlocked(self, action, website_keys=None):
+        """
+        执行需要解密账号列表的操作
+        解锁代理中的密钥被清除后，会话在下一次请求失败时才变为锁定：此时提示解锁并重试一次
+        参数:
+        action: callable - 要执行的操作
+        website_keys: list - 要访问的网站id，默认为所有网站
+        返回:
+        action 的返回值（用户取消解锁时抛出 RuntimeError）
+        """
+        try:
+            return action()
+        except RuntimeError:
+            if self.session.is_unlocked() or not self._ensure_sites_readable(website_keys):
+                raise
+        return action()
+
+    def _apply_loaded_sites(self, batch):
+        """把后台解密出的一批网站加入数据模型和左侧列表（主线程）"""
+        redisplay = False
+        for op, key, site in batch:
+            if op == 'put':
+                self.vault.put_site_record(key, site)
+                item = self.site_items.get(key)
+                if item is None:
+                    self.add_website_item(key)
+                else:
+                    item.setText(self.vault.site(key).get('网站名', '未知网站'))
+                redisplay = redisplay or key == self.current_website_key
+            elif key in self.vault:
+                self.vault.remove_site(key)
+                self.remove_website_item(key)
+        
+        if self.current_website_key not in self.vault:
+            # 第一批解密完成后立即显示第一个网站
+            if self.list_widget.count() > 0:
+                first_item = self.list_widget.item(0)
+                self.list_widget.setCurrentItem(first_item)
+                self.on_list_item_clicked(first_item)
+        elif redisplay and not self.search_query:
+            self.display_accounts(self.current_website_key)
+
     def _create_initial_data_file(self, file_path, password=None):
         """创建初始数据文件"""
         try:
-            logger.info(f"创建初始数据文件: {file_path}")
+            logger.info("创建初始数据文件: %s", file_path)
             
             initial_data = {
                 "记录网站": self._create_default_data()
             }
             
             if password:
-                # 使用密码派生加密
-                cipher = PasswordBasedEncryption()
-                data_to_save = json.dumps(initial_data, ensure_ascii=False, indent=4)
-                encrypted_data = cipher.encrypt_data(data_to_save, password)
+                # 使用密码派生加密，并开启解锁会话；以追加日志格式原子写入
+                def create(progress):
+                    self.session.start(password, self.store.preferred_kdf())
+                    self.store.rewrite(initial_data["记录网站"])
+                self._run_crypto_blocking(create, "正在创建数据文件…")
+                logger.info("初始数据文件已创建: %s", file_path)
+                return
             else:
                 # 向后兼容：使用密钥文件
                 cipher = self._generate_or_load_key()
@@ -1237,10 +1964,11 @@ class TitleBarColorWindow(QMainWindow):
             
             with open(file_path, 'wb') as f:
                 f.write(encrypted_data)
+            self.data_monitor.remember()
 
-            logger.info(f"初始数据文件已创建: {file_path}")
+            logger.info("初始数据文件已创建: %s", file_path)
         except Exception as e:
-            logger.error(f"创建初始数据文件失败: {str(e)}")
+            logger.error("创建初始数据文件失败: %s", e)
             QMessageBox.critical(self, "错误", f"创建初始数据文件失败: {str(e)}")
     
     def _create_default_data(self):
@@ -1258,17 +1986,33 @@ class TitleBarColorWindow(QMainWindow):
     def update_website_list(self):
         """更新网站列表"""
         self.list_widget.clear()
-        for info in self.website_data.values():
-            self.list_widget.addItem(info.get('网站名', '未知网站'))
+        self.site_items = {}
+        for key in self.vault.site_ids():
+            self.add_website_item(key)
         
         if self.list_widget.count() > 0:
             first_item = self.list_widget.item(0)
             self.list_widget.setCurrentItem(first_item)
             self.on_list_item_clicked(first_item)
 
+    def add_website_item(self, website_key):
+        """在左侧列表中添加网站项，列表项中保存网站id"""
+        item = QListWidgetItem(self.vault.site(website_key).get('网站名', '未知网站'))
+        item.setData(Qt.ItemDataRole.UserRole, website_key)
+        self.list_widget.addItem(item)
+        self.site_items[website_key] = item
+        return item
+
+    def remove_website_item(self, website_key):
+        """从左侧列表中移除网站项（其他列表项保持不变）"""
+        item = self.site_items.pop(website_key, None)
+        if item is not None:
+            self.list_widget.takeItem(self.list_widget.row(item))
+
     def apply_system_theme_color(self):
         try:
-            palette = self.palette()
+            # 使用应用调色板：收到调色板变化事件时窗口自身的调色板可能尚未更新
+            palette = QApplication.palette()
             window_color = palette.color(QPalette.ColorRole.Window)
             base_color = palette.color(QPalette.ColorRole.Base)
             text_color = palette.color(QPalette.ColorRole.WindowText).name()
@@ -1291,10 +2035,9 @@ class TitleBarColorWindow(QMainWindow):
                 self.top_layout.insertWidget(3, self.visit_button)
             
             # 重新创建所有外层容器以更新边框颜色
-            if hasattr(self, 'current_website_key') and self.current_website_key:
-                website_info = self.website_data.get(self.current_website_key)
-                if website_info:
-                    self.display_accounts(website_info)
+            self.reset_card_pool()
+            if hasattr(self, 'current_website_key') and self.current_website_key in self.vault:
+                self.display_accounts(self.current_website_key)
             
             if sys.platform.startswith('win32'):
                 self._update_title_bar_color(window_color)
@@ -1321,6 +2064,8 @@ class TitleBarColorWindow(QMainWindow):
 
     def on_add_website_clicked(self):
         """添加新网站按钮点击事件处理"""
+        self.leave_search()
+        self.search_input.hide()
         self.add_account_button.hide()
         self.visit_button.hide()
         self.website_label.hide()
@@ -1331,9 +2076,10 @@ class TitleBarColorWindow(QMainWindow):
         self.cancel_button.show()
         
         self.clear_flow_layout()
+        self.set_card_view_visible(False)
         
-        add_outer_container = self.create_add_account_container()
-        self.flow_layout.addWidget(add_outer_container, 0, 0)
+        add_outer_container = self.acquire_add_card()
+        self.add_to_flow_layout(add_outer_container, 0)
         self.flow_layout.update()
         
         self.current_add_container = add_outer_container.findChild(AddAccountContainer)
@@ -1348,33 +2094,23 @@ class TitleBarColorWindow(QMainWindow):
         account_data: dict - 账号信息 (包含账号、密码、备注)
         """
         try:
-            # 添加新网站
-            # 修复空数据时的键值生成
-            if self.website_data:
-                keys = [int(k) for k in self.website_data.keys() if k.isdigit()]
-                new_key = str(max(keys) + 1) if keys else "1"
-            else:
-                new_key = "1"
-                
-            self.website_data[new_key] = {
-                "网站名": website_name,
-                "网址": website_url,
-                "列表": [{
-                    "账号": account_data.get("account", ""),
-                    "密码": account_data.get("password", ""),
-                    "备注": account_data.get("remark", "")
-                }]
-            }
+            # 添加新网站（网站id由数据模型单调分配）
+            new_key = self.vault.add_site(website_name, website_url)
+            self.vault.add_account(new_key, {
+                "账号": account_data.get("account", ""),
+                "密码": account_data.get("password", ""),
+                "备注": account_data.get("remark", "")
+            })
             
             # 更新界面
-            self.list_widget.addItem(website_name)
-            self._save_data()
+            self.add_website_item(new_key)
+            self._save_data(changed=[new_key])
             
             # 显示状态栏提示
             show_status_message(self, f"网站 '{website_name}' 和账号 '{account_data.get('account', '')}' 已成功添加！")
             return True
         except Exception as e:
-            logger.error(f"保存网站数据时出错: {str(e)}")
+            logger.error("保存网站数据时出错: %s", e)
             QMessageBox.critical(self, "错误", f"保存网站数据失败: {str(e)}")
             return False
 
@@ -1387,7 +2123,7 @@ class TitleBarColorWindow(QMainWindow):
         remark: str - 备注
         website_key: str - 网站键值 (可选)
         """
-        print(f"调用函数: TitleBarColorWindow.submit_new_account(账号={account}, 密码={password}, 备注={remark}, 网站键值={website_key})")
+        logger.debug("调用函数: TitleBarColorWindow.submit_new_account(账号=%s, 网站键值=%s)", account, website_key)
         if not account or not password:
             QMessageBox.warning(self, "输入错误", "账号和密码不能为空！")
             return False
@@ -1398,63 +2134,52 @@ class TitleBarColorWindow(QMainWindow):
                 if hasattr(self, 'current_website_key') and self.current_website_key:
                     website_key = self.current_website_key
                 else:
-                    website_keys = list(self.website_data.keys())
+                    website_keys = self.vault.site_ids()
                     website_key = website_keys[0] if website_keys else '1'
             
             # 确保网站数据存在
-            if website_key not in self.website_data:
+            if website_key not in self.vault:
                 website_name = f"未命名网站{website_key}"
-                self.website_data[website_key] = {'网站名': website_name, '网址': '', '列表': []}
-            
-            website = self.website_data[website_key]
-            
-            # 确保列表存在
-            if '列表' not in website:
-                website['列表'] = []
+                self.vault.add_site(website_name, '', site_id=website_key)
                 
             new_account = {'账号': account, '密码': password}
             if remark:
                 new_account['备注'] = remark
             
-            website['列表'].append(new_account)
+            self.vault.add_account(website_key, new_account)
             
             # 记录添加账号统计
             try:
                 from usage_stats import record_feature_usage
                 record_feature_usage("add_account")
             except Exception as e:
-                print(f"统计记录失败: {e}")
+                logger.warning("统计记录失败: %s", e)
             
             # 保存数据
-            if self._save_data():
+            if self._save_data(changed=[website_key]):
                 # 使用状态栏提示
                 show_status_message(self, f"账号 {account} 已成功添加！")
-                self.reload_data_and_preserve_selection()
+                self.reload_data_and_preserve_selection(website_key)
                 return True
             else:
                 QMessageBox.critical(self, "错误", "保存数据失败！")
                 return False
         except Exception as e:
-            logger.exception(f"添加账号时出错：{str(e)}")
+            logger.exception("添加账号时出错：%s", e)
             QMessageBox.critical(self, "错误", f"添加账号时出错：{str(e)}")
             return False
 
-    def update_account(self, old_account_data, new_account, new_password, new_remark):
-        """更新现有账号信息"""
+    def update_account(self, account_id, new_account, new_password, new_remark):
+        """更新现有账号信息（按账号id定位，不会误改其他网站的同名账号）"""
         try:
-            # 查找并更新账号
-            updated = False
-            for website_key, website_info in self.website_data.items():
-                if '列表' in website_info:
-                    for account_data in website_info['列表']:
-                        if account_data.get('账号') == old_account_data.get('账号'):
-                            account_data['账号'] = new_account
-                            account_data['密码'] = new_password
-                            account_data['备注'] = new_remark
-                            updated = True
-                            break
-                    if updated:
-                        break
+            old_account_data = self.vault.account(account_id) or {}
+            updated = bool(old_account_data)
+            if updated:
+                website_key = self.vault.update_account(account_id, {
+                    '账号': new_account,
+                    '密码': new_password,
+                    '备注': new_remark
+                })
             
             if updated:
                 # 记录更新账号统计
@@ -1462,36 +2187,28 @@ class TitleBarColorWindow(QMainWindow):
                     from usage_stats import record_feature_usage
                     record_feature_usage("update_account")
                 except Exception as e:
-                    print(f"统计记录失败: {e}")
+                    logger.warning("统计记录失败: %s", e)
                     
-                if self._save_data():
+                if self._save_data(changed=[website_key]):
                     show_status_message(self, f"账号 {new_account} 已成功更新！")
-                    self.reload_data_and_preserve_selection()
+                    self.reload_data_and_preserve_selection(website_key)
                     return True
                 else:
                     QMessageBox.critical(self, "错误", "保存数据失败！")
             else:
                 QMessageBox.warning(self, "更新失败", f"未找到账号 {old_account_data.get('账号')}！")
         except Exception as e:
-            logger.exception(f"更新账号时出错：{str(e)}")
+            logger.exception("更新账号时出错：%s", e)
             QMessageBox.critical(self, "错误", f"更新账号时出错：{str(e)}")
         return False
 
-    def delete_account(self, account_data):
-        """删除指定账号"""
+    def delete_account(self, account_id):
+        """删除指定账号（按账号id定位，只删除这一条记录）"""
         try:
-            # 查找并删除账号
-            deleted = False
-            for website_key, website_info in self.website_data.items():
-                if '列表' in website_info:
-                    original_length = len(website_info['列表'])
-                    website_info['列表'] = [
-                        item for item in website_info['列表']
-                        if item.get('账号') != account_data.get('账号')
-                    ]
-                    if len(website_info['列表']) < original_length:
-                        deleted = True
-                        break
+            account_data = self.vault.account(account_id) or {}
+            deleted = bool(account_data)
+            if deleted:
+                website_key = self.vault.remove_account(account_id)
             
             if deleted:
                 # 记录删除账号统计
@@ -1499,18 +2216,18 @@ class TitleBarColorWindow(QMainWindow):
                     from usage_stats import record_feature_usage
                     record_feature_usage("delete_account")
                 except Exception as e:
-                    print(f"统计记录失败: {e}")
+                    logger.warning("统计记录失败: %s", e)
                     
-                if self._save_data():
+                if self._save_data(changed=[website_key]):
                     show_status_message(self, f"账号 {account_data.get('账号')} 已成功删除！")
-                    self.reload_data_and_preserve_selection()
+                    self.reload_data_and_preserve_selection(website_key)
                     return True
                 else:
                     QMessageBox.critical(self, "错误", "保存数据失败！")
             else:
                 QMessageBox.warning(self, "删除失败", f"未找到账号 {account_data.get('账号')}！")
         except Exception as e:
-            logger.exception(f"删除账号时出错：{str(e)}")
+            logger.exception("删除账号时出错：%s", e)
             QMessageBox.critical(self, "错误", f"删除账号时出错：{str(e)}")
         return False
 
@@ -1560,7 +2277,7 @@ class TitleBarColorWindow(QMainWindow):
                     from usage_stats import record_feature_usage
                     record_feature_usage("add_website")
                 except Exception as e:
-                    print(f"统计记录失败: {e}")
+                    logger.warning("统计记录失败: %s", e)
                 
                 # 重置界面
                 self.website_name_input.hide()
@@ -1572,6 +2289,7 @@ class TitleBarColorWindow(QMainWindow):
                 self.website_url_input.clear()
                 
                 self.add_account_button.show()
+                self.search_input.show()
                 self.visit_button.show()
                 self.website_label.show()
                 self.website_label.setText("请从左侧列表选择网站")
@@ -1609,7 +2327,7 @@ class TitleBarColorWindow(QMainWindow):
                         decrypted_data = cipher.decrypt_data(encrypted_data, password)
                         return json.loads(decrypted_data)
                     except ValueError as e:
-                        logger.warning(f"密码派生解密失败: {str(e)}")
+                        logger.warning("密码派生解密失败: %s", e)
                         # 尝试旧的密钥文件方式（向后兼容）
                         try:
                             from cryptography.fernet import Fernet
@@ -1622,53 +2340,361 @@ class TitleBarColorWindow(QMainWindow):
                                 decrypted_data = fernet.decrypt(encrypted_data).decode('utf-8')
                                 return json.loads(decrypted_data)
                         except Exception as e2:
-                            logger.warning(f"旧密钥解密也失败: {str(e2)}")
+                            logger.warning("旧密钥解密也失败: %s", e2)
                             # 尝试以明文方式读取（用于向后兼容）
                             try:
                                 with open(file_path, 'r', encoding='utf-8') as f:
                                     return json.load(f)
                             except Exception as e3:
-                                logger.error(f"明文读取失败: {e3}")
+                                logger.error("明文读取失败: %s", e3)
                 else:
                     logger.warning("用户取消密码输入")
             return {}
         except Exception as e:
-            logger.error(f"加载数据失败: {str(e)}")
+            logger.error("加载数据失败: %s", e)
             return {}
     
-    def _save_data(self):
-        """保存网站数据到文件（加密）"""
+    @timed('_save_data')
+    def _save_data(self, changed=None, deleted=None):
+        """
+        保存网站数据到文件（加密）
+        参数:
+        changed: list - 新增或修改的网站键值，只追加这些网站的记录
+        deleted: list - 删除的网站键值
+        两者都未指定时原子地重写整个文件
+        加密和写入在后台线程中执行；保存进行中时新的修改会排队并合并，
+        当前保存完成后一次性写入。排队前先合并其他程序写入的修改。
+        返回False表示会话锁定且用户取消了密码输入，或其他程序修改了同一网站（已重新加载）
+        """
         try:
-            # 获取程序运行目录
-            if hasattr(sys, '_MEIPASS'):
-                # 当程序被PyInstaller打包后
-                current_dir = os.path.dirname(sys.executable)
-            else:
-                # 开发模式
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-            
-            file_path = os.path.join(current_dir, 'data.json')
+            file_path = get_data_file_path()
             
-            # 获取密码
-            password = self._get_password_from_user()
-            if not password:
-                logger.warning("用户取消密码输入，数据未保存")
+            # 会话已锁定（超时或尚未设置密码）时才重新获取密码
+            if not self._ensure_session_unlocked(file_path):
                 return False
             
-            cipher = PasswordBasedEncryption()
-            data_to_save = json.dumps({"记录网站": self.website_data}, ensure_ascii=False, indent=4)
-            encrypted_data = cipher.encrypt_data(data_to_save, password)
+            # 后台保存进行中时由写入本身合并，保存完成后再更新界面
+            if not self._save_in_flight and not self._loading:
+                if not self._merge_external_changes([*(changed or ()), *(deleted or ())]):
+                    return False
             
-            # 确保目录存在
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            if changed is None and deleted is None:
+                self._pending_full_save = True
+            else:
+                self._pending_changed.update(changed or ())
+                self._pending_deleted.update(deleted or ())
             
-            with open(file_path, 'wb') as f:
-                f.write(encrypted_data)
+            self.save_scheduler.mark_dirty()
+            return True
+        except Exception as e:
+            logger.error("保存数据失败: %s", e)
+            return False
 
+    @timed('save.snapshot')
+    def _take_pending_save(self):
+        """取出排队的修改，在主线程中生成数据快照，返回后台写入函数"""
+        full = self._pending_full_save or self.store.needs_rewrite or self.store.format != 'log'
+        changed = list(self._pending_changed)
+        deleted = list(self._pending_deleted)
+        self._pending_full_save = False
+        self._pending_changed.clear()
+        self._pending_deleted.clear()
+        
+        # 账号列表未解密的网站不含 "列表"，写入时沿用文件中的账号数据
+        if full:
+            snapshot = copy.deepcopy(self.vault.to_dict(decrypt=False))
+        else:
+            # 只复制发生变化的网站，保存期间界面可继续修改内存数据
+            snapshot = {key: copy.deepcopy(self.vault.site_record(key, decrypt=False))
+                        for key in changed if key in self.vault}
+        self.vault.mark_saved(None if full else changed)
+        
+        def write(progress=None):
+            if full:
+                written = self.store.rewrite(snapshot)
+            else:
+                written = self.store.write_changes(snapshot, snapshot.keys(), deleted)
+            self.save_scheduler.record_bytes(written)
+            return written
+        return write
+
+    def _has_pending_save(self):
+        return self._pending_full_save or bool(self._pending_changed) or bool(self._pending_deleted)
+
+    def _flush_saves(self):
+        """静默期结束时开始保存；保存进行中时等待其完成后再写入"""
+        if self._loading:
+            # 数据尚未全部解密，加载完成后再保存
+            return
+        if not self._save_in_flight and self._has_pending_save():
+            self._start_pending_save()
+
+    def _start_pending_save(self):
+        """在后台线程中执行排队的保存"""
+        write = self._take_pending_save()
+        self._save_in_flight = True
+        self._set_busy("正在保存…")
+        self._save_task = self._start_crypto_task(write, self._on_save_finished, self._on_save_failed)
+
+    def _is_current_save(self):
+        """结果信号是否来自当前的后台保存（已在 _flush_pending_saves 中直接处理过的结果不再处理）"""
+        return self._save_task is not None and self.sender() is self._save_task.signals
+
+    def _on_save_finished(self, result):
+        if not self._is_current_save():
+            return
+        self._save_task = None
+        self._save_in_flight = False
+        self._save_failed = False
+        # 写入时合并的其他程序的修改（不等待可能正在进行的后台压缩）
+        if not self._merge_external_changes(read_file=False):
+            self._clear_busy()
+            return
+        if self._has_pending_save():
+            self._start_pending_save()
+        else:
+            self._clear_busy()
+
+    def _on_save_failed(self, error):
+        if not self._is_current_save():
+            return
+        self._save_task = None
+        self._save_in_flight = False
+        self._clear_busy()
+        # 不立即重试（失败原因通常仍然存在），下次修改或关闭窗口时再整体写入
+        self._handle_save_error(error)
+
+    def _handle_save_error(self, error):
+        """写入失败：修改保留在内存中，排队在下次保存时整体重写，并提示错误"""
+        if isinstance(error, VaultConflictError):
+            self._on_external_conflict(error)
+            return
+        logger.error("保存数据失败: %s", error)
+        self._save_failed = True
+        # 写入失败后无法确定文件中的内容，下次保存时整体重写
+        self.store.needs_rewrite = True
+        self._pending_full_save = True
+        QMessageBox.critical(self, "错误", f"保存数据失败：{str(error)}")
+
+    def _merge_external_changes(self, keys=(), read_file=True):
+        """
+        合并其他程序（另一个窗口或命令行）写入数据文件的修改并更新界面
+        参数:
+        keys: list - 本次要保存的网站键值，与排队中的修改一起检查是否被其他程序修改过
+        read_file: bool - 为False时只取走保存时已合并的修改，不检查文件
+        返回:
+        False 表示有冲突（已提示并重新加载）
+        """
+        if self.store.format != 'log':
+            return True
+        keys = {*keys, *self._pending_changed, *self._pending_deleted}
+        try:
+            events = self.store.merge_external_changes(keys) if read_file else self.store.take_external_events()
+        except VaultConflictError as e:
+            self._on_external_conflict(e)
+            return False
+        except OSError as e:
+            # 无法读取时由之后的写入报告错误
+            logger.warning("检查数据文件的外部修改失败: %s", e)
             return True
+        # 之前保存时合并的修改可能涉及之后才排队的网站
+        overlap = sorted({key for _, key, _ in events} & keys)
+        if overlap:
+            self._on_external_conflict(VaultConflictError(f"网站 {', '.join(overlap)} 已被其他程序修改", overlap))
+            return False
+        if events:
+            logger.info("合并其他程序的修改: %s 个网站", len(events))
+            self._apply_loaded_sites(events)
+            if self.search_query:
+                self.show_search_results()
+            self.search_index_timer.start()
+        return True
+
+    def _on_external_conflict(self, error):
+        """
+        其他程序修改了本程序也修改过的网站（或重写了数据文件）：
+        放弃本程序对这些网站的修改，写入其余修改后重新加载数据文件
+        """
+        logger.warning("数据文件已被其他程序修改: %s", error)
+        if error.keys:
+            self._pending_changed.difference_update(error.keys)
+            self._pending_deleted.difference_update(error.keys)
+        else:
+            self._pending_full_save = False
+            self._pending_changed.clear()
+            self._pending_deleted.clear()
+        QMessageBox.warning(self, "数据已被修改",
+                            f"{error}\n\n将重新加载数据文件，本程序对这些网站的修改未保存。")
+        self._flush_pending_saves()
+        self.reload_data_and_preserve_selection(from_disk=True)
+
+    def _flush_pending_saves(self):
+        """
+        在主线程中同步写入所有未保存的修改（关闭窗口、锁定或导出前调用），返回是否全部写入成功
+        关闭窗口时事件循环不再分发后台保存的结果信号，因此等待后台保存结束后直接读取任务的结果；
+        写入失败时已提示错误，修改保留在内存中
+        """
+        task = self._save_task
+        if task is not None:
+            self.crypto_pool.waitForDone()
+            self._save_task = None
+            self._save_in_flight = False
+            self._clear_busy()
+            if task.error is not None:
+                self._handle_save_error(task.error)
+                return False
+            self._save_failed = False
+        self.save_scheduler.flush(callback=lambda: None)
+        if self._loading:
+            logger.warning("数据尚未加载完成，未保存加载期间的修改")
+            return not self._has_pending_save()
+        if not self._has_pending_save():
+            return True
+        if not self._ensure_session_unlocked(get_data_file_path()):
+            return False
+        self._set_busy("正在保存…")
+        try:
+            # 解锁代理中的密钥已被清除时提示解锁后重试一次
+            self._run_unlocked(self._take_pending_save())
         except Exception as e:
-            logger.error(f"保存数据失败: {str(e)}")
+            self._handle_save_error(e)
             return False
+        finally:
+            self._clear_busy()
+        self._save_failed = False
+        return True
+
+    def _start_crypto_task(self, fn, on_finished, on_failed, on_partial=None):
+        """提交后台加密任务（指定 on_partial 时在主线程中分批接收部分结果）"""
+        task = CryptoTask(fn, streaming=on_partial is not None)
+        self._crypto_tasks.add(task)
+        
+        def done():
+            self._crypto_tasks.discard(task)
+        
+        task.signals.progress.connect(self._set_busy)
+        if on_partial is not None:
+            task.signals.partial.connect(on_partial)
+        task.signals.finished.connect(on_finished)
+        task.signals.failed.connect(on_failed)
+        task.signals.finished.connect(done)
+        task.signals.failed.connect(done)
+        self.crypto_pool.start(task)
+        return task
+
+    def _run_crypto_blocking(self, fn, busy_text, on_partial=None):
+        """
+        在后台线程中执行耗时的加密操作并等待结果
+        等待期间主线程继续处理事件，窗口不会卡死；出错时在主线程重新抛出异常
+        """
+        result = {}
+        loop = QEventLoop()
+        
+        def finished(value):
+            result['value'] = value
+            loop.quit()
+        
+        def failed(error):
+            result['error'] = error
+            loop.quit()
+        
+        self._set_busy(busy_text)
+        self._start_crypto_task(fn, finished, failed, on_partial)
+        loop.exec()
+        if not self._save_in_flight:
+            self._clear_busy()
+        else:
+            self._set_busy("正在保存…")
+        
+        if 'error' in result:
+            raise result['error']
+        return result.get('value')
+
+    def _set_busy(self, text):
+        """在状态栏显示非阻塞的进度提示"""
+        self.busy_label.setText(text)
+        self.busy_label.show()
+        self.statusBar().show()
+
+    def _clear_busy(self):
+        self.busy_label.hide()
+        if not self.statusBar().currentMessage():
+            self.statusBar().hide()
+
+    def _expire_session_if_idle(self):
+        """空闲超时后清除密钥（会话在第一次解锁时可能换成代理会话）"""
+        self.session.expire_if_idle()
+
+    def _connect_agent(self):
+        """
+        第一次解锁前连接解锁代理（只尝试一次）：代理正在运行时换用代理会话，否则继续使用本地会话
+        启动时不导入 vault_agent、也不连接代理，连接延迟不计入窗口显示前的启动时间；
+        套接字不存在时不发送任何请求
+        """
+        if self._agent_checked or self.session.is_unlocked():
+            return
+        self._agent_checked = True
+        from vault_agent import AgentSession, create_session
+        session = create_session(timeout=SESSION_TIMEOUT)
+        if isinstance(session, AgentSession):
+            self.session = self.store.session = session
+            self._uses_agent = True
+
+    def _attach_agent_key(self):
+        """解锁代理持有数据文件的密钥时直接使用（不输入密码、不派生密钥），返回是否成功"""
+        self._connect_agent()
+        if not self._uses_agent:
+            return False
+        salt = self.store.file_salt()
+        return salt is not None and self.session.attach(salt)
+
+    def _ensure_session_unlocked(self, file_path):
+        """确保解锁会话可用，会话锁定时提示输入密码并校验"""
+        if self.session.is_unlocked() or self._attach_agent_key():
+            return True
+        
+        password = self._get_password_from_user()
+        if not password:
+            logger.warning("用户取消密码输入，数据未保存")
+            return False
+        
+        if os.path.exists(file_path) and self.store.format is not None:
+            # 使用现有数据文件校验密码，避免用错误的密码覆盖数据
+            try:
+                self._run_crypto_blocking(lambda progress: self.store.unlock(password), "正在解锁…")
+            except ValueError:
+                QMessageBox.warning(self, "密码错误", "密码错误，数据未保存！")
+                return False
+        else:
+            self._run_crypto_blocking(
+                lambda progress: self.session.start(password, self.store.preferred_kdf()), "正在解锁…")
+        return True
+
+    def lock_session(self):
+        """
+        先写入未保存的修改，再锁定会话，丢弃派生密钥
+        返回修改是否已全部写入（写入失败时修改留在内存中，下次保存时重新输入密码）
+        """
+        saved = self._flush_pending_saves()
+        self.session.lock()
+        return saved
+
+    def get_save_stats(self):
+        """获取延迟写入统计：保存次数、被合并的修改次数、写入字节数"""
+        return self.save_scheduler.stats()
+
+    def closeEvent(self, event):
+        if not self.lock_session():
+            # 最后一次写入失败：默认保持窗口打开，修改仍在内存中，可以处理问题后再次关闭
+            reply = QMessageBox.question(
+                self, "未保存的修改", "修改尚未保存到数据文件，仍然退出吗？退出后这些修改将丢失。",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+        logger.info("保存统计: %s", self.get_save_stats())
+        super().closeEvent(event)
 
     def on_cancel_new_website(self):
         """添加新网站流程的返回按钮点击事件处理"""
@@ -1681,6 +2707,7 @@ class TitleBarColorWindow(QMainWindow):
         self.website_url_input.clear()
         
         self.add_account_button.show()
+        self.search_input.show()
         self.visit_button.show()
         self.website_label.show()
         
@@ -1693,13 +2720,166 @@ class TitleBarColorWindow(QMainWindow):
         """列表框右键菜单事件处理"""
         # 获取当前选中项
         item = self.list_widget.itemAt(position)
+        # 创建右键菜单
+        context_menu = QMenu()
         if item:
-            # 创建右键菜单
-            context_menu = QMenu()
             delete_action = context_menu.addAction("删除")
             delete_action.triggered.connect(lambda: self.on_delete_website_clicked(item))
-            # 显示菜单
-            context_menu.exec(self.list_widget.mapToGlobal(position))
+        import_action = context_menu.addAction("导入账号…")
+        import_action.triggered.connect(self.on_import_clicked)
+        export_action = context_menu.addAction("导出账号…")
+        export_action.triggered.connect(self.on_export_clicked)
+        backup_action = context_menu.addAction("立即备份")
+        backup_action.triggered.connect(self.on_backup_clicked)
+        # 显示菜单
+        context_menu.exec(self.list_widget.mapToGlobal(position))
+
+    def on_import_clicked(self):
+        """选择浏览器或其他密码管理器导出的文件并批量导入"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "导入账号", "", "密码导出文件 (*.csv *.json);;所有文件 (*)")
+        if path:
+            self.import_accounts(path)
+
+    @timed('import_accounts')
+    def import_accounts(self, path, update_existing=False):
+        """
+        从CSV/JSON导出文件批量导入账号（Chrome、Firefox、Bitwarden、KeePass等）
+        所有记录合并到内存数据后只保存一次，只追加发生变化的网站
+        参数:
+        path: str - 导出文件路径
+        update_existing: bool - 已有账号的密码不同时是否覆盖
+        返回:
+        ImportResult - 导入结果，文件无法读取或用户取消解锁时返回None
+        """
+        import vault_import
+        # 导入到已有网站时需要解密其账号列表
+        if not self._ensure_sites_readable():
+            return None
+        self.leave_search()
+        try:
+            # 出错时导入会回滚，会话被锁定时可以解锁后重新导入
+            result = self._run_unlocked(lambda: vault_import.import_file(
+                self.vault, path, update_existing,
+                progress=lambda count: self._set_busy(f"正在导入… 已处理 {count} 条")))
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.error("导入失败: %s", e)
+            QMessageBox.critical(self, "导入失败", f"无法导入该文件：{str(e)}")
+            return None
+        finally:
+            self._clear_busy()
+        
+        # 记录导入统计
+        try:
+            from usage_stats import record_feature_usage
+            record_feature_usage("import_accounts")
+        except Exception as e:
+            logger.warning("统计记录失败: %s", e)
+        
+        if result.changed_sites:
+            if not self._save_data(changed=sorted(result.changed_sites)):
+                QMessageBox.critical(self, "错误", "保存数据失败！")
+            for website_key in result.new_sites:
+                self.add_website_item(website_key)
+            if self.current_website_key in result.changed_sites:
+                self.display_accounts(self.current_website_key)
+            elif self.current_website_key not in self.vault and self.list_widget.count() > 0:
+                first_item = self.list_widget.item(0)
+                self.list_widget.setCurrentItem(first_item)
+                self.on_list_item_clicked(first_item)
+        
+        message = result.summary()
+        if result.errors:
+            details = '\n'.join(f"第 {line} 行：{reason}" for line, reason in result.errors[:10])
+            message += f"\n\n{details}"
+            if result.invalid > 10:
+                message += f"\n……共 {result.invalid} 条无效记录"
+        QMessageBox.information(self, "导入完成", message)
+        return result
+
+    def on_export_clicked(self):
+        """选择导出文件（CSV/JSON明文或加密备份）并在后台导出"""
+        path, selected = QFileDialog.getSaveFileName(
+            self, "导出账号", "", "加密备份 (*.ambak);;CSV 文件 (*.csv);;JSON 文件 (*.json)")
+        if not path:
+            return
+        import vault_export
+        if not os.path.splitext(path)[1]:
+            path += '.csv' if 'csv' in selected else '.json' if 'json' in selected else vault_export.BACKUP_SUFFIX
+        fmt = vault_export.format_from_path(path)
+        if fmt != 'archive':
+            reply = QMessageBox.question(
+                self, "明文导出", "导出的文件中密码为明文，任何能读取该文件的人都能看到所有密码。确定要导出吗？",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+        self.export_accounts(path, fmt)
+
+    def on_backup_clicked(self):
+        """立即备份到数据目录下的 backups 目录（有上次备份时只备份变化的网站）"""
+        self.backup_accounts(os.path.join(get_data_dir(), 'backups'))
+
+    def _prepare_export(self):
+        """导出前写入所有未保存的修改，确保文件中的数据与界面一致；返回False表示无法导出"""
+        if self._loading:
+            QMessageBox.warning(self, "请稍候", "数据尚未加载完成，请稍后再试。")
+            return False
+        if not self._ensure_session_unlocked(get_data_file_path()):
+            return False
+        if not self._flush_pending_saves():
+            return False
+        if self.store.format != 'log' or self.store.needs_rewrite:
+            # 导出从追加日志中逐个网站读取，旧格式的文件先整体重写
+            self._save_data()
+            if not self._flush_pending_saves():
+                return False
+        if self.store.format != 'log':
+            QMessageBox.critical(self, "错误", "保存数据失败，无法导出！")
+            return False
+        return True
+
+    def export_accounts(self, path, fmt=None):
+        """
+        在后台把已保存的数据流式导出到文件，界面不会卡住
+        参数:
+        path: str - 目标文件
+        fmt: str - 'csv'、'json' 或 'archive'，默认按扩展名判断
+        """
+        import vault_export
+        if not self._prepare_export():
+            return
+        
+        def finished(written):
+            self._clear_busy()
+            show_status_message(self, f"已导出到 {os.path.basename(path)}")
+        
+        def failed(error):
+            self._clear_busy()
+            logger.error("导出失败: %s", error)
+            QMessageBox.critical(self, "导出失败", f"导出失败：{str(error)}")
+        
+        self._set_busy("正在导出…")
+        self._start_crypto_task(lambda progress: vault_export.export_vault(self.store, path, fmt), finished, failed)
+
+    def backup_accounts(self, backup_dir, incremental=True):
+        """在后台备份到目录，有上次备份时只写入变化和删除的网站"""
+        import vault_export
+        if not self._prepare_export():
+            return
+        
+        def finished(result):
+            self._clear_busy()
+            kind = "增量" if result['type'] == 'incremental' else "完整"
+            show_status_message(self, f"{kind}备份完成（{result['records']} 个网站）")
+        
+        def failed(error):
+            self._clear_busy()
+            logger.error("备份失败: %s", error)
+            QMessageBox.critical(self, "备份失败", f"备份失败：{str(error)}")
+        
+        self._set_busy("正在备份…")
+        self._start_crypto_task(
+            lambda progress: vault_export.backup(self.store, backup_dir, incremental), finished, failed)
 
     def on_delete_website_clicked(self, item):
         """删除网站按钮点击事件处理"""
@@ -1708,44 +2888,87 @@ class TitleBarColorWindow(QMainWindow):
         reply = QMessageBox.question(self, "确认删除", f"确定要删除网站 '{website_name}' 吗？",
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            # 查找并删除网站
-            website_key_to_delete = None
-            for key, info in self.website_data.items():
-                if info.get('网站名') == website_name:
-                    website_key_to_delete = key
-                    break
-            if website_key_to_delete:
-                del self.website_data[website_key_to_delete]
+            # 列表项中保存了网站id，直接定位要删除的网站
+            website_key_to_delete = item.data(Qt.ItemDataRole.UserRole)
+            if website_key_to_delete in self.vault:
+                self.vault.remove_site(website_key_to_delete)
                 # 保存数据
-                if self._save_data():
+                if self._save_data(deleted=[website_key_to_delete]):
                     show_status_message(self, f"网站 '{website_name}' 已成功删除！")
-                    # 更新列表
-                    self.update_website_list()
+                    # 只移除被删除网站的列表项，删除的是当前网站时显示第一个网站
+                    self.remove_website_item(website_key_to_delete)
+                    if self.current_website_key == website_key_to_delete and self.list_widget.count() > 0:
+                        first_item = self.list_widget.item(0)
+                        self.list_widget.setCurrentItem(first_item)
+                        self.on_list_item_clicked(first_item)
                 else:
                     QMessageBox.critical(self, "错误", "保存数据失败！")
 
-    def reload_data_and_preserve_selection(self):
-        """重新加载数据并保持当前选中项"""
+    def reload_data_and_preserve_selection(self, website_key=None, from_disk=False):
+        """
+        刷新界面并保持当前选中项
+        self.vault 是内存中的权威数据，编辑后只重新渲染受影响的网站
+        （其他程序写入的修改在排队保存前已经合并）
+        参数:
+        website_key: str - 受影响的网站键值 (默认为当前网站)
+        from_disk: bool - 重新读取并解密整个数据文件（与其他程序的修改冲突后使用）
+        """
+        if not from_disk:
+            self.refresh_website(website_key or self.current_website_key)
+            return
+        
         current_key = self.current_website_key if hasattr(self, 'current_website_key') else None
         
-        self._load_data()
+        if not self._reload_from_disk():
+            self._load_data()
         
-        if current_key and current_key in self.website_data:
-            target_website_name = self.website_data[current_key].get('网站名', '')
-            for i in range(self.list_widget.count()):
-                item = self.list_widget.item(i)
-                if item.text() == target_website_name:
-                    self.list_widget.setCurrentItem(item)
-                    self.on_list_item_clicked(item)
-                    return
+        if current_key and current_key in self.site_items:
+            item = self.site_items[current_key]
+            self.list_widget.setCurrentItem(item)
+            self.on_list_item_clicked(item)
+            return
         
         if self.list_widget.count() > 0:
             item = self.list_widget.item(0)
             self.list_widget.setCurrentItem(item)
             self.on_list_item_clicked(item)
 
+    def refresh_website(self, website_key):
+        """根据内存数据重新渲染指定网站（列表项名称及当前显示的账号）"""
+        if website_key not in self.vault:
+            self.update_website_list()
+            return
+        
+        item = self.site_items.get(website_key)
+        if item is None:
+            # 新建的网站尚未出现在列表中
+            item = self.add_website_item(website_key)
+        website_name = self.vault.site(website_key).get('网站名', '未知网站')
+        if item.text() != website_name:
+            item.setText(website_name)
+        
+        if self.search_query:
+            self.show_search_results()
+        elif website_key == self.current_website_key:
+            self.display_accounts(website_key)
+
+    def _reload_from_disk(self):
+        """使用解锁会话重新读取被外部修改的数据文件，失败时返回False"""
+        try:
+            website_data = self._run_crypto_blocking(lambda progress: self.store.load(lazy=True), "正在加载…")
+            self.vault = self._new_vault(website_data)
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.warning("使用会话重新加载数据失败: %s", e)
+            return False
+        
+        self.update_website_list()
+        self.search_index_timer.start()
+        return True
+
     def eventFilter(self, obj, event):
         if event.type() == QEvent.Type.ApplicationPaletteChange:
+            # 旧颜色的图标不再使用，按新颜色重新渲染
+            clear_icon_cache()
             self.apply_system_theme_color()
         return super().eventFilter(obj, event)
         
@@ -1755,45 +2978,52 @@ class TitleBarColorWindow(QMainWindow):
         
         # 只有当列数发生变化时才更新布局
         if new_columns != self.current_columns:
-            if self.resize_timer is not None:
-                self.resize_timer.stop()
-            
-            from PyQt6.QtCore import QTimer
-            self.resize_timer = QTimer(self)
-            self.resize_timer.setSingleShot(True)
-            self.resize_timer.timeout.connect(self.delayed_layout_update)
+            if self.resize_timer is None:
+                self.resize_timer = QTimer(self)
+                self.resize_timer.setSingleShot(True)
+                self.resize_timer.timeout.connect(self.delayed_layout_update)
             self.resize_timer.start(50)
         
         super().resizeEvent(event)
         
     def delayed_layout_update(self):
-        # 更新当前列数
+        """列数变化后只重新排列现有卡片，不重新创建（虚拟化卡片视图会自动重新排列）"""
         self.current_columns = self.calculate_columns()
+        self.reflow_flow_layout()
+
+    def reflow_flow_layout(self):
+        """按当前列数重新排列网格中的卡片，控件保持显示，不重建也不重新绑定数据"""
+        positioned = []
+        for i in range(self.flow_layout.count()):
+            widget = self.flow_layout.itemAt(i).widget()
+            if widget:
+                row, col, _, _ = self.flow_layout.getItemPosition(i)
+                positioned.append((row, col, widget))
+        positioned.sort(key=lambda entry: (entry[0], entry[1]))
+        
+        max_columns = self.current_columns
+        moved = False
+        for index, (row, col, widget) in enumerate(positioned):
+            if (row, col) != (index // max_columns, index % max_columns):
+                moved = True
+                break
+        if not moved:
+            return
         
-        # 如果有账号容器并且在显示状态，重新排列容器
-        if hasattr(self, 'current_account_containers') and self.current_account_containers:
-            self.rearrange_containers()
-        else:
-            # 否则更新几何和布局
-            self.flow_container.updateGeometry()
-            self.flow_container.update()
-            self.flow_layout.update()
-        self.scroll_area.update()
-        
-        if self.list_widget.count() > 0:
-            current_item = self.list_widget.currentItem()
-            if current_item:
-                self.on_list_item_clicked(current_item)
-            else:
-                first_item = self.list_widget.item(0)
-                self.list_widget.setCurrentItem(first_item)
-                self.on_list_item_clicked(first_item)
+        for _, _, widget in positioned:
+            self.flow_layout.removeWidget(widget)
+        for index, (_, _, widget) in enumerate(positioned):
+            self.flow_layout.addWidget(widget, index // max_columns, index % max_columns)
+        self.flow_layout.update()
 
 
 if __name__ == '__main__':
-    # 预加载所有SVG图标
+    # --profile[=报告路径] / --cprofile：退出时写出性能报告
+    sys.argv = perf_metrics.configure(sys.argv)
+    perf_metrics.registry.extra_sections['startup_timeline'] = get_startup_timeline
     app = QApplication(sys.argv)
     app.setFont(QFont("SimHei"))
-    preload_all_icons()
+    mark_startup('qapplication')
+    # 图标在第一次使用时渲染并缓存，不再在窗口创建前预加载
     window = TitleBarColorWindow()
     sys.exit(app.exec())
\ No newline at end of file
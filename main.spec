@@ -5,10 +5,6 @@ block_cipher = None
 # 定义要包含的额外文件
 added_files = [
     ('svg_icons_data.py', '.'),
-    ('temp\copy.svg', 'temp'),
-    ('temp\eye.svg', 'temp'),
-    ('temp\eye2.svg', 'temp'),
-    ('temp\TdesignJump.svg', 'temp'),
     ('img\ico.ico', 'img'),
     ('data.json', '.'),
     ('secret.key', '.'),
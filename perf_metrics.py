@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+性能统计模块 - 耗时区间、直方图汇总、可选的cProfile采样和JSON报告（不依赖PyQt6）
+
+用法:
+    with span('display_accounts'):
+        ...
+
+    @timed('vault.load')
+    def load(...):
+        ...
+
+默认只在内存中累计各区间的耗时；设置环境变量或命令行参数后在程序退出时写出报告:
+    ACCOUNT_MANAGER_PROFILE=report.json    或  --profile[=report.json]
+    ACCOUNT_MANAGER_CPROFILE=1             或  --cprofile
+开启cProfile时同时写出 report.prof（可用 snakeviz / pstats 查看），报告中附带耗时最多的函数。
+"""
+
+import os
+import io
+import json
+import time
+import atexit
+import logging
+import platform
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = 'ACCOUNT_MANAGER_PROFILE'
+CPROFILE_ENV = 'ACCOUNT_MANAGER_CPROFILE'
+DEFAULT_REPORT_PATH = 'profile_report.json'
+
+# 直方图桶的上界(毫秒)，最后一个桶收集超过5秒的样本
+BUCKET_BOUNDS_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# 每个区间保留最近的样本数，用于计算分位数
+MAX_SAMPLES = 1024
+
+# 报告中列出的耗时最多的函数个数
+CPROFILE_TOP = 30
+
+
+class Histogram:
+    """单个区间的耗时汇总：次数、总耗时、最值、分桶计数和最近样本"""
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.samples = deque(maxlen=MAX_SAMPLES)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        for i, bound in enumerate(BUCKET_BOUNDS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.samples.append(ms)
+
+    def percentile(self, q):
+        """最近样本的分位数(0~100)"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+    def to_dict(self):
+        labels = [f"<={bound}ms" for bound in BUCKET_BOUNDS_MS] + [f">{BUCKET_BOUNDS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min_ms or 0.0, 3),
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "histogram": {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class PerfRegistry:
+    """全局耗时统计（线程安全，后台加密线程中的区间也会被记录）"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self.report_path = None
+        self.extra_sections = {}  # 报告中附带的其他数据（例如启动时间线），值为返回dict的函数
+        self._profiler = None
+        self._atexit_registered = False
+
+    def record(self, name, ms):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.add(ms)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self):
+        """返回 {区间名: 汇总}"""
+        with self._lock:
+            return {name: h.to_dict() for name, h in sorted(self._histograms.items())}
+
+    # ---------- cProfile ----------
+    def start_cprofile(self):
+        """开始cProfile采样（只采样调用线程，即界面主线程）"""
+        if self._profiler is not None:
+            return
+        import cProfile
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def stop_cprofile(self):
+        """停止cProfile采样，返回 pstats.Stats（未开启时返回None）"""
+        if self._profiler is None:
+            return None
+        import pstats
+        self._profiler.disable()
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        self._profiler = None
+        return stats
+
+    # ---------- 报告 ----------
+    def enable_report(self, path=None, cprofile=False):
+        """程序退出时写出JSON报告；cprofile为True时同时采样"""
+        self.report_path = path or DEFAULT_REPORT_PATH
+        if cprofile:
+            self.start_cprofile()
+        if not self._atexit_registered:
+            atexit.register(self.write_report)
+            self._atexit_registered = True
+
+    def build_report(self, cprofile_stats=None):
+        report = {
+            "generated": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.system(),
+            "spans": self.snapshot(),
+        }
+        for section, provider in self.extra_sections.items():
+            try:
+                report[section] = provider()
+            except Exception as e:
+                report[section] = {"error": str(e)}
+        if cprofile_stats is not None:
+            report["cprofile_top"] = _top_functions(cprofile_stats, CPROFILE_TOP)
+        return report
+
+    def write_report(self, path=None):
+        """写出JSON报告，返回报告路径（未开启报告且未指定路径时返回None）"""
+        path = path or self.report_path
+        if not path:
+            return None
+        stats = self.stop_cprofile()
+        if stats is not None:
+            prof_path = os.path.splitext(path)[0] + '.prof'
+            try:
+                stats.dump_stats(prof_path)
+            except OSError as e:
+                logger.warning("写入cProfile数据失败: %s", e)
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.build_report(stats), f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logger.warning("写入性能报告失败: %s", e)
+            return None
+        logger.info("性能报告已写入: %s", path)
+        return path
+
+
+def _top_functions(stats, limit):
+    """按累计耗时排序的函数列表"""
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({func})",
+            "calls": nc,
+            "self_ms": round(tt * 1000, 3),
+            "cumulative_ms": round(ct * 1000, 3),
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:limit]
+
+
+# 全局实例
+registry = PerfRegistry()
+
+
+@contextmanager
+def span(name):
+    """统计代码块耗时"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.record(name, (time.perf_counter() - start) * 1000)
+
+
+def timed(name=None):
+    """统计函数耗时的装饰器，name默认为函数的限定名"""
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registry.record(label, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+
+def configure(argv=None):
+    """
+    根据环境变量和命令行参数开启报告，返回去掉性能参数后的argv
+    参数:
+    argv: list - 命令行参数（例如 sys.argv）
+    """
+    argv = list(argv or [])
+    remaining = []
+    path = os.environ.get(PROFILE_ENV) or None
+    cprofile = os.environ.get(CPROFILE_ENV, '').strip().lower() in ('1', 'true', 'yes', 'on')
+    for arg in argv:
+        if arg == '--profile':
+            path = path or DEFAULT_REPORT_PATH
+        elif arg.startswith('--profile='):
+            path = arg.split('=', 1)[1] or DEFAULT_REPORT_PATH
+        elif arg == '--cprofile':
+            cprofile = True
+        else:
+            remaining.append(arg)
+    if cprofile and not path:
+        path = DEFAULT_REPORT_PATH
+    if path:
+        registry.enable_report(path, cprofile=cprofile)
+    return remaining
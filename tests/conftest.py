@@ -0,0 +1,32 @@
+"""
+pytest 配置 - 把项目根目录加入模块搜索路径，提供共用的测试夹具
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vault_agent  # noqa: E402
+
+
+@pytest.fixture
+def agent_path(monkeypatch):
+    """在本进程的线程中运行解锁代理（临时套接字），返回套接字路径"""
+    # 套接字路径有长度限制，不使用 pytest 的 tmp_path
+    directory = tempfile.mkdtemp(prefix='am-agent-')
+    path = os.path.join(directory, 'agent.sock')
+    server = vault_agent.AgentServer(path)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.1}, daemon=True)
+    thread.start()
+    monkeypatch.setenv(vault_agent.AGENT_SOCK_ENV, path)
+    yield path
+    server.shutdown()
+    server.lock_all()
+    server.server_close()
+    shutil.rmtree(directory, ignore_errors=True)
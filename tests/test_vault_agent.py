@@ -0,0 +1,53 @@
+"""
+解锁代理测试 - 代理在本进程的线程中运行（见 conftest.agent_path）
+"""
+
+import json
+import socket
+
+import pytest
+
+import vault_agent
+from vault_agent import AgentSession
+
+pytestmark = pytest.mark.skipif(not vault_agent.agent_supported(), reason="需要Unix套接字")
+
+
+def raw_request(path, line: bytes):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        f = sock.makefile('rwb')
+        f.write(line + b'\n')
+        f.flush()
+        return json.loads(f.readline())
+
+
+@pytest.mark.parametrize('line', [b'[]', b'"x"', b'1', b'{}', b'{"op": "encrypt"}', b'not json'])
+def test_bad_request_gets_error_response(agent_path, line):
+    """无效的请求得到错误回复，代理继续服务"""
+    response = raw_request(agent_path, line)
+    assert response['ok'] is False
+    assert raw_request(agent_path, b'{"op": "status"}')['ok'] is True
+
+
+def test_is_unlocked_is_cached(agent_path):
+    """is_unlocked() 不访问代理，请求失败后才变为锁定"""
+    session = vault_agent.create_session()
+    assert isinstance(session, AgentSession)
+    session.start('pw')
+    token = session.encrypt_token('data')
+
+    requests = []
+    request = session.client.request
+    session.client.request = lambda op, **fields: requests.append(op) or request(op, **fields)
+    for _ in range(100):
+        assert session.is_unlocked()
+    assert requests == []
+    assert session.decrypt_token(token) == 'data'
+    assert requests == ['decrypt']
+
+    vault_agent.connect(agent_path).request('lock')
+    assert session.is_unlocked()
+    with pytest.raises(RuntimeError):
+        session.encrypt_token('data')
+    assert not session.is_unlocked()
@@ -0,0 +1,100 @@
+"""
+命令行工具测试 - 通过管道输入密码
+"""
+
+import io
+import sys
+
+import pytest
+
+import vault_agent
+import vault_cli
+from vault_crypto import UnlockSession
+from vault_storage import VaultStore
+
+MASTER = 'master-pw'
+PASSWORD = 'account-pw'
+
+
+@pytest.fixture
+def vault_file(tmp_path):
+    path = str(tmp_path / 'data.json')
+    store = VaultStore(path, UnlockSession())
+    store.session.start(MASTER)
+    store.rewrite({"1": {"网站名": "GitHub", "网址": "https://github.com", "列表": []}})
+    return path
+
+
+def run(monkeypatch, argv, stdin):
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(stdin))
+    return vault_cli.main(argv)
+
+
+def accounts(path):
+    return VaultStore(path, UnlockSession()).load(MASTER)["1"]["列表"]
+
+
+@pytest.fixture
+def no_agent(monkeypatch, vault_file):
+    monkeypatch.setenv(vault_agent.AGENT_SOCK_ENV, vault_file + '.no-agent.sock')
+
+
+def test_add_with_piped_passwords(monkeypatch, vault_file, no_agent):
+    assert run(monkeypatch, ['--file', vault_file, 'add', 'GitHub', 'dev'], f"{MASTER}\n{PASSWORD}\n") == 0
+    assert accounts(vault_file) == [{"账号": "dev", "密码": PASSWORD, "备注": ""}]
+
+
+@pytest.mark.skipif(not vault_agent.agent_supported(), reason="需要Unix套接字")
+def test_piped_add_with_agent_holding_key(monkeypatch, vault_file, agent_path):
+    """代理持有密钥时管道输入仍然先读取主密码行，账号密码不会被当作主密码"""
+    assert run(monkeypatch, ['--file', vault_file, 'list'], f"{MASTER}\n") == 0
+    assert vault_agent.connect(agent_path).request('status')['keys'] == 1
+
+    assert run(monkeypatch, ['--file', vault_file, 'add', 'GitHub', 'dev'], f"{MASTER}\n{PASSWORD}\n") == 0
+    assert [a["密码"] for a in accounts(vault_file)] == [PASSWORD]
+
+    # --use-agent 不读取主密码
+    assert run(monkeypatch, ['--file', vault_file, '--use-agent', 'add', 'GitHub', 'ops'], f"{PASSWORD}2\n") == 0
+    assert [a["密码"] for a in accounts(vault_file)] == [PASSWORD, PASSWORD + '2']
+
+    # 代理中没有密钥时 --use-agent 出错，不读取标准输入
+    vault_agent.connect(agent_path).request('lock')
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(f"{MASTER}\n"))
+    assert vault_cli.main(['--file', vault_file, '--use-agent', 'list']) == 1
+    assert sys.stdin.read() == f"{MASTER}\n"
+
+
+def test_add_rejects_empty_password(monkeypatch, vault_file, no_agent):
+    assert run(monkeypatch, ['--file', vault_file, 'add', 'GitHub', 'dev'], f"{MASTER}\n\n") == 1
+    assert accounts(vault_file) == []
+
+
+def test_duplicate_account_name_is_ambiguous(monkeypatch, vault_file, no_agent):
+    for password in ('one', 'two'):
+        assert run(monkeypatch, ['--file', vault_file, 'add', 'GitHub', 'dev'], f"{MASTER}\n{password}\n") == 0
+    assert run(monkeypatch, ['--file', vault_file, 'get', 'GitHub', 'dev'], f"{MASTER}\n") == 1
+    assert run(monkeypatch, ['--file', vault_file, 'delete', 'GitHub', 'dev'], f"{MASTER}\n") == 1
+    assert len(accounts(vault_file)) == 2
+
+
+def test_unwritable_data_dir_exits_with_error(monkeypatch, tmp_path, no_agent):
+    (tmp_path / 'not-a-dir').write_text('')
+    path = str(tmp_path / 'not-a-dir' / 'data.json')
+    assert run(monkeypatch, ['--file', path, 'add', 'GitHub', 'dev'], f"{MASTER}\n{PASSWORD}\n") == 1
+
+
+def test_concurrent_edit_of_same_site_is_refused(monkeypatch, vault_file, no_agent):
+    """命令行读取数据后图形界面修改了同一网站：命令行出错退出，不覆盖图形界面的修改"""
+    read_secret = vault_cli.read_secret
+
+    def gui_saves_first(prompt, stream=None):
+        if prompt.startswith("账号密码"):
+            gui = VaultStore(vault_file, UnlockSession())
+            data = gui.load(MASTER)
+            data["1"]["列表"].append({"账号": "gui", "密码": "p"})
+            gui.write_changes(data, ["1"])
+        return read_secret(prompt, stream)
+
+    monkeypatch.setattr(vault_cli, 'read_secret', gui_saves_first)
+    assert run(monkeypatch, ['--file', vault_file, 'add', 'GitHub', 'dev'], f"{MASTER}\n{PASSWORD}\n") == 1
+    assert [a["账号"] for a in accounts(vault_file)] == ["gui"]
@@ -0,0 +1,25 @@
+"""
+加密模块测试 - 首选密钥派生设置
+"""
+
+import pytest
+
+from vault_crypto import KDF_PBKDF2, make_kdf_params, preferred_kdf_params
+
+
+def test_preferred_kdf_unset(monkeypatch):
+    monkeypatch.delenv('ACCOUNT_MANAGER_KDF', raising=False)
+    assert preferred_kdf_params() is None
+
+
+def test_preferred_kdf_known(monkeypatch):
+    monkeypatch.setenv('ACCOUNT_MANAGER_KDF', KDF_PBKDF2)
+    assert preferred_kdf_params() == make_kdf_params(KDF_PBKDF2)
+
+
+@pytest.mark.parametrize('setting', ['foo', 'foo:auto', 'pbkdf2-sha256:fast'])
+def test_preferred_kdf_invalid(monkeypatch, caplog, setting):
+    """无效的设置只记录警告，返回None沿用数据文件的设置"""
+    monkeypatch.setenv('ACCOUNT_MANAGER_KDF', setting)
+    assert preferred_kdf_params() is None
+    assert 'ACCOUNT_MANAGER_KDF' in caplog.text
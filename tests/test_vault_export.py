@@ -0,0 +1,77 @@
+"""
+导出和备份测试 - 完整备份加增量备份的恢复
+"""
+
+import pytest
+
+import vault_export
+from vault_crypto import UnlockSession
+from vault_storage import VaultStore
+
+
+def make_site(name, *accounts):
+    return {"网站名": name, "网址": "", "列表": [{"账号": a, "密码": a + "-pw"} for a in accounts]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = VaultStore(str(tmp_path / 'data.json'), UnlockSession())
+    store.session.start('pw')
+    store.rewrite({str(i): make_site(f"S{i}", f"u{i}") for i in range(1, 21)})
+    return store
+
+
+def test_backup_chain_restore(store, tmp_path):
+    """完整备份之后的增量备份只写变化的网站，按备份链恢复得到最新数据"""
+    backup_dir = str(tmp_path / 'backups')
+    data = store.load('pw')
+    assert vault_export.backup(store, backup_dir)['type'] == 'full'
+
+    data["5"] = make_site("S5x", "n")
+    del data["7"]
+    store.write_changes(data, ["5"], ["7"])
+    result = vault_export.backup(store, backup_dir)
+    assert result['type'] == 'incremental'
+    assert result['records'] == 2
+
+    data["21"] = make_site("S21", "m")
+    store.write_changes(data, ["21"])
+    assert vault_export.backup(store, backup_dir)['records'] == 1
+
+    chain = vault_export.backup_chain(backup_dir, 'pw')
+    assert len(chain) == 3
+    assert vault_export.restore(chain, 'pw') == data
+    assert vault_export.restore(chain, session=store.session) == data
+
+    # 缺少完整备份的链不能恢复
+    with pytest.raises(ValueError):
+        vault_export.restore(chain[1:], 'pw')
+
+
+def test_restore_rejects_wrong_password(store, tmp_path):
+    path = str(tmp_path / 'full.ambak')
+    vault_export.export_vault(store, path)
+    with pytest.raises(ValueError):
+        vault_export.verify_archive(path, 'bad')
+
+
+def test_rekey_starts_new_chain(store, tmp_path):
+    """修改密码后重新写完整备份；跨越不同密钥的备份链在应用任何记录之前就被拒绝"""
+    backup_dir = str(tmp_path / 'backups')
+    data = store.load('pw')
+    old_full = vault_export.backup(store, backup_dir)['path']
+
+    store.session.start('pw2')
+    store.rewrite(data)
+    result = vault_export.backup(store, backup_dir)
+    assert result['type'] == 'full'
+
+    data["21"] = make_site("S21", "m")
+    store.write_changes(data, ["21"])
+    assert vault_export.backup(store, backup_dir)['type'] == 'incremental'
+    chain = vault_export.backup_chain(backup_dir, 'pw2')
+    assert chain[0] == result['path']
+    assert vault_export.restore(chain, 'pw2') == data
+
+    with pytest.raises(ValueError, match="密钥设置不一致"):
+        vault_export.restore([old_full] + chain[1:], 'pw2')
@@ -0,0 +1,73 @@
+"""
+导入测试 - 合并规则和出错时的回滚
+"""
+
+import pytest
+
+import vault_import
+from vault_import import ImportEntry
+from vault_model import Vault
+
+
+def make_vault():
+    return Vault({"1": {"网站名": "Google", "网址": "https://accounts.google.com",
+                        "列表": [{"账号": "me@gmail.com", "密码": "old"}]}})
+
+
+def test_import_merges_into_existing_site():
+    vault = make_vault()
+    entries = [
+        ImportEntry("Google", "https://accounts.google.com/signin", "me@gmail.com", "old", "", 2),
+        ImportEntry("GitHub", "https://github.com/login", "dev", "pw1", "", 3),
+        ImportEntry("GitHub", "https://github.com/login", "dev", "pw1", "", 4),
+    ]
+    result = vault_import.import_entries(vault, entries)
+    assert len(result.new_sites) == 1
+    assert [a["账号"] for _, a in vault.accounts(result.new_sites[0])] == ["dev"]
+    assert [a["账号"] for _, a in vault.accounts("1")] == ["me@gmail.com"]
+
+
+def test_import_rolls_back_on_error():
+    """读取中途出错时撤销已合并的记录（包括之前批次的），数据模型恢复原状"""
+    vault = make_vault()
+    before = vault.to_dict()
+
+    def entries():
+        yield ImportEntry("Google", "", "second@gmail.com", "p", "", 2)
+        yield ImportEntry("Google", "", "me@gmail.com", "new", "", 3)
+        yield ImportEntry("Zed", "https://zed.example", "z", "z", "", 4)
+        raise OSError("disk")
+
+    with pytest.raises(OSError):
+        vault_import.import_entries(vault, entries(), update_existing=True, batch_size=1)
+    assert vault.to_dict() == before
+
+
+def test_rollback_removes_added_note():
+    """回滚时删除导入前不存在的备注，而不是写回空备注"""
+    vault = make_vault()
+    before = vault.to_dict()
+
+    def entries():
+        yield ImportEntry("Google", "", "me@gmail.com", "new", "工作", 2)
+        raise OSError("disk")
+
+    with pytest.raises(OSError):
+        vault_import.import_entries(vault, entries(), update_existing=True)
+    assert vault.to_dict() == before
+
+
+@pytest.mark.parametrize("data", [
+    {"items": None},
+    {"items": ["not-an-item"]},
+    {"items": [{"type": 1, "login": {"uris": ["https://example.com"]}}]},
+    {"items": [{"type": 1, "login": {"uris": {"uri": "https://example.com"}}}]},
+    {"items": [{"type": 1, "login": "me"}]},
+    {"记录网站": []},
+    {"记录网站": {"1": "Google"}},
+    {"记录网站": {"1": {"网站名": "Google", "列表": None}}},
+    {"记录网站": {"1": {"网站名": "Google", "列表": ["me@gmail.com"]}}},
+])
+def test_malformed_json_raises_format_error(data):
+    with pytest.raises(vault_import.ImportFormatError, match="第 1 条"):
+        list(vault_import.iter_json(data))
@@ -0,0 +1,38 @@
+"""
+搜索索引测试 - 匹配、模糊匹配和匹配结果缓存
+"""
+
+from vault_search import SearchIndex
+
+
+def make_index():
+    index = SearchIndex((1.0, 0.5))
+    index.add(1, ["alice@gmail.com", "工作"])
+    index.add(2, ["bob@hotmail.com", ""])
+    index.add(3, ["carol@example.com", "个人 邮箱"])
+    return index
+
+
+def test_match_exact_and_fuzzy():
+    index = make_index()
+    scores, matched = index.match("mail")
+    assert matched == {1, 2}
+    assert all(scores[doc_id] > 1 for doc_id in matched)
+    # 错字只命中部分三元组，得分低于精确匹配
+    scores, matched = index.match("exampel")
+    assert matched == {3}
+    assert 0 < scores[3] < 1
+    assert index.match("ex")[1] == {3}
+    assert index.match("邮箱")[1] == {3}
+
+
+def test_match_cache_is_cleared_on_change():
+    """缓存的匹配结果在记录增删改后失效"""
+    index = make_index()
+    assert index.match("mail")[1] == {1, 2}
+    index.add(4, ["dave@mail.ru", ""])
+    assert index.match("mail")[1] == {1, 2, 4}
+    index.add(1, ["alice@example.com", ""])
+    assert index.match("mail")[1] == {2, 4}
+    index.remove(2)
+    assert index.match("mail")[1] == {4}
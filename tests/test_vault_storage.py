@@ -0,0 +1,204 @@
+"""
+存储模块测试 - AMVAULT 日志格式的追加、压缩和重新读取
+"""
+
+import os
+import threading
+
+import pytest
+
+import vault_storage
+from vault_crypto import UnlockSession
+from vault_storage import VaultStore, VaultConflictError, VAULT_MAGIC
+
+
+def make_site(name, *accounts):
+    return {"网站名": name, "网址": f"https://{name}.example", "列表": [{"账号": a, "密码": a + "-pw"} for a in accounts]}
+
+
+def reload(path, password='pw'):
+    return VaultStore(path, UnlockSession()).load(password)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = VaultStore(str(tmp_path / 'data.json'), UnlockSession())
+    store.session.start('pw')
+    return store
+
+
+def test_append_compact_reload(store, monkeypatch):
+    """追加的修改和删除在压缩前后都能原样读回，顺序不变"""
+    monkeypatch.setattr(vault_storage, 'COMPACT_MIN_GARBAGE', 4)
+    data = {"1": make_site("a", "x"), "2": make_site("b")}
+    store.rewrite(data)
+    with open(store.path, 'rb') as f:
+        assert f.read().startswith(VAULT_MAGIC)
+
+    for i in range(10):
+        data["2"]["列表"].append({"账号": str(i), "密码": "p"})
+        store.write_changes(data, ["2"])
+        assert reload(store.path) == data
+    store.wait_for_compaction()
+    with open(store.path, 'rb') as f:
+        line_count = f.read().count(b'\n')
+    assert line_count < 10
+
+    data["3"] = make_site("c", "y")
+    store.write_changes(data, ["3"])
+    del data["1"]
+    store.write_changes(data, deleted=["1"])
+    loaded = reload(store.path)
+    assert loaded == data
+    assert list(loaded) == list(data)
+
+    store.compact()
+    loaded = reload(store.path)
+    assert loaded == data
+    assert list(loaded) == list(data)
+
+
+def test_wrong_password_rejected(store):
+    store.rewrite({"1": make_site("a", "x")})
+    with pytest.raises(ValueError):
+        reload(store.path, 'bad')
+
+
+def test_torn_tail_is_ignored_and_rewritten(store):
+    """末尾写了一半的记录被忽略，下次保存时整体重写"""
+    data = {"1": make_site("a", "x")}
+    store.rewrite(data)
+    with open(store.path, 'ab') as f:
+        f.write(b'P 9 gAAAAAtorn')
+    store = VaultStore(store.path, UnlockSession())
+    assert store.load('pw') == data
+    assert store.needs_rewrite
+    data["1"]["网站名"] = "A"
+    store.write_changes(data, ["1"])
+    assert reload(store.path) == data
+
+
+def test_failed_append_keeps_state(store, monkeypatch):
+    """追加或fsync失败时内存中的状态保持不变，并标记下次整体重写"""
+    data = {"1": make_site("a", "x"), "2": make_site("b")}
+    store.rewrite(data)
+    live, garbage, seq = dict(store._live), store._garbage, store._seq
+
+    def broken_fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, 'fsync', broken_fsync)
+    changed = {"1": make_site("a", "x", "z"), "2": data["2"]}
+    with pytest.raises(OSError):
+        store.write_changes(changed, ["1"], ["2"])
+    assert store._live == live
+    assert list(store._live) == list(live)
+    assert store._garbage == garbage
+    assert store._seq == seq
+    assert store.needs_rewrite
+
+    monkeypatch.undo()
+    del changed["2"]
+    store.write_changes(changed, ["1"], ["2"])
+    assert reload(store.path) == changed
+
+
+def test_partial_load_keeps_state_and_lock(store):
+    """中途停止的读取不持有存储锁，也不替换已加载的状态"""
+    data = {"1": make_site("a", "x"), "2": make_site("b", "y")}
+    store.rewrite(data)
+    live, seq = dict(store._live), store._seq
+    store.write_changes(dict(data, **{"3": make_site("c")}), ["3"])
+    store._live, store._seq = dict(live), seq
+
+    events = store.iter_load(lazy=True)
+    op, key, site = next(events)
+    assert store.segment_count(key) == 1
+    acquired = []
+
+    def try_lock():
+        if store._lock.acquire(timeout=1):
+            acquired.append(True)
+            store._lock.release()
+
+    thread = threading.Thread(target=try_lock)
+    thread.start()
+    thread.join()
+    assert acquired == [True]
+    events.close()
+    assert store._live == live
+    assert store._seq == seq
+
+    list(store.iter_load(lazy=True))
+    assert list(store._live) == ["1", "2", "3"]
+    assert store._seq == 3
+
+
+def open_writer(path):
+    """模拟另一个打开同一数据文件的程序"""
+    writer = VaultStore(path, UnlockSession())
+    return writer, writer.load('pw')
+
+
+def test_concurrent_writers_merge(store):
+    """两个程序先后追加不同网站的修改，彼此的记录都不会丢失"""
+    store.rewrite({"1": make_site("a", "x"), "2": make_site("b", "y")})
+    a, data_a = open_writer(store.path)
+    b, data_b = open_writer(store.path)
+
+    data_a["1"]["网站名"] = "A"
+    a.write_changes(data_a, ["1"])
+    data_b["2"]["列表"].append({"账号": "z", "密码": "p"})
+    data_b["3"] = make_site("c", "w")
+    b.write_changes(data_b, ["2", "3"])
+    data_a["4"] = make_site("d")
+    a.write_changes(data_a, ["4"])
+
+    expected = {"1": data_a["1"], "2": data_b["2"], "3": data_b["3"], "4": data_a["4"]}
+    assert reload(store.path) == expected
+    assert [(op, key) for op, key, _ in b.merge_external_changes()] == [("put", "1"), ("put", "4")]
+    assert [(op, key) for op, key, _ in a.merge_external_changes()] == [("put", "2"), ("put", "3")]
+    assert a.load_segment("2") == data_b["2"]["列表"]
+
+
+def test_compaction_keeps_other_writer_records(store, monkeypatch):
+    """一个程序压缩文件后，另一个程序仍能合并并继续追加；压缩也保留对方刚写入的记录"""
+    monkeypatch.setattr(vault_storage, 'COMPACT_MIN_GARBAGE', 4)
+    store.rewrite({"1": make_site("a", "x"), "2": make_site("b")})
+    a, data_a = open_writer(store.path)
+    b, data_b = open_writer(store.path)
+
+    for i in range(6):
+        data_a["1"]["列表"].append({"账号": str(i), "密码": "p"})
+        a.write_changes(data_a, ["1"])
+    a.wait_for_compaction()
+    del data_b["2"]
+    b.write_changes(data_b, deleted=["2"])
+    assert reload(store.path) == {"1": data_a["1"]}
+
+    data_a["5"] = make_site("e", "q")
+    a.write_changes(data_a, ["5"])
+    b.compact()
+    assert reload(store.path) == {"1": data_a["1"], "5": data_a["5"]}
+    assert [(op, key) for op, key, _ in a.merge_external_changes()] == [("del", "2")]
+
+
+def test_conflicting_writers_refused(store):
+    """两个程序修改同一网站时，后写入的一方被拒绝，文件保持先写入的内容"""
+    store.rewrite({"1": make_site("a", "x")})
+    a, data_a = open_writer(store.path)
+    b, data_b = open_writer(store.path)
+
+    data_a["1"]["网站名"] = "A"
+    a.write_changes(data_a, ["1"])
+    data_b["1"]["网站名"] = "B"
+    with pytest.raises(VaultConflictError):
+        b.write_changes(data_b, ["1"])
+    with pytest.raises(VaultConflictError):
+        b.rewrite(data_b)
+    assert reload(store.path) == data_a
+
+    data_b = b.load()
+    data_b["1"]["网站名"] = "B"
+    b.write_changes(data_b, ["1"])
+    assert reload(store.path)["1"]["网站名"] == "B"
@@ -3,102 +3,436 @@
 用户使用统计模块 - 匿名收集使用数据
 """
 
+import atexit
 import json
-import requests
+import logging
+import os
+import threading
 import uuid
 import platform
 import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 
+from perf_metrics import timed
+from vault_storage import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+# 后台队列最多缓存的事件数，超出时丢弃最早的事件
+MAX_QUEUED_EVENTS = 1000
+
+# 每批处理的事件数及攒批等待时间(秒)
+BATCH_SIZE = 50
+FLUSH_INTERVAL = 2.0
+
+# 事件日志超过该大小(字节)时轮转，保留的旧日志个数
+MAX_LOG_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+# 发送统计的开关及接收地址（也可在 stats_config.json 中设置 send_enabled / endpoint）
+SEND_ENV = 'ACCOUNT_MANAGER_STATS_SEND'
+ENDPOINT_ENV = 'ACCOUNT_MANAGER_STATS_ENDPOINT'
+
+
+class TelemetryQueue:
+    """
+    后台统计队列
+    记录事件只是放入内存队列(O(1))，由后台线程攒批后调用 handler 写入和发送，
+    界面线程不会等待磁盘或网络；队列有上限，超出时丢弃最早的事件
+    参数:
+    handler: callable - 处理一批事件的函数（在后台线程中调用）
+    max_events: int - 队列上限
+    batch_size: int - 达到该数量立即处理，否则等待 flush_interval 秒攒批
+    flush_interval: float - 攒批等待时间(秒)
+    """
+    def __init__(self, handler, max_events=MAX_QUEUED_EVENTS, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.handler = handler
+        self.max_events = max_events
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0  # 因队列已满而丢弃的事件数
+        self._events = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._in_flight = False
+        self._flush_requested = False
+
+    def put(self, event):
+        """放入一个事件，立即返回"""
+        with self._cond:
+            if len(self._events) >= self.max_events:
+                self._events.popleft()
+                self.dropped += 1
+            self._events.append(event)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='usage-stats', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout=2.0):
+        """等待队列中的事件处理完毕，超时返回False"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._events or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._events:
+                    self._cond.wait()
+                # 攒批：等到达到批量大小、被要求立即处理或超时
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._events) < self.batch_size and not self._flush_requested:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = list(self._events)
+                self._events.clear()
+                self._in_flight = True
+            try:
+                self.handler(batch)
+            except Exception as e:
+                logger.warning("统计记录失败: %s", e)
+            finally:
+                with self._cond:
+                    self._in_flight = False
+                    if not self._events:
+                        self._flush_requested = False
+                    self._cond.notify_all()
+
+
+class UsageRollup:
+    """
+    预聚合的统计计数
+    记录事件时按天、按操作、按版本累加计数并保存到小文件中，
+    查询摘要时直接读取计数，不再扫描全部事件；计数包含已被轮转删除的旧事件
+    参数:
+    path: Path - 计数文件路径
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.total_uses = 0
+        self.users = set()
+        self.daily = {}
+        self.actions = {}
+        self.versions = {}
+
+    def load(self, rebuild_events=None):
+        """
+        读取计数文件；文件不存在时用 rebuild_events 提供的历史事件重建一次
+        参数:
+        rebuild_events: callable - 返回历史事件迭代器的函数
+        """
+        if self.loaded:
+            return
+        self.loaded = True
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.total_uses = data.get('total_uses', 0)
+            self.users = set(data.get('users', []))
+            self.daily = data.get('daily', {})
+            self.actions = data.get('actions', {})
+            self.versions = data.get('versions', {})
+            return
+        except (OSError, ValueError):
+            pass
+        if rebuild_events is not None:
+            self.add(rebuild_events())
+            self.save()
+
+    def add(self, events):
+        """累加一批事件"""
+        for event in events:
+            self.total_uses += 1
+            self.users.add(event.get('user_id'))
+            date = event.get('timestamp', '')[:10]
+            self.daily[date] = self.daily.get(date, 0) + 1
+            action = event.get('action', '')
+            self.actions[action] = self.actions.get(action, 0) + 1
+            version = event.get('version', '')
+            self.versions[version] = self.versions.get(version, 0) + 1
+
+    def save(self):
+        """写入计数文件（先写临时文件再替换，避免写入中断损坏）"""
+        data = {
+            'total_uses': self.total_uses,
+            'users': sorted(user for user in self.users if user),
+            'daily': self.daily,
+            'actions': self.actions,
+            'versions': self.versions,
+        }
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def summary(self):
+        """
+        统计摘要
+        除总数和按天统计外，launch 计为 app_launches，
+        feature_<名称> 计为 <名称>（如 add_account、password_verify_failed）
+        """
+        features = {}
+        for action, count in self.actions.items():
+            if action.startswith('feature_'):
+                features[action[len('feature_'):]] = count
+        summary = {
+            "total_users": len(self.users),
+            "total_uses": self.total_uses,
+            "daily_stats": dict(self.daily),
+            "version_stats": dict(self.versions),
+            "feature_stats": features,
+            "app_launches": self.actions.get('launch', 0),
+        }
+        for name, count in features.items():
+            summary.setdefault(name, count)
+        return summary
+
+
 class UsageStats:
     def __init__(self):
-        self.project_dir = Path(__file__).parent
-        self.stats_file = self.project_dir / 'usage_stats.json'
+        # 统计文件与数据文件放在同一目录
+        self.project_dir = Path(get_data_dir())
+        # 事件日志：每行一个JSON事件，只追加写入
+        self.stats_file = self.project_dir / 'usage_stats.jsonl'
+        # 旧版本的统计文件（JSON数组），首次写入时迁移
+        self.legacy_stats_file = self.project_dir / 'usage_stats.json'
         self.config_file = self.project_dir / 'stats_config.json'
-        self.session_id = None
+        self._config = None  # 配置缓存，只在首次使用时读取文件
+        self._file_lock = threading.Lock()
+        # 预聚合计数，摘要查询不需要扫描事件日志
+        self.rollup = UsageRollup(self.project_dir / 'usage_rollup.json')
+        self.session_id = str(uuid.uuid4())[:6]  # 每次运行一个会话id
         self.user_id = None
+        self._platform_info = None
+        self.send_failures = 0
         
         # GitHub统计API（使用GitHub API统计仓库访问）
         self.github_repo = "alanboy520/account-manager"
         
+        # 事件在后台线程中写入和发送
+        self.queue = TelemetryQueue(self.process_batch)
+        
     def get_or_create_user_id(self):
         """获取或创建匿名用户ID"""
+        if self.user_id:
+            return self.user_id
         config = self.load_config()
         if 'user_id' not in config:
             # 创建匿名用户ID（不包含个人信息）
             config['user_id'] = str(uuid.uuid4())[:8]  # 8位随机ID
             config['first_seen'] = datetime.now().isoformat()
             self.save_config(config)
-        return config['user_id']
+        self.user_id = config['user_id']
+        return self.user_id
     
     def load_config(self):
-        """加载配置"""
-        try:
-            if self.config_file.exists():
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except:
-            pass
-        return {}
+        """加载配置（只读取一次文件，之后使用内存中的缓存）"""
+        if self._config is None:
+            config = {}
+            try:
+                if self.config_file.exists():
+                    with open(self.config_file, 'r', encoding='utf-8') as f:
+                        config = json.load(f)
+            except (OSError, ValueError):
+                pass
+            self._config = config
+        return dict(self._config)
     
     def save_config(self, config):
         """保存配置"""
+        self._config = dict(config)
         try:
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(config, f, indent=2, ensure_ascii=False)
-        except:
+        except (OSError, ValueError):
             pass
     
+    @timed('record_usage')
     def record_usage(self, action_type="launch"):
-        """记录使用数据"""
+        """记录使用数据（只放入后台队列，不等待磁盘和网络）"""
         try:
-            user_id = self.get_or_create_user_id()
-            
-            # 收集匿名数据
-            usage_data = {
-                "user_id": user_id,  # 匿名ID
+            self.queue.put({
                 "action": action_type,
                 "timestamp": datetime.now().isoformat(),
+            })
+            return True
+        except Exception as e:
+            logger.warning("统计记录失败: %s", e)
+            return False
+    
+    def get_platform_info(self):
+        """系统信息（只获取一次）"""
+        if self._platform_info is None:
+            self._platform_info = {
                 "version": "4.1.0",
                 "platform": platform.system(),
                 "platform_version": platform.version(),
                 "python_version": platform.python_version(),
-                "session_id": str(uuid.uuid4())[:6]
             }
-            
+        return self._platform_info
+    
+    @timed('usage_stats.process_batch')
+    def process_batch(self, batch):
+        """补全一批事件的匿名信息后保存到本地，已开启发送时再发送（在后台线程中调用）"""
+        user_id = self.get_or_create_user_id()
+        info = self.get_platform_info()
+        usage_data = []
+        for event in batch:
+            # 收集匿名数据
+            usage_data.append({
+                "user_id": user_id,  # 匿名ID
+                "action": event["action"],
+                "timestamp": event["timestamp"],
+                **info,
+                "session_id": self.session_id
+            })
+        
+        with self.rollup.lock:
+            # 先载入计数（首次使用时由已有日志重建），再保存新事件，避免重复计数
+            self._load_rollup()
             # 保存到本地文件
             self.save_usage_data(usage_data)
-            
-            # 发送到GitHub统计（通过API调用）
-            self.send_to_github_stats(usage_data)
-            
-            return True
-        except Exception as e:
-            print(f"统计记录失败: {e}")
-            return False
+            # 更新预聚合计数
+            self.rollup.add(usage_data)
+            self.rollup.save()
+        
+        if self.is_sending_enabled():
+            self.send_batch(usage_data)
+    
+    def flush(self, timeout=2.0):
+        """等待已记录的事件写入完毕"""
+        return self.queue.flush(timeout)
     
     def save_usage_data(self, data):
-        """保存使用数据到本地"""
+        """
+        保存使用数据到本地（data 可以是单个事件或一批事件）
+        事件逐行追加到日志末尾，不读取也不重写已有记录；日志过大时轮转
+        """
+        events = data if isinstance(data, list) else [data]
+        lines = ''.join(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n' for event in events)
         try:
-            stats = []
-            if self.stats_file.exists():
-                with open(self.stats_file, 'r', encoding='utf-8') as f:
-                    stats = json.load(f)
-            
-            stats.append(data)
-            
-            # 只保留最近100条记录
-            stats = stats[-100:]
-            
+            with self._file_lock:
+                self._migrate_legacy_stats()
+                self._rotate_if_needed()
+                with open(self.stats_file, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+        except (OSError, ValueError):
+            pass
+    
+    def _backup_file(self, number):
+        return self.stats_file.with_name(f'{self.stats_file.stem}.{number}{self.stats_file.suffix}')
+    
+    def _rotate_if_needed(self):
+        """当前日志超过 MAX_LOG_BYTES 时轮转：usage_stats.jsonl -> usage_stats.1.jsonl -> ..."""
+        try:
+            if self.stats_file.stat().st_size < MAX_LOG_BYTES:
+                return
+        except FileNotFoundError:
+            return
+        oldest = self._backup_file(LOG_BACKUPS)
+        if oldest.exists():
+            oldest.unlink()
+        for number in range(LOG_BACKUPS - 1, 0, -1):
+            backup = self._backup_file(number)
+            if backup.exists():
+                os.replace(backup, self._backup_file(number + 1))
+        os.replace(self.stats_file, self._backup_file(1))
+    
+    def _migrate_legacy_stats(self):
+        """将旧版本的 usage_stats.json（JSON数组）转换为事件日志"""
+        if not self.legacy_stats_file.exists() or self.stats_file.exists():
+            return
+        try:
+            with open(self.legacy_stats_file, 'r', encoding='utf-8') as f:
+                old_events = json.load(f)
             with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(stats, f, indent=2, ensure_ascii=False)
-        except:
+                for event in old_events:
+                    f.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n')
+        except (OSError, ValueError):
+            return
+        self.legacy_stats_file.unlink()
+    
+    def _load_rollup(self):
+        """载入预聚合计数（调用方持有 rollup.lock）"""
+        if not self.rollup.loaded:
+            with self._file_lock:
+                self._migrate_legacy_stats()
+            self.rollup.load(self.iter_events)
+    
+    def iter_events(self):
+        """按时间顺序逐条读取所有事件（含轮转的旧日志），不会一次载入全部记录"""
+        with self._file_lock:
+            paths = [self._backup_file(n) for n in range(LOG_BACKUPS, 0, -1)] + [self.stats_file]
+            paths = [path for path in paths if path.exists()]
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            # 写入中断留下的不完整行
+                            continue
+            except FileNotFoundError:
+                # 读取过程中刚好被轮转删除
+                continue
+    
+    def is_sending_enabled(self):
+        """是否允许发送统计（默认关闭，需要用户开启）"""
+        env = os.environ.get(SEND_ENV)
+        if env is not None:
+            return env.strip().lower() in ('1', 'true', 'yes', 'on')
+        return bool(self.load_config().get('send_enabled', False))
+    
+    def set_sending_enabled(self, enabled):
+        """开启或关闭发送统计"""
+        config = self.load_config()
+        config['send_enabled'] = bool(enabled)
+        self.save_config(config)
+    
+    def get_endpoint(self):
+        """统计接收地址，未设置时返回None（使用GitHub仓库访问作为间接统计）"""
+        return os.environ.get(ENDPOINT_ENV) or self.load_config().get('endpoint')
+    
+    def send_batch(self, batch):
+        """发送一批事件（在后台线程中调用，失败只计数不重试）"""
+        endpoint = self.get_endpoint()
+        if not endpoint:
+            return self.send_to_github_stats(batch[-1])
+        try:
+            import requests
+            response = requests.post(endpoint, json={"events": batch}, timeout=3)
+            if response.status_code < 300:
+                return True
+        except Exception:
             pass
+        self.send_failures += 1
+        return False
     
     def send_to_github_stats(self, data):
         """发送到GitHub统计"""
         try:
+            import requests
             # 使用GitHub API获取仓库信息（作为统计）
             url = f"https://api.github.com/repos/{self.github_repo}"
             headers = {
@@ -112,35 +446,21 @@ class UsageStats:
             if response.status_code == 200:
                 repo_data = response.json()
                 return True
-        except:
+        except (ImportError, OSError, ValueError):
+            # 未安装 requests、网络错误(RequestException 是 OSError 的子类)或响应不是JSON
             pass
         return False
     
     def get_usage_summary(self):
-        """获取使用统计摘要"""
+        """获取使用统计摘要（读取预聚合计数，不扫描事件日志）"""
+        self.flush()
         try:
-            if not self.stats_file.exists():
-                return {"total_users": 0, "total_uses": 0}
-            
-            with open(self.stats_file, 'r', encoding='utf-8') as f:
-                stats = json.load(f)
-            
-            unique_users = len(set(s['user_id'] for s in stats))
-            total_uses = len(stats)
-            
-            # 按日期统计
-            daily_stats = {}
-            for stat in stats:
-                date = stat['timestamp'][:10]
-                daily_stats[date] = daily_stats.get(date, 0) + 1
-            
-            return {
-                "total_users": unique_users,
-                "total_uses": total_uses,
-                "daily_stats": daily_stats,
-                "last_update": datetime.now().isoformat()
-            }
-        except:
+            with self.rollup.lock:
+                self._load_rollup()
+                summary = self.rollup.summary()
+            summary["last_update"] = datetime.now().isoformat()
+            return summary
+        except (OSError, ValueError):
             return {"total_users": 0, "total_uses": 0}
     
     def show_privacy_info(self):
@@ -160,11 +480,15 @@ class UsageStats:
         × 文件内容
         × IP地址或地理位置
         
-        数据仅用于改进软件体验，可随时删除 usage_stats.json 文件清除记录。
+        数据仅用于改进软件体验，可随时删除 usage_stats*.jsonl 和 usage_rollup.json 文件清除记录。
+        统计默认只保存在本地，只有在 stats_config.json 中开启 send_enabled 后才会发送。
         """
 
+
 # 全局统计实例
 stats = UsageStats()
+# 退出前尽量写完队列中的事件
+atexit.register(stats.flush, 1.0)
 
 def record_app_launch():
     """记录应用启动"""
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+解锁代理 - 类似 ssh-agent，在后台进程中保存派生密钥（不依赖PyQt6）
+
+第一次解锁时由代理派生密钥并保存在代理进程的内存中，之后启动的图形界面和命令行
+只需按数据文件的盐向代理查找密钥，不再输入密码，也不再执行密钥派生。
+密钥不会离开代理进程：客户端把需要加解密的令牌发给代理处理。
+
+用法:
+    python -m vault_agent start [--timeout 秒]   在后台启动（输出可供 eval 的环境变量设置）
+    python -m vault_agent status
+    python -m vault_agent lock                   清除代理中的所有密钥
+    python -m vault_agent stop
+
+套接字默认为 $XDG_RUNTIME_DIR（或临时目录）下 account-manager-<uid>/agent.sock，
+可用环境变量 ACCOUNT_MANAGER_AGENT_SOCK 指定。所在目录必须只有当前用户可写，
+套接字权限为0600，Linux上还会校验连接进程的用户。密钥空闲超时（默认15分钟）后自动清除。
+不支持Unix套接字的系统上不使用代理，照常输入密码。
+
+协议：每行一个JSON请求，代理回复一行JSON，{"ok": true, ...} 或 {"ok": false, "error": 类型, "message": ...}
+    lookup  {salt}                           是否持有该盐的密钥，返回 found、kdf
+    unlock  {salt, token, kdf, password}     派生密钥并用令牌校验密码，返回令牌明文 data
+    start   {kdf, password}                  用新的盐派生密钥（新建数据文件、更换密码），返回 salt、kdf
+    encrypt {salt, data} / decrypt {salt, token}
+    forget  {salt} / lock / status / stop
+盐以base64传输。
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import socket
+import struct
+import logging
+import argparse
+import tempfile
+import threading
+import socketserver
+
+from vault_crypto import PasswordBasedEncryption, UnlockSession, make_kdf_params, KDF_PBKDF2
+
+logger = logging.getLogger(__name__)
+
+AGENT_SOCK_ENV = 'ACCOUNT_MANAGER_AGENT_SOCK'
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+# 后台启动时等待套接字就绪的时间(秒)
+START_WAIT = 5.0
+AGENT_OPS = ('lookup', 'unlock', 'start', 'encrypt', 'decrypt', 'forget', 'lock', 'status', 'stop')
+
+
+class AgentError(RuntimeError):
+    """代理不可用或请求失败"""
+
+
+def agent_supported() -> bool:
+    """当前系统是否支持解锁代理（需要Unix套接字）"""
+    return hasattr(socket, 'AF_UNIX') and hasattr(os, 'getuid')
+
+
+def default_socket_path():
+    """代理套接字路径（环境变量 ACCOUNT_MANAGER_AGENT_SOCK 优先）"""
+    if os.environ.get(AGENT_SOCK_ENV):
+        return os.environ[AGENT_SOCK_ENV]
+    base = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(base, f'account-manager-{os.getuid()}', 'agent.sock')
+
+
+def _encode_salt(salt: bytes) -> str:
+    return base64.b64encode(salt).decode('ascii')
+
+
+def _peer_uid(sock):
+    """连接另一端进程的用户id，系统不支持时返回None"""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
+
+
+# ======================= 代理服务端 =======================
+class _AgentHandler(socketserver.StreamRequestHandler):
+    """处理一个客户端连接：逐行读取请求并回复"""
+
+    def handle(self):
+        uid = _peer_uid(self.request)
+        if uid is not None and uid != os.getuid():
+            logger.warning("拒绝其他用户的连接: uid=%s", uid)
+            return
+        for line in self.rfile:
+            try:
+                response = self.server.dispatch(json.loads(line))
+            except RuntimeError as e:
+                response = {"ok": False, "error": "locked", "message": str(e)}
+            except ValueError as e:
+                response = {"ok": False, "error": "invalid", "message": str(e)}
+            except (KeyError, TypeError) as e:
+                response = {"ok": False, "error": "bad_request", "message": f"无效的请求: {e}"}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class AgentServer(socketserver.ThreadingUnixStreamServer):
+    """
+    解锁代理服务端
+    每个密钥由一个 UnlockSession 保存（按盐区分，可同时持有多个数据文件的密钥），
+    空闲超时后清除；密钥派生在连接线程中执行，不阻塞其他客户端
+    """
+    daemon_threads = True
+
+    def __init__(self, path, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self._keys = {}  # 盐(base64) -> UnlockSession
+        self._keys_lock = threading.Lock()
+        _prepare_socket_dir(path)
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(path, _AgentHandler)
+        finally:
+            os.umask(old_umask)
+        os.chmod(path, 0o600)
+
+    def service_actions(self):
+        """serve_forever 每次轮询时调用：清除空闲超时的密钥"""
+        with self._keys_lock:
+            for salt, session in list(self._keys.items()):
+                if not session.expire_if_idle():
+                    del self._keys[salt]
+                    logger.info("密钥空闲超时，已清除")
+
+    def _session(self, salt):
+        """持有该盐的密钥时返回会话，否则返回None（调用方持有 _keys_lock）"""
+        session = self._keys.get(salt)
+        if session is not None and not session.is_unlocked():
+            del self._keys[salt]
+            return None
+        return session
+
+    def _add(self, session):
+        with self._keys_lock:
+            old = self._keys.get(_encode_salt(session.salt))
+            if old is not None and old is not session:
+                old.lock()
+            self._keys[_encode_salt(session.salt)] = session
+
+    def lock_all(self):
+        with self._keys_lock:
+            for session in self._keys.values():
+                session.lock()
+            self._keys.clear()
+
+    def dispatch(self, request):
+        """执行一个请求，返回回复字典"""
+        if not isinstance(request, dict):
+            raise TypeError("请求必须是JSON对象")
+        op = request['op']
+        if op not in AGENT_OPS:
+            raise ValueError(f"未知的请求: {op}")
+        if op == 'unlock':
+            # 在锁外派生密钥，派生期间其他客户端照常访问
+            session = UnlockSession(timeout=self.idle_timeout)
+            data = session.unlock_with_token(request['password'], base64.b64decode(request['salt']),
+                                             request['token'].encode('ascii'), request.get('kdf'))
+            self._add(session)
+            logger.info("已解锁并保存密钥")
+            return {"ok": True, "data": data}
+        if op == 'start':
+            session = UnlockSession(timeout=self.idle_timeout)
+            session.start(request['password'], request.get('kdf'))
+            self._add(session)
+            logger.info("已派生并保存新的密钥")
+            return {"ok": True, "salt": _encode_salt(session.salt), "kdf": session.kdf_params}
+        if op == 'lock':
+            self.lock_all()
+            logger.info("已清除所有密钥")
+            return {"ok": True}
+        if op == 'stop':
+            self.lock_all()
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+        with self._keys_lock:
+            if op == 'status':
+                return {"ok": True, "keys": sum(1 for salt in list(self._keys) if self._session(salt)),
+                        "timeout": self.idle_timeout, "pid": os.getpid()}
+            session = self._session(request['salt'])
+            if op == 'lookup':
+                return {"ok": True, "found": session is not None,
+                        "kdf": session.kdf_params if session else None}
+            if op == 'forget':
+                if session is not None:
+                    session.lock()
+                    del self._keys[request['salt']]
+                return {"ok": True}
+            if session is None:
+                raise RuntimeError("会话已锁定")
+            if op == 'encrypt':
+                return {"ok": True, "token": session.encrypt_token(request['data']).decode('ascii')}
+            return {"ok": True, "data": session.decrypt_token(request['token'].encode('ascii'))}
+
+
+def _prepare_socket_dir(path):
+    """创建套接字所在目录（0700）并检查权限；清理上次异常退出留下的套接字"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.stat(directory)
+    if st.st_uid != os.getuid() or st.st_mode & 0o022:
+        raise RuntimeError(f"套接字目录必须属于当前用户且其他用户不可写: {directory}")
+    if os.path.exists(path):
+        if connect(path) is not None:
+            raise RuntimeError(f"解锁代理已在运行: {path}")
+        os.remove(path)
+
+
+def serve(path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """在当前进程中运行代理，直到收到 stop 请求或 SIGTERM/SIGINT"""
+    import signal
+    path = path or default_socket_path()
+    server = AgentServer(path, idle_timeout)
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info("解锁代理已启动: %s", path)
+    try:
+        server.serve_forever(poll_interval=1.0)
+    finally:
+        server.lock_all()
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+        logger.info("解锁代理已退出")
+
+
+# ======================= 客户端 =======================
+class AgentClient:
+    """与代理的连接（线程安全，连接断开后下次请求时自动重连）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def request(self, op, **fields):
+        """
+        发送请求并返回回复字典
+        代理回复 invalid 时抛出 ValueError（密码错误、数据损坏），locked 时抛出 RuntimeError，
+        无法连接或其他错误时抛出 AgentError
+        """
+        fields['op'] = op
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    self._sock.connect(self.path)
+                    self._file = self._sock.makefile('rwb')
+                self._file.write(json.dumps(fields, ensure_ascii=False).encode('utf-8') + b'\n')
+                self._file.flush()
+                line = self._file.readline()
+                if not line:
+                    raise OSError("代理关闭了连接")
+            except OSError as e:
+                self.close()
+                raise AgentError(f"无法连接解锁代理: {e}") from e
+        response = json.loads(line)
+        if response.get('ok'):
+            return response
+        if response.get('error') == 'invalid':
+            raise ValueError(response.get('message'))
+        if response.get('error') == 'locked':
+            raise RuntimeError(response.get('message'))
+        raise AgentError(response.get('message'))
+
+    def close(self):
+        for stream in (self._file, self._sock):
+            if stream is not None:
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+        self._sock = None
+        self._file = None
+
+
+def connect(path=None):
+    """连接正在运行的代理，代理未运行或系统不支持时返回None"""
+    if not agent_supported():
+        return None
+    path = path or default_socket_path()
+    if not os.path.exists(path):
+        return None
+    client = AgentClient(path)
+    try:
+        client.request('status')
+    except (AgentError, ValueError):
+        client.close()
+        return None
+    return client
+
+
+class AgentSession(UnlockSession):
+    """
+    通过代理加解密的解锁会话，接口与 UnlockSession 相同
+    解锁和新建密钥交给代理执行，之后的加解密都发给代理，本进程不持有密钥；
+    代理不可用时退回本地派生密钥（与 UnlockSession 相同）。
+    is_unlocked() 不访问代理：关联密钥后视为已解锁，直到本地空闲超时或某次请求失败；
+    lock() 只断开本进程与代理中密钥的关联，代理中的密钥由空闲超时或 vault_agent lock 清除
+    """
+
+    def __init__(self, client, timeout=15 * 60, cipher=None):
+        super().__init__(timeout, cipher)
+        self.client = client
+        self._remote = None  # 代理中密钥的盐，None表示使用本地密钥
+
+    def _use_remote(self, salt, kdf_params):
+        super().lock()
+        self._remote = bytes(salt)
+        self.cipher = PasswordBasedEncryption(kdf_params)
+        self._touch()
+
+    def attach(self, salt) -> bool:
+        """代理持有该盐的密钥时直接使用（无需密码），返回是否成功"""
+        try:
+            response = self.client.request('lookup', salt=_encode_salt(salt))
+        except AgentError as e:
+            logger.warning("查询解锁代理失败: %s", e)
+            return False
+        if not response['found']:
+            return False
+        self._use_remote(salt, response['kdf'])
+        return True
+
+    def unlock(self, encrypted_data: bytes, password: str) -> str:
+        # 旧格式（盐 + Fernet令牌）固定使用 PBKDF2-SHA256 100000次迭代
+        salt_size = self.cipher.salt_size
+        return self.unlock_with_token(password, encrypted_data[:salt_size], encrypted_data[salt_size:],
+                                      make_kdf_params(KDF_PBKDF2))
+
+    def unlock_with_token(self, password: str, salt: bytes, token: bytes, kdf_params: dict = None) -> str:
+        kdf_params = kdf_params or self.cipher.kdf_params
+        try:
+            response = self.client.request('unlock', salt=_encode_salt(salt), token=token.decode('ascii'),
+                                           kdf=kdf_params, password=password)
+        except AgentError as e:
+            logger.warning("解锁代理不可用，在本进程中派生密钥: %s", e)
+            self._remote = None
+            return super().unlock_with_token(password, salt, token, kdf_params)
+        self._use_remote(salt, kdf_params)
+        return response['data']
+
+    def start(self, password: str, kdf_params: dict = None):
+        kdf_params = kdf_params or self.cipher.kdf_params
+        try:
+            response = self.client.request('start', kdf=kdf_params, password=password)
+        except AgentError as e:
+            logger.warning("解锁代理不可用，在本进程中派生密钥: %s", e)
+            self._remote = None
+            super().start(password, kdf_params)
+            return
+        self._use_remote(base64.b64decode(response['salt']), response['kdf'])
+
+    def is_unlocked(self) -> bool:
+        if self._remote is None:
+            return super().is_unlocked()
+        # 界面频繁调用，不为每次查询访问代理；代理中的密钥被清除时由下一次请求发现
+        if self.timeout is not None and time.monotonic() - self._last_used > self.timeout:
+            self.lock()
+            return False
+        return True
+
+    @property
+    def salt(self):
+        return self._remote if self._remote is not None else self._salt
+
+    def _remote_request(self, op, **fields):
+        try:
+            response = self.client.request(op, salt=_encode_salt(self._remote), **fields)
+        except (AgentError, RuntimeError) as e:
+            # 代理中的密钥已清除或代理已退出：断开关联，之后 is_unlocked() 返回False
+            self.lock()
+            raise RuntimeError("会话已锁定") from e
+        self._touch()
+        return response
+
+    def encrypt_token(self, data: str) -> bytes:
+        if self._remote is None:
+            return super().encrypt_token(data)
+        return self._remote_request('encrypt', data=data)['token'].encode('ascii')
+
+    def decrypt_token(self, token: bytes) -> str:
+        if self._remote is None:
+            return super().decrypt_token(token)
+        return self._remote_request('decrypt', token=token.decode('ascii'))['data']
+
+    def encrypt_data(self, data: str) -> bytes:
+        if self._remote is None:
+            return super().encrypt_data(data)
+        return self._remote + self.encrypt_token(data)
+
+    def decrypt_data(self, encrypted_data: bytes) -> str:
+        if self._remote is None:
+            return super().decrypt_data(encrypted_data)
+        if encrypted_data[:self.cipher.salt_size] != self._remote:
+            raise ValueError("数据不属于当前会话")
+        return self.decrypt_token(encrypted_data[self.cipher.salt_size:])
+
+    def lock(self):
+        super().lock()
+        self._remote = None
+
+
+def create_session(timeout=15 * 60, path=None):
+    """代理正在运行时返回 AgentSession，否则返回普通的 UnlockSession"""
+    client = connect(path)
+    if client is None:
+        return UnlockSession(timeout=timeout)
+    return AgentSession(client, timeout=timeout)
+
+
+# ======================= 命令行 =======================
+def _start_background(path, idle_timeout):
+    """在新的会话中启动代理进程，等待套接字就绪"""
+    import subprocess
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--socket', path, 'start', '--foreground',
+         '--timeout', str(idle_timeout)],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True)
+    deadline = time.monotonic() + START_WAIT
+    while time.monotonic() < deadline:
+        if connect(path) is not None:
+            return proc.pid
+        if proc.poll() is not None:
+            break
+        time.sleep(0.05)
+    raise AgentError("解锁代理启动失败（可设置 ACCOUNT_MANAGER_LOG_LEVEL=INFO 后查看日志）")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='vault_agent', description="账号管理器解锁代理")
+    parser.add_argument('--socket', help="套接字路径（默认见 ACCOUNT_MANAGER_AGENT_SOCK）")
+    commands = parser.add_subparsers(dest='command', required=True)
+    p = commands.add_parser('start', help="启动代理")
+    p.add_argument('--timeout', type=int, default=DEFAULT_IDLE_TIMEOUT, help="密钥空闲超时(秒)，0表示不超时")
+    p.add_argument('--foreground', action='store_true', help="在前台运行")
+    commands.add_parser('status', help="查看代理状态")
+    commands.add_parser('lock', help="清除代理中的所有密钥")
+    commands.add_parser('stop', help="清除密钥并退出代理")
+    args = parser.parse_args(argv)
+
+    if not agent_supported():
+        print("错误: 当前系统不支持解锁代理", file=sys.stderr)
+        return 1
+    path = args.socket or default_socket_path()
+    try:
+        if args.command == 'start':
+            idle_timeout = args.timeout or None
+            if args.foreground:
+                from app_logging import setup_logging
+                setup_logging()
+                serve(path, idle_timeout)
+                return 0
+            if connect(path) is not None:
+                raise AgentError(f"解锁代理已在运行: {path}")
+            pid = _start_background(path, args.timeout)
+            # 与 ssh-agent 相同，输出可以 eval 的环境变量设置
+            print(f"{AGENT_SOCK_ENV}={path}; export {AGENT_SOCK_ENV};")
+            print(f"echo 解锁代理 pid {pid};")
+            return 0
+        client = connect(path)
+        if client is None:
+            raise AgentError(f"解锁代理未运行: {path}")
+        response = client.request(args.command)
+        if args.command == 'status':
+            timeout = f"{response['timeout']} 秒" if response['timeout'] else "不超时"
+            print(f"pid {response['pid']}，持有 {response['keys']} 个密钥，空闲超时 {timeout}")
+        return 0
+    except (AgentError, RuntimeError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
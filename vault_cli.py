@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+命令行工具 - 无界面读写数据文件，供脚本调用（不依赖PyQt6）
+
+用法:
+    python -m vault_cli list
+    python -m vault_cli get GitHub dev              输出账号密码
+    python -m vault_cli get GitHub --json           输出网站的所有账号（JSON）
+    python -m vault_cli add GitHub dev --note 工作   新网站会自动创建
+    python -m vault_cli update GitHub dev --password
+    python -m vault_cli delete GitHub dev           （删除整个网站: delete GitHub --site）
+    python -m vault_cli search "git dev"
+    python -m vault_cli import chrome.csv
+    python -m vault_cli export 备份.ambak            （.csv / .json 为明文）
+    python -m vault_cli backup [目录]
+    python -m vault_cli rekey [--kdf argon2id]
+
+网站可以用网站名或网站id指定。主密码和需要输入的其他密码（账号密码、新的主密码）
+在终端中逐个提示输入（不回显）；标准输入不是终端时按顺序每行读取一个，例如:
+    printf '%s\\n' "$MASTER" "$NEW_PASSWORD" | python -m vault_cli add GitHub dev
+解锁代理（python -m vault_agent start）正在运行时，输入的主密码交给代理派生并保存。
+在终端中使用时，代理已持有该数据文件的密钥则不提示主密码，也不执行密钥派生；
+标准输入不是终端时总是读取主密码行，读取的行数与代理的状态无关。
+--use-agent 只使用代理中的密钥，从不读取主密码（代理中没有密钥时出错），例如:
+    printf '%s\\n' "$NEW_PASSWORD" | python -m vault_cli --use-agent add GitHub dev
+--no-agent 不使用代理。
+数据文件默认与图形界面相同（可用 --file 或环境变量 ACCOUNT_MANAGER_DATA_DIR 指定）。
+图形界面可以同时打开：保存时先合并图形界面写入的修改，双方修改了同一网站时出错退出，不覆盖。
+只导入读写数据文件所需的模块，导入/导出模块在用到时才导入，启动时间不含密钥派生远低于100毫秒。
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+from vault_crypto import UnlockSession, make_kdf_params, preferred_kdf_params
+from vault_storage import VaultStore, get_data_dir, get_data_file_path
+from vault_model import Vault
+from vault_agent import AgentSession, create_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_LIMIT = 20
+
+
+class CliError(Exception):
+    """命令执行失败（输出错误信息，退出码为1）"""
+
+
+# ======================= 密码输入 =======================
+def read_secret(prompt, stream=None):
+    """
+    读取一个密码：终端中提示输入（不回显），否则从标准输入读取一行
+    参数:
+    prompt: str - 终端中显示的提示
+    stream: 输入流，默认标准输入
+    """
+    stream = stream or sys.stdin
+    if stream.isatty():
+        import getpass
+        return getpass.getpass(prompt)
+    line = stream.readline()
+    if not line:
+        raise CliError(f"标准输入中缺少{prompt.rstrip(': ：')}")
+    return line.rstrip('\r\n')
+
+
+def read_new_secret(prompt, stream=None):
+    """读取新密码，终端中需要输入两次确认"""
+    stream = stream or sys.stdin
+    secret = read_secret(prompt, stream)
+    if not secret:
+        raise CliError("密码不能为空")
+    if stream.isatty() and read_secret("再次输入: ", stream) != secret:
+        raise CliError("两次输入的密码不一致")
+    return secret
+
+
+# ======================= 打开数据文件 =======================
+def open_vault(args, create=False):
+    """
+    解锁数据文件，返回 (存储, 数据模型)
+    账号列表按需解密：只读取一个网站时不会解密其他网站的账号
+    参数:
+    create: bool - 数据文件不存在时新建（设置新的主密码）
+    """
+    path = args.file or get_data_file_path()
+    session = UnlockSession(timeout=None) if args.no_agent else create_session(timeout=None)
+    store = VaultStore(path, session)
+    store.kdf_policy = preferred_kdf_params
+    if not os.path.exists(path):
+        if not create:
+            raise CliError(f"数据文件不存在: {path}")
+        if args.use_agent:
+            raise CliError(f"数据文件不存在（新建时需要设置主密码，不能使用 --use-agent）: {path}")
+        store.session.start(read_new_secret("设置主密码: "), store.preferred_kdf())
+        return store, Vault(segments=store)
+    salt = store.file_salt()
+    # 管道输入时是否读取主密码行只取决于参数，不取决于代理中是否有密钥，
+    # 否则代理持有密钥时后面的账号密码会被当作主密码读走（反之亦然）
+    attach = isinstance(session, AgentSession) and salt is not None and (args.use_agent or sys.stdin.isatty())
+    try:
+        if attach and session.attach(salt):
+            website_data = store.load(lazy=True)
+        elif args.use_agent:
+            raise CliError("解锁代理未运行或没有该数据文件的密钥")
+        else:
+            website_data = store.load(read_secret("主密码: "), lazy=True)
+    except ValueError:
+        raise CliError("密码错误或数据已损坏")
+    return store, Vault(website_data, segments=store)
+
+
+def save(store, vault, changed=(), deleted=()):
+    """保存修改：只追加变化的网站，旧格式或需要重写时整体重写"""
+    if store.needs_rewrite or store.format != 'log':
+        store.rewrite(vault.to_dict(decrypt=False))
+    else:
+        store.write_changes({key: vault.site_record(key, decrypt=False) for key in changed},
+                            changed, deleted)
+    vault.mark_saved()
+    store.wait_for_compaction()
+
+
+def find_site(vault, name):
+    """按网站id或网站名查找网站（id优先），找不到时抛出 CliError"""
+    if name in vault:
+        return name
+    site_id = vault.find_site_by_name(name)
+    if site_id is None:
+        raise CliError(f"找不到网站: {name}")
+    return site_id
+
+
+def find_account(vault, site_id, name):
+    """按账号名查找网站下的账号id，找不到或有多个同名账号时抛出 CliError"""
+    matches = [account_id for account_id, account in vault.accounts(site_id) if account.get('账号') == name]
+    site_name = vault.site(site_id).get('网站名')
+    if not matches:
+        raise CliError(f"网站 {site_name} 下找不到账号: {name}")
+    if len(matches) > 1:
+        raise CliError(f"网站 {site_name} 下有 {len(matches)} 个名为 {name} 的账号，无法确定要操作哪一个")
+    return matches[0]
+
+
+def print_json(data):
+    print(json.dumps(data, ensure_ascii=False, indent=2))
+
+
+# ======================= 命令 =======================
+def cmd_list(args):
+    """列出所有网站（id、网站名、网址、账号数），不解密账号列表"""
+    _, vault = open_vault(args)
+    rows = [{"id": site_id, "网站名": vault.site(site_id).get('网站名', ''),
+             "网址": vault.site(site_id).get('网址', ''), "账号数": vault.account_count(site_id)}
+            for site_id in vault.site_ids()]
+    if args.json:
+        print_json(rows)
+        return
+    for row in rows:
+        print('\t'.join(str(value) for value in row.values()))
+
+
+def cmd_get(args):
+    """指定账号时输出密码，否则列出网站下的账号"""
+    _, vault = open_vault(args)
+    site_id = find_site(vault, args.site)
+    if args.account is not None:
+        account = vault.account(find_account(vault, site_id, args.account))
+        if args.json:
+            print_json(account)
+        else:
+            print(account.get('密码', ''))
+        return
+    if args.json:
+        print_json(vault.site_record(site_id))
+        return
+    for _, account in vault.accounts(site_id):
+        print(f"{account.get('账号', '')}\t{account.get('备注', '')}")
+
+
+def cmd_add(args):
+    """添加账号，网站不存在时新建"""
+    if not args.account.strip():
+        raise CliError("账号和密码不能为空")
+    store, vault = open_vault(args, create=True)
+    password = read_secret("账号密码: ")
+    if not password.strip():
+        raise CliError("账号和密码不能为空")
+    site_id = vault.find_site_by_name(args.site) if args.site not in vault else args.site
+    if site_id is None:
+        site_id = vault.add_site(args.site, args.url or '')
+    vault.add_account(site_id, {'账号': args.account, '密码': password, '备注': args.note or ''})
+    save(store, vault, changed=[site_id])
+    print(f"已添加账号 {args.account} 到 {vault.site(site_id).get('网站名')}", file=sys.stderr)
+
+
+def cmd_update(args):
+    """修改账号名、密码或备注"""
+    store, vault = open_vault(args)
+    site_id = find_site(vault, args.site)
+    account_id = find_account(vault, site_id, args.account)
+    fields = {}
+    if args.rename is not None:
+        if not args.rename.strip():
+            raise CliError("账号不能为空")
+        fields['账号'] = args.rename
+    if args.note is not None:
+        fields['备注'] = args.note
+    if args.password:
+        fields['密码'] = read_secret("新的账号密码: ")
+        if not fields['密码'].strip():
+            raise CliError("密码不能为空")
+    if not fields:
+        raise CliError("没有要修改的内容（--rename / --note / --password）")
+    vault.update_account(account_id, fields)
+    save(store, vault, changed=[site_id])
+    print("已修改", file=sys.stderr)
+
+
+def cmd_delete(args):
+    """删除账号，或（--site）删除整个网站"""
+    if args.account is None and not args.site_only:
+        raise CliError("删除整个网站需要加 --site")
+    store, vault = open_vault(args)
+    site_id = find_site(vault, args.site)
+    if args.account is None:
+        vault.remove_site(site_id)
+        save(store, vault, deleted=[site_id])
+    else:
+        vault.remove_account(find_account(vault, site_id, args.account))
+        save(store, vault, changed=[site_id])
+    print("已删除", file=sys.stderr)
+
+
+def cmd_search(args):
+    """模糊搜索账号，按相关度输出 网站id、网站名、账号、备注"""
+    _, vault = open_vault(args)
+    results = []
+    for account_id in vault.search(args.query, limit=args.limit):
+        site_id = vault.site_of(account_id)
+        account = vault.account(account_id)
+        results.append({"id": site_id, "网站名": vault.site(site_id).get('网站名', ''),
+                        "账号": account.get('账号', ''), "备注": account.get('备注', '')})
+    if args.json:
+        print_json(results)
+        return
+    for row in results:
+        print('\t'.join(row.values()))
+
+
+def cmd_import(args):
+    """从浏览器或其他密码管理器的导出文件批量导入，只保存一次"""
+    import vault_import
+    store, vault = open_vault(args, create=True)
+    try:
+        result = vault_import.import_file(vault, args.path, args.update_existing)
+    except OSError as e:
+        raise CliError(f"无法读取文件: {e}")
+    if result.changed_sites:
+        save(store, vault, changed=sorted(result.changed_sites))
+    print(result.summary())
+    for line, reason in result.errors:
+        print(f"第 {line} 行：{reason}", file=sys.stderr)
+
+
+def _prepare_export(store, vault):
+    """导出从追加日志中逐个网站读取，旧格式（或需要升级密钥派生设置）的数据文件先重写"""
+    if store.needs_rewrite or store.format != 'log':
+        save(store, vault)
+
+
+def cmd_export(args):
+    """流式导出为CSV、JSON（明文）或加密备份"""
+    import vault_export
+    fmt = args.format or vault_export.format_from_path(args.path)
+    if fmt != 'archive':
+        print("警告：导出的文件中密码为明文", file=sys.stderr)
+    store, vault = open_vault(args)
+    _prepare_export(store, vault)
+    written = vault_export.export_vault(store, args.path, fmt)
+    print(f"已导出到 {args.path}（{written} 字节）", file=sys.stderr)
+
+
+def cmd_backup(args):
+    """备份到目录，有上次备份时只写入变化的网站"""
+    import vault_export
+    store, vault = open_vault(args)
+    _prepare_export(store, vault)
+    result = vault_export.backup(store, args.dir or os.path.join(get_data_dir(), 'backups'),
+                                 incremental=not args.full)
+    print(result['path'])
+
+
+def cmd_rekey(args):
+    """修改主密码（可同时更换密钥派生算法），用新的密钥重新加密整个数据文件"""
+    store, vault = open_vault(args)
+    # 换用新密钥后无法再读取文件中的旧令牌，先解密全部账号
+    website_data = vault.to_dict()
+    kdf_params = make_kdf_params(args.kdf) if args.kdf else store.session.kdf_params
+    store.session.start(read_new_secret("新的主密码: "), kdf_params)
+    store.rewrite(website_data)
+    store.wait_for_compaction()
+    print("主密码已修改", file=sys.stderr)
+
+
+# ======================= 入口 =======================
+def build_parser():
+    parser = argparse.ArgumentParser(prog='vault_cli', description="账号管理器命令行工具")
+    parser.add_argument('--file', help="数据文件路径（默认与图形界面相同）")
+    agent = parser.add_mutually_exclusive_group()
+    agent.add_argument('--use-agent', action='store_true', help="只使用解锁代理中的密钥，不读取主密码")
+    agent.add_argument('--no-agent', action='store_true', help="不使用解锁代理，总是输入主密码")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('list', help="列出所有网站")
+    p.add_argument('--json', action='store_true', help="以JSON输出")
+    p.set_defaults(func=cmd_list)
+
+    p = commands.add_parser('get', help="输出账号密码或列出网站下的账号")
+    p.add_argument('site', help="网站名或网站id")
+    p.add_argument('account', nargs='?', help="账号（指定时输出密码）")
+    p.add_argument('--json', action='store_true', help="以JSON输出（包含密码）")
+    p.set_defaults(func=cmd_get)
+
+    p = commands.add_parser('add', help="添加账号（密码从终端或标准输入读取）")
+    p.add_argument('site', help="网站名或网站id，不存在时新建网站")
+    p.add_argument('account', help="账号")
+    p.add_argument('--url', help="新建网站时的网址")
+    p.add_argument('--note', help="备注")
+    p.set_defaults(func=cmd_add)
+
+    p = commands.add_parser('update', help="修改账号")
+    p.add_argument('site', help="网站名或网站id")
+    p.add_argument('account', help="账号")
+    p.add_argument('--rename', help="新的账号名")
+    p.add_argument('--note', help="新的备注")
+    p.add_argument('--password', action='store_true', help="输入新的账号密码")
+    p.set_defaults(func=cmd_update)
+
+    p = commands.add_parser('delete', help="删除账号或网站")
+    p.add_argument('site', help="网站名或网站id")
+    p.add_argument('account', nargs='?', help="账号，不指定时需要加 --site")
+    p.add_argument('--site', dest='site_only', action='store_true', help="删除整个网站")
+    p.set_defaults(func=cmd_delete)
+
+    p = commands.add_parser('search', help="模糊搜索账号")
+    p.add_argument('query', help="搜索内容，空格分隔的关键词需要同时匹配")
+    p.add_argument('--limit', type=int, default=DEFAULT_SEARCH_LIMIT, help="最多输出的结果数")
+    p.add_argument('--json', action='store_true', help="以JSON输出")
+    p.set_defaults(func=cmd_search)
+
+    p = commands.add_parser('import', help="从CSV/JSON导出文件批量导入")
+    p.add_argument('path', help="导出文件")
+    p.add_argument('--update-existing', action='store_true', help="已有账号的密码不同时覆盖")
+    p.set_defaults(func=cmd_import)
+
+    p = commands.add_parser('export', help="导出为CSV、JSON或加密备份")
+    p.add_argument('path', help="目标文件（.csv / .json / .ambak）")
+    p.add_argument('--format', choices=('csv', 'json', 'archive'), help="默认按扩展名判断")
+    p.set_defaults(func=cmd_export)
+
+    p = commands.add_parser('backup', help="备份到目录（默认增量）")
+    p.add_argument('dir', nargs='?', help="备份目录，默认为数据目录下的 backups")
+    p.add_argument('--full', action='store_true', help="强制完整备份")
+    p.set_defaults(func=cmd_backup)
+
+    p = commands.add_parser('rekey', help="修改主密码")
+    p.add_argument('--kdf', choices=('pbkdf2-sha256', 'scrypt', 'argon2id'), help="同时更换密钥派生算法")
+    p.set_defaults(func=cmd_rekey)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+    try:
+        args.func(args)
+    except (CliError, ValueError, RuntimeError, OSError) as e:
+        # OSError 包括数据目录无法写入和图形界面同时修改了同一网站（VaultConflictError）
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+加密模块 - 基于密码的加密与解锁会话（不依赖PyQt6）
+"""
+
+import os
+import time
+import base64
+import logging
+from functools import lru_cache
+
+from perf_metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# cryptography 在第一次派生密钥或加解密时才导入，缩短程序启动时间
+
+
+def _fernet(key):
+    """创建Fernet实例"""
+    from cryptography.fernet import Fernet
+    return Fernet(bytes(key))
+
+
+@lru_cache(maxsize=None)
+def _argon2_backend():
+    """
+    Argon2id 为可选依赖：优先使用 cryptography 自带实现，其次使用 argon2-cffi
+    返回 ('cryptography', Argon2id类)、('argon2-cffi', (hash_secret_raw, Type)) 或 None
+    """
+    try:
+        from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+        return 'cryptography', Argon2id
+    except ImportError:
+        pass
+    try:
+        from argon2.low_level import hash_secret_raw, Type as Argon2Type
+        return 'argon2-cffi', (hash_secret_raw, Argon2Type)
+    except ImportError:
+        return None
+
+
+# ======================= 密钥派生算法 =======================
+KDF_PBKDF2 = 'pbkdf2-sha256'
+KDF_SCRYPT = 'scrypt'
+KDF_ARGON2ID = 'argon2id'
+
+# 各算法的默认成本参数（PBKDF2默认值与旧版数据文件一致）
+DEFAULT_KDF_PARAMS = {
+    KDF_PBKDF2: {"iterations": 100000},
+    KDF_SCRYPT: {"n": 2 ** 15, "r": 8, "p": 1},
+    KDF_ARGON2ID: {"time_cost": 3, "memory_cost": 64 * 1024, "parallelism": 1},  # memory_cost 单位KiB
+}
+
+# 自动校准时允许的最低成本，防止在慢速机器上把成本降得过低
+MIN_KDF_PARAMS = {
+    KDF_PBKDF2: {"iterations": 100000},
+    KDF_SCRYPT: {"n": 2 ** 14, "r": 8, "p": 1},
+    KDF_ARGON2ID: {"time_cost": 2, "memory_cost": 19 * 1024, "parallelism": 1},
+}
+
+# 自动校准的目标解锁时间(毫秒)
+DEFAULT_KDF_TARGET_MS = 500
+
+
+def argon2_available() -> bool:
+    """当前环境是否支持Argon2id"""
+    return _argon2_backend() is not None
+
+
+def make_kdf_params(kdf: str = KDF_PBKDF2, **cost) -> dict:
+    """生成密钥派生参数：算法标识 + 成本参数（未指定的使用默认值）"""
+    if kdf not in DEFAULT_KDF_PARAMS:
+        raise ValueError(f"不支持的密钥派生算法: {kdf}")
+    params = {"kdf": kdf}
+    params.update(DEFAULT_KDF_PARAMS[kdf])
+    params.update({k: int(v) for k, v in cost.items() if k in DEFAULT_KDF_PARAMS[kdf]})
+    return params
+
+
+@timed('kdf.derive')
+def derive_raw_key(password: str, salt: bytes, params: dict) -> bytes:
+    """按参数派生32字节原始密钥"""
+    kdf = params.get("kdf", KDF_PBKDF2)
+    secret = password.encode()
+    if kdf == KDF_PBKDF2:
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.backends import default_backend
+        return PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,  # 256位密钥
+            salt=salt,
+            iterations=params["iterations"],
+            backend=default_backend()
+        ).derive(secret)
+    if kdf == KDF_SCRYPT:
+        from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+        return Scrypt(salt=salt, length=32, n=params["n"], r=params["r"], p=params["p"]).derive(secret)
+    if kdf == KDF_ARGON2ID:
+        backend = _argon2_backend()
+        if backend and backend[0] == 'cryptography':
+            return backend[1](
+                salt=salt,
+                length=32,
+                iterations=params["time_cost"],
+                lanes=params["parallelism"],
+                memory_cost=params["memory_cost"]
+            ).derive(secret)
+        if backend and backend[0] == 'argon2-cffi':
+            hash_secret_raw, Argon2Type = backend[1]
+            return hash_secret_raw(
+                secret, salt,
+                time_cost=params["time_cost"],
+                memory_cost=params["memory_cost"],
+                parallelism=params["parallelism"],
+                hash_len=32,
+                type=Argon2Type.ID
+            )
+        raise ValueError("当前环境不支持Argon2id，请安装 argon2-cffi 或升级 cryptography")
+    raise ValueError(f"不支持的密钥派生算法: {kdf}")
+
+
+def _time_kdf(params: dict) -> float:
+    start = time.perf_counter()
+    derive_raw_key("calibration", os.urandom(16), params)
+    return time.perf_counter() - start
+
+
+def calibrate_kdf(kdf: str = KDF_PBKDF2, target_ms: int = DEFAULT_KDF_TARGET_MS) -> dict:
+    """
+    自动校准：在当前机器上测量派生耗时，选择使解锁时间接近目标值的成本参数
+
+    参数:
+        kdf: 算法标识
+        target_ms: 目标解锁时间(毫秒)
+    """
+    target = target_ms / 1000.0
+    floor = MIN_KDF_PARAMS[kdf]
+    if kdf == KDF_PBKDF2:
+        probe = 20000
+        elapsed = max(_time_kdf(make_kdf_params(kdf, iterations=probe)), 1e-6)
+        iterations = int(probe * target / elapsed) // 1000 * 1000
+        return make_kdf_params(kdf, iterations=max(floor["iterations"], iterations))
+    if kdf == KDF_SCRYPT:
+        # n 必须是2的幂；内存占用为 128*n*r 字节，上限 n=2^20（约1GiB）
+        n = floor["n"]
+        elapsed = _time_kdf(make_kdf_params(kdf, n=n))
+        while n < 2 ** 20 and elapsed * 2 <= target:
+            n *= 2
+            elapsed *= 2
+        return make_kdf_params(kdf, n=n)
+    if kdf == KDF_ARGON2ID:
+        memory_cost = DEFAULT_KDF_PARAMS[kdf]["memory_cost"]
+        elapsed = max(_time_kdf(make_kdf_params(kdf, time_cost=1, memory_cost=memory_cost)), 1e-6)
+        time_cost = min(max(floor["time_cost"], round(target / elapsed)), 32)
+        return make_kdf_params(kdf, time_cost=time_cost, memory_cost=memory_cost)
+    raise ValueError(f"不支持的密钥派生算法: {kdf}")
+
+
+_calibrated = {}
+
+
+def preferred_kdf_params():
+    """
+    读取首选的密钥派生设置（环境变量 ACCOUNT_MANAGER_KDF）
+
+    取值为算法标识，例如 argon2id；加上 ":auto" 后缀时自动校准成本，
+    目标时间由 ACCOUNT_MANAGER_KDF_TARGET_MS 指定。未设置或设置无效时返回None（沿用数据文件的设置）
+    """
+    setting = os.environ.get('ACCOUNT_MANAGER_KDF', '').strip()
+    if not setting:
+        return None
+    kdf, _, mode = setting.partition(':')
+    if kdf not in DEFAULT_KDF_PARAMS or mode not in ('', 'auto'):
+        logger.warning("忽略无效的 ACCOUNT_MANAGER_KDF 设置: %r（可选算法: %s，可加 :auto 后缀）",
+                       setting, ', '.join(DEFAULT_KDF_PARAMS))
+        return None
+    if kdf == KDF_ARGON2ID and not argon2_available():
+        logger.warning("未安装 Argon2id 实现，忽略 ACCOUNT_MANAGER_KDF 设置")
+        return None
+    if mode != 'auto':
+        return make_kdf_params(kdf)
+    try:
+        target_ms = int(os.environ.get('ACCOUNT_MANAGER_KDF_TARGET_MS', DEFAULT_KDF_TARGET_MS))
+    except ValueError:
+        logger.warning("忽略无效的 ACCOUNT_MANAGER_KDF_TARGET_MS 设置，使用默认值 %s 毫秒", DEFAULT_KDF_TARGET_MS)
+        target_ms = DEFAULT_KDF_TARGET_MS
+    if (kdf, target_ms) not in _calibrated:
+        _calibrated[(kdf, target_ms)] = calibrate_kdf(kdf, target_ms)
+    return _calibrated[(kdf, target_ms)]
+
+
+def kdf_needs_upgrade(current: dict, preferred: dict) -> bool:
+    """
+    判断是否需要按首选参数重新派生密钥
+
+    算法不同，或任一成本参数与首选值相差超过一倍时返回True；
+    小幅差异（如校准误差）不触发，避免每次启动都重新加密
+    """
+    if not preferred:
+        return False
+    if current.get("kdf") != preferred.get("kdf"):
+        return True
+    for name, value in preferred.items():
+        if name == "kdf":
+            continue
+        ratio = current.get(name, 0) / value
+        if ratio < 0.5 or ratio > 2:
+            return True
+    return False
+
+
+# ======================= 密码派生加密类 =======================
+class PasswordBasedEncryption:
+    """基于密码的加密系统 - 无需密钥文件"""
+
+    def __init__(self, kdf_params: dict = None):
+        """
+        参数:
+            kdf_params: 密钥派生参数（见 make_kdf_params），默认 PBKDF2-SHA256 100000次迭代
+        """
+        self.salt_size = 16  # 盐的长度
+        self.kdf_params = dict(kdf_params or make_kdf_params(KDF_PBKDF2))
+        self.iterations = self.kdf_params.get("iterations", 100000)  # 迭代次数，提高安全性
+
+    def _derive_key_from_password(self, password: str, salt: bytes = None) -> tuple:
+        """
+        从密码派生密钥
+
+        参数:
+            password: 用户密码
+            salt: 盐值，如果不提供则生成新的
+
+        返回:
+            (key, salt) 密钥和盐值
+        """
+        if salt is None:
+            salt = os.urandom(self.salt_size)
+
+        key = base64.urlsafe_b64encode(derive_raw_key(password, salt, self.kdf_params))
+        return key, salt
+
+    def encrypt_with_key(self, data: str, key: bytes, salt: bytes) -> bytes:
+        """使用已派生的密钥加密数据（不再执行密钥派生）"""
+        f = _fernet(key)
+        encrypted = f.encrypt(data.encode('utf-8'))
+
+        # 将盐和加密数据一起存储
+        return salt + encrypted
+
+    def decrypt_with_key(self, encrypted_data: bytes, key: bytes) -> str:
+        """使用已派生的密钥解密数据（不再执行密钥派生）"""
+        if len(encrypted_data) < self.salt_size:
+            raise ValueError("无效的数据格式")
+
+        f = _fernet(key)
+        try:
+            decrypted = f.decrypt(encrypted_data[self.salt_size:])
+            return decrypted.decode('utf-8')
+        except Exception as e:
+            raise ValueError("密码错误或数据已损坏") from e
+
+    @timed('encrypt_data')
+    def encrypt_data(self, data: str, password: str) -> bytes:
+        """加密数据"""
+        key, salt = self._derive_key_from_password(password)
+        return self.encrypt_with_key(data, key, salt)
+
+    @timed('decrypt_data')
+    def decrypt_data(self, encrypted_data: bytes, password: str) -> str:
+        """解密数据"""
+        if len(encrypted_data) < self.salt_size:
+            raise ValueError("无效的数据格式")
+
+        # 提取盐（前16字节）
+        salt = encrypted_data[:self.salt_size]
+
+        # 重新派生密钥
+        key, _ = self._derive_key_from_password(password, salt)
+        return self.decrypt_with_key(encrypted_data, key)
+
+
+# ======================= 解锁会话 =======================
+class UnlockSession:
+    """
+    解锁会话 - 解锁成功后在内存中保存派生密钥
+
+    后续的保存直接复用该密钥，只需一次AES加密，
+    不再重复弹出密码框，也不再重复执行PBKDF2。
+    会话空闲超时或程序锁定时清除密钥。
+    """
+
+    def __init__(self, timeout=15 * 60, cipher=None):
+        """
+        参数:
+            timeout: 空闲超时时间(秒)，None 表示不超时
+            cipher: PasswordBasedEncryption 实例
+        """
+        self.timeout = timeout
+        self.cipher = cipher or PasswordBasedEncryption()
+        self._key = None  # bytearray，锁定时清零（只是其中一份副本，见 lock()）
+        self._fernet = None  # 本次解锁的Fernet实例，加解密记录时复用，锁定时丢弃
+        self._salt = None
+        self._last_used = 0.0
+
+    def _touch(self):
+        self._last_used = time.monotonic()
+
+    def _set_key(self, key: bytes, salt: bytes):
+        self.lock()
+        self._key = bytearray(key)
+        self._fernet = _fernet(key)
+        self._salt = bytes(salt)
+        self._touch()
+
+    def unlock(self, encrypted_data: bytes, password: str) -> str:
+        """
+        使用密码解锁已有数据
+
+        返回解密后的明文；密码错误时抛出 ValueError，会话保持锁定状态
+        """
+        # 旧格式（盐 + Fernet令牌）固定使用 PBKDF2-SHA256 100000次迭代
+        cipher = PasswordBasedEncryption()
+        salt = encrypted_data[:cipher.salt_size]
+        key, _ = cipher._derive_key_from_password(password, salt)
+        decrypted = cipher.decrypt_with_key(encrypted_data, key)
+        self.cipher = cipher
+        self._set_key(key, salt)
+        return decrypted
+
+    def unlock_with_token(self, password: str, salt: bytes, token: bytes, kdf_params: dict = None) -> str:
+        """
+        使用密码和盐派生密钥，并用一个已知的加密记录校验密码
+
+        参数:
+            kdf_params: 数据文件头中记录的密钥派生参数，默认沿用当前设置
+        返回该记录的明文；密码错误时抛出 ValueError，会话保持锁定状态
+        """
+        cipher = PasswordBasedEncryption(kdf_params) if kdf_params else self.cipher
+        key, _ = cipher._derive_key_from_password(password, salt)
+        try:
+            decrypted = _fernet(key).decrypt(token).decode('utf-8')
+        except Exception as e:
+            raise ValueError("密码错误或数据已损坏") from e
+        self.cipher = cipher
+        self._set_key(key, salt)
+        return decrypted
+
+    def start(self, password: str, kdf_params: dict = None):
+        """
+        为新数据文件开启会话（生成新的盐）
+
+        参数:
+            kdf_params: 新的密钥派生参数；用于新建数据文件或升级密钥派生设置
+        """
+        if kdf_params:
+            self.cipher = PasswordBasedEncryption(kdf_params)
+        key, salt = self.cipher._derive_key_from_password(password)
+        self._set_key(key, salt)
+
+    def is_unlocked(self) -> bool:
+        """会话是否处于解锁状态（超时会自动锁定）"""
+        if self._key is None:
+            return False
+        if self.timeout is not None and time.monotonic() - self._last_used > self.timeout:
+            self.lock()
+            return False
+        return True
+
+    def expire_if_idle(self):
+        """检查空闲超时，超时则清除密钥（供定时器调用）"""
+        return self.is_unlocked()
+
+    @property
+    def salt(self):
+        """当前会话使用的盐（锁定时为None）"""
+        return self._salt
+
+    @property
+    def kdf_params(self):
+        """当前会话使用的密钥派生参数"""
+        return dict(self.cipher.kdf_params)
+
+    def encrypt_token(self, data: str) -> bytes:
+        """使用会话密钥加密单条记录，返回Fernet令牌（不含盐）"""
+        if not self.is_unlocked():
+            raise RuntimeError("会话已锁定")
+        self._touch()
+        return self._fernet.encrypt(data.encode('utf-8'))
+
+    def decrypt_token(self, token: bytes) -> str:
+        """使用会话密钥解密单条记录"""
+        if not self.is_unlocked():
+            raise RuntimeError("会话已锁定")
+        self._touch()
+        try:
+            return self._fernet.decrypt(token).decode('utf-8')
+        except Exception as e:
+            raise ValueError("密码错误或数据已损坏") from e
+
+    @timed('session.encrypt_data')
+    def encrypt_data(self, data: str) -> bytes:
+        """使用会话密钥加密数据"""
+        if not self.is_unlocked():
+            raise RuntimeError("会话已锁定")
+        self._touch()
+        return self.cipher.encrypt_with_key(data, self._key, self._salt)
+
+    @timed('session.decrypt_data')
+    def decrypt_data(self, encrypted_data: bytes) -> str:
+        """使用会话密钥解密数据（数据必须使用同一个盐）"""
+        if not self.is_unlocked():
+            raise RuntimeError("会话已锁定")
+        if encrypted_data[:self.cipher.salt_size] != self._salt:
+            raise ValueError("数据不属于当前会话")
+        self._touch()
+        return self.cipher.decrypt_with_key(encrypted_data, self._key)
+
+    def lock(self):
+        """
+        锁定会话：丢弃密钥和Fernet实例，之后的加解密都会失败
+        会话自己的 bytearray 副本会被清零，但派生结果（bytes）和 Fernet 内部的密钥副本
+        在Python中无法擦除，只能等待垃圾回收，不保证立即从进程内存中消失
+        """
+        if self._key is not None:
+            for i in range(len(self._key)):
+                self._key[i] = 0
+        self._key = None
+        self._fernet = None
+        self._salt = None
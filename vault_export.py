@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+导出与备份 - 把数据流式写出为CSV、JSON或加密备份（不依赖PyQt6）
+
+所有导出都从存储中已保存的记录逐个网站解密、逐块写出（生成器），内存中同一时间只有
+一个网站（加密备份为一个数据块）的明文，导出大型数据文件时内存占用不随总量增长。
+CSV和JSON为明文，可用 vault_import 重新导入；加密备份使用数据文件的密码和密钥派生设置。
+
+加密备份文件结构（每行一条，均为ASCII）:
+    AMBACKUP 1 {"kdf": ..., "salt": "..."}   文件头：密钥派生参数和盐（与数据文件相同）
+    H <令牌>    备份信息：备份id、类型（full/incremental）、基于的上一个备份id、创建时间
+    C <令牌>    数据块：{"n": 序号, "prev": 上一行的SHA-256, "records": [{"op": "put"/"del", ...}]}
+    E <令牌>    结尾：数据块数、记录数和最后一行的SHA-256
+每个令牌都是带HMAC的Fernet令牌（每块单独认证），且包含上一行的摘要，
+数据块被替换、调换顺序、删除或文件被截断都会在校验时发现。
+
+增量备份只写入上次备份之后变化的网站（比较每个网站记录行的摘要，无需解密未变化的网站）
+和被删除的网站；恢复时先应用完整备份，再按顺序应用之后的增量备份。
+"""
+
+import io
+import os
+import csv
+import json
+import uuid
+import base64
+import hashlib
+import logging
+from datetime import datetime
+
+from vault_crypto import UnlockSession
+
+logger = logging.getLogger(__name__)
+
+BACKUP_MAGIC = b'AMBACKUP'
+BACKUP_FORMAT_VERSION = 1
+BACKUP_SUFFIX = '.ambak'
+# 备份目录中记录上次备份状态的文件
+BACKUP_STATE_NAME = 'backup_state.json'
+# 每个加密数据块包含的网站数
+CHUNK_SITES = 64
+
+EXPORT_FORMATS = ('csv', 'json', 'archive')
+CSV_COLUMNS = ('网站名', '网址', '账号', '密码', '备注')
+
+
+def format_from_path(path):
+    """按扩展名判断导出格式（.csv / .json / 其他为加密备份）"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return 'csv'
+    if ext == '.json':
+        return 'json'
+    return 'archive'
+
+
+def _line_digest(line: bytes) -> str:
+    return hashlib.sha256(line).hexdigest()
+
+
+def _dump(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+# ======================= 明文格式 =======================
+def iter_csv(sites):
+    """
+    逐个网站生成CSV文本（表头 网站名,网址,账号,密码,备注）
+    参数:
+    sites: iterable - (网站键值, 网站数据) ，网站数据含 "列表"
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for _, site in sites:
+        for account in site.get('列表', []):
+            writer.writerow((site.get('网站名', ''), site.get('网址', ''), account.get('账号', ''),
+                             account.get('密码', ''), account.get('备注', '')))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_json(sites):
+    """逐个网站生成JSON文本，整体为 {"记录网站": {...}}（与数据文件中的结构一致）"""
+    yield '{"记录网站": {'
+    separator = '\n'
+    for key, site in sites:
+        yield f'{separator}{json.dumps(key, ensure_ascii=False)}: {json.dumps(site, ensure_ascii=False)}'
+        separator = ',\n'
+    yield '\n}}\n'
+
+
+# ======================= 加密备份 =======================
+def iter_archive(session, records, kind='full', base=None, backup_id=None):
+    """
+    生成加密备份文件的各行（bytes，不含换行）
+    参数:
+    session: UnlockSession - 已解锁的会话（使用其密钥、盐和密钥派生参数）
+    records: iterable - {"op": "put", "key": ..., "site": {...}} 或 {"op": "del", "key": ...}
+    kind: str - 'full' 或 'incremental'
+    base: str - 增量备份基于的上一个备份id
+    backup_id: str - 本备份的id，默认随机生成
+    """
+    header = session.kdf_params
+    header['salt'] = base64.b64encode(session.salt).decode('ascii')
+    info = {"id": backup_id or uuid.uuid4().hex, "type": kind, "base": base,
+            "format": BACKUP_FORMAT_VERSION, "created": datetime.now().isoformat()}
+    line = BACKUP_MAGIC + b' %d ' % BACKUP_FORMAT_VERSION + json.dumps(header).encode('ascii')
+    yield line
+    line = b'H ' + session.encrypt_token(_dump(info))
+    yield line
+
+    count = 0
+    total = 0
+    chunk = []
+
+    def seal(prefix, payload):
+        return prefix + session.encrypt_token(_dump(payload))
+
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= CHUNK_SITES:
+            line = seal(b'C ', {"n": count, "prev": _line_digest(line), "records": chunk})
+            yield line
+            count += 1
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        line = seal(b'C ', {"n": count, "prev": _line_digest(line), "records": chunk})
+        yield line
+        count += 1
+        total += len(chunk)
+    yield seal(b'E ', {"chunks": count, "records": total, "prev": _line_digest(line)})
+
+
+def _read_header(f):
+    """读取文件头和备份信息行，返回 (密钥派生参数, 盐, 备份信息行)"""
+    parts = f.readline().rstrip(b'\n').split(b' ', 2)
+    if len(parts) != 3 or parts[0] != BACKUP_MAGIC:
+        raise ValueError("不是有效的备份文件")
+    if int(parts[1]) > BACKUP_FORMAT_VERSION:
+        raise ValueError("备份文件版本过新，请升级程序")
+    header = json.loads(parts[2])
+    salt = base64.b64decode(header.pop('salt'))
+    line = f.readline().rstrip(b'\n')
+    if not line.startswith(b'H '):
+        raise ValueError("不是有效的备份文件")
+    return header, salt, line
+
+
+def open_session(path, password=None, session=None):
+    """
+    返回能解密该备份的会话
+    session 已解锁且盐与备份相同时直接使用（不再派生密钥），否则用密码派生；密码错误时抛出 ValueError
+    """
+    with open(path, 'rb') as f:
+        header, salt, line = _read_header(f)
+    if session is not None and session.is_unlocked() and session.salt == salt:
+        return session
+    if password is None:
+        raise ValueError("备份使用了不同的密钥，需要输入密码")
+    session = UnlockSession(timeout=None)
+    session.unlock_with_token(password, salt, line[2:], header)
+    return session
+
+
+def archive_info(path, session):
+    """备份信息（id、类型、基于的备份id、创建时间），session 由 open_session() 取得"""
+    with open(path, 'rb') as f:
+        _, _, line = _read_header(f)
+    return json.loads(session.decrypt_token(line[2:]))
+
+
+def iter_records(path, session):
+    """
+    逐块解密并校验备份，产出其中的记录；数据块被篡改、调换、删除或文件被截断时抛出 ValueError
+    session 由 open_session() 取得
+    """
+    with open(path, 'rb') as f:
+        _, _, line = _read_header(f)
+        count = 0
+        total = 0
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                raise ValueError("备份文件不完整")
+            prev, line = _line_digest(line), raw.rstrip(b'\n')
+            payload = json.loads(session.decrypt_token(line[2:]))
+            if payload.get('prev') != prev:
+                raise ValueError(f"备份数据块 {count} 校验失败（顺序错误或被替换）")
+            if line.startswith(b'E '):
+                if payload.get('chunks') != count or payload.get('records') != total:
+                    raise ValueError("备份数据块数量不一致")
+                if f.read(1):
+                    raise ValueError("备份文件结尾之后还有数据")
+                return
+            if not line.startswith(b'C ') or payload.get('n') != count:
+                raise ValueError(f"备份数据块 {count} 校验失败")
+            yield from payload['records']
+            count += 1
+            total += len(payload['records'])
+    raise ValueError("备份文件不完整（缺少结尾）")
+
+
+def verify_archive(path, password=None, session=None):
+    """
+    完整校验备份文件（解密并检查所有数据块）
+    返回:
+    dict - 备份信息，另含 "records" 记录数
+    """
+    session = open_session(path, password, session)
+    info = archive_info(path, session)
+    info['records'] = sum(1 for _ in iter_records(path, session))
+    return info
+
+
+def restore(paths, password=None, session=None):
+    """
+    按顺序应用一个完整备份及其后的增量备份，返回网站数据字典
+    应用任何记录之前先检查所有备份的密钥派生参数和盐是否一致、增量备份是否依次衔接，
+    备份链跨越了修改密码时直接报错，不会应用到一半才失败
+    参数:
+    paths: list - 备份文件路径，第一个必须是完整备份，之后的增量备份需依次衔接
+    """
+    if not paths:
+        raise ValueError("没有要恢复的备份")
+    headers = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            header, salt, _ = _read_header(f)
+        headers.append((header, salt))
+    for path, item in zip(paths[1:], headers[1:]):
+        if item != headers[0]:
+            raise ValueError(f"备份链中的密钥设置不一致（期间修改过密码），请从之后的完整备份恢复: {path}")
+
+    session = open_session(paths[0], password, session)
+    previous = None
+    for path in paths:
+        info = archive_info(path, session)
+        if previous is None and info.get('type') != 'full':
+            raise ValueError(f"第一个备份必须是完整备份: {path}")
+        if previous is not None and info.get('base') != previous:
+            raise ValueError(f"增量备份与上一个备份不衔接: {path}")
+        previous = info.get('id')
+
+    website_data = {}
+    for path in paths:
+        for record in iter_records(path, session):
+            if record['op'] == 'put':
+                website_data[record['key']] = record['site']
+            else:
+                website_data.pop(record['key'], None)
+    return website_data
+
+
+# ======================= 写出 =======================
+def write_stream(path, chunks, private=False):
+    """
+    把生成器产生的文本/字节块写入临时文件，全部写完并fsync后再rename为目标文件
+    参数:
+    private: bool - 仅当前用户可读写（明文导出和备份）
+    返回:
+    int - 写入的字节数
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0),
+                 0o600 if private else 0o666)
+    written = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                f.write(chunk)
+                written += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return written
+
+
+def _archive_lines(lines):
+    for line in lines:
+        yield line + b'\n'
+
+
+def export_vault(store, path, fmt=None):
+    """
+    把已保存的数据导出到文件
+    参数:
+    store: VaultStore - 已解锁的存储
+    path: str - 目标文件
+    fmt: str - 'csv'、'json' 或 'archive'，默认按扩展名判断
+    返回:
+    int - 写入的字节数
+    """
+    fmt = fmt or format_from_path(path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    sites = store.iter_sites()
+    if fmt == 'csv':
+        chunks = iter_csv(sites)
+    elif fmt == 'json':
+        chunks = iter_json(sites)
+    else:
+        records = ({"op": "put", "key": key, "site": site} for key, site in sites)
+        chunks = _archive_lines(iter_archive(store.session, records))
+    written = write_stream(path, chunks, private=True)
+    logger.info("已导出 %s 格式到 %s（%s 字节）", fmt, path, written)
+    return written
+
+
+# ======================= 备份 =======================
+def _load_state(backup_dir):
+    try:
+        with open(os.path.join(backup_dir, BACKUP_STATE_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def backup(store, backup_dir, incremental=True):
+    """
+    备份到目录：有上次备份的记录时只写入变化和删除的网站，否则写完整备份
+    参数:
+    store: VaultStore - 已解锁的存储
+    backup_dir: str - 备份目录
+    incremental: bool - 为False时强制完整备份
+    返回:
+    dict - {"path": 备份文件, "type": 类型, "records": 写入的记录数}
+    """
+    digests = store.record_digests()
+    state = _load_state(backup_dir)
+    salt = base64.b64encode(store.session.salt).decode('ascii')
+    # 修改过密码（盐不同）后重新写完整备份，增量备份链不跨越不同的密钥
+    if (incremental and state and state.get('vault') == os.path.abspath(store.path)
+            and state.get('salt') == salt
+            and os.path.exists(os.path.join(backup_dir, state.get('last', '')))):
+        previous = state.get('digests', {})
+        changed = {key for key, digest in digests.items() if previous.get(key) != digest}
+        deleted = [key for key in previous if key not in digests]
+        kind, base = 'incremental', state.get('id')
+    else:
+        changed, deleted = set(digests), []
+        kind, base = 'full', None
+
+    counter = {"records": 0}
+
+    def records():
+        for key in deleted:
+            counter['records'] += 1
+            yield {"op": "del", "key": key}
+        for key, site in store.iter_sites(changed):
+            counter['records'] += 1
+            yield {"op": "put", "key": key, "site": site}
+
+    backup_id = uuid.uuid4().hex
+    name = f"backup-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{backup_id[:8]}-{kind}{BACKUP_SUFFIX}"
+    path = os.path.join(backup_dir, name)
+    write_stream(path, _archive_lines(iter_archive(store.session, records(), kind, base, backup_id)), private=True)
+
+    # 备份写入成功后才更新状态，失败时下次仍从上一个备份开始
+    state = {"vault": os.path.abspath(store.path), "id": backup_id, "last": name,
+             "salt": salt, "digests": digests}
+    write_stream(os.path.join(backup_dir, BACKUP_STATE_NAME), [json.dumps(state)], private=True)
+    logger.info("%s备份完成: %s（%s 条记录）", '增量' if kind == 'incremental' else '完整', path, counter['records'])
+    return {"path": path, "type": kind, "records": counter['records']}
+
+
+def backup_chain(backup_dir, password=None, session=None):
+    """
+    找出恢复最新状态所需的备份文件：最近的完整备份及其后衔接的增量备份
+    返回:
+    list - 按应用顺序排列的备份文件路径
+    """
+    state = _load_state(backup_dir)
+    # 修改密码之前的备份使用旧的盐，不属于当前的备份链，跳过
+    salt = base64.b64decode(state['salt']) if state and state.get('salt') else None
+    infos = {}
+    for name in sorted(os.listdir(backup_dir)):
+        if name.endswith(BACKUP_SUFFIX):
+            path = os.path.join(backup_dir, name)
+            if salt is not None:
+                with open(path, 'rb') as f:
+                    if _read_header(f)[1] != salt:
+                        continue
+            session = open_session(path, password, session)
+            info = archive_info(path, session)
+            infos[info['id']] = (path, info)
+    current = state.get('id') if state else None
+    chain = []
+    while current in infos:
+        path, info = infos[current]
+        chain.append(path)
+        if info.get('type') == 'full':
+            return list(reversed(chain))
+        current = info.get('base')
+    raise ValueError("找不到完整的备份链")
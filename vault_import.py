@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+批量导入 - 读取浏览器/密码管理器导出的CSV或JSON文件并合并到数据模型（不依赖PyQt6）
+
+支持的格式（按表头或JSON结构自动识别）:
+    - Chrome / Edge 导出的CSV（name,url,username,password,note）
+    - Firefox 导出的CSV（url,username,password,httpRealm,...）
+    - Bitwarden 导出的CSV和未加密的JSON
+    - KeePassXC 导出的CSV（Title,Username,Password,URL,Notes）和 KeePass 2 的CSV（Account,Login Name,...）
+    - 表头为 网站名,网址,账号,密码,备注 的CSV，以及本程序的 {"记录网站": {...}} JSON
+
+CSV按行流式读取，每 IMPORT_BATCH_SIZE 行校验并合并一批；已有账号通过索引去重，
+所有修改都只发生在内存中的数据模型，由调用方在导入完成后统一保存一次。
+"""
+
+import os
+import csv
+import json
+import logging
+from itertools import islice
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# 每批校验和合并的记录数
+IMPORT_BATCH_SIZE = 500
+# 错误信息最多保留的条数
+MAX_REPORTED_ERRORS = 100
+
+# 一条待导入的账号（line 为文件中的行号或记录序号，用于错误提示）
+ImportEntry = namedtuple('ImportEntry', 'site_name url account password note line')
+
+
+class ImportFormatError(ValueError):
+    """无法识别或不支持的导入文件"""
+
+
+# ======================= 格式识别 =======================
+# (格式名, 必需的列, 列映射)；表头比较时忽略大小写和首尾空白，按顺序匹配第一个
+_CSV_FORMATS = (
+    ('bitwarden', {'login_uri', 'login_username', 'login_password'},
+     {'name': 'name', 'url': 'login_uri', 'account': 'login_username', 'password': 'login_password', 'note': 'notes'}),
+    ('keepass', {'account', 'login name', 'password', 'web site'},
+     {'name': 'account', 'url': 'web site', 'account': 'login name', 'password': 'password', 'note': 'comments'}),
+    ('keepassxc', {'title', 'username', 'password', 'url'},
+     {'name': 'title', 'url': 'url', 'account': 'username', 'password': 'password', 'note': 'notes'}),
+    ('chrome', {'name', 'url', 'username', 'password'},
+     {'name': 'name', 'url': 'url', 'account': 'username', 'password': 'password', 'note': 'note'}),
+    ('firefox', {'url', 'username', 'password'},
+     {'url': 'url', 'account': 'username', 'password': 'password'}),
+    ('account_manager', {'账号', '密码'},
+     {'name': '网站名', 'url': '网址', 'account': '账号', 'password': '密码', 'note': '备注'}),
+)
+
+
+def detect_csv_format(columns):
+    """
+    根据表头识别CSV格式
+    参数:
+    columns: list - 表头列名
+    返回:
+    (str, dict) - (格式名, 字段 -> 规范化列名)
+    """
+    names = {str(column).strip().lower() for column in columns if column}
+    for name, required, mapping in _CSV_FORMATS:
+        if required <= names:
+            return name, mapping
+    raise ImportFormatError(f"无法识别的CSV表头: {', '.join(map(str, columns))}")
+
+
+def site_name_from_url(url):
+    """从网址中取出主机名作为网站名（去掉 www. 前缀），无法解析时返回空字符串"""
+    url = (url or '').strip()
+    if not url:
+        return ''
+    host = urlsplit(url if '://' in url else f'http://{url}').hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def _entry(mapping, row, line):
+    def get(field):
+        column = mapping.get(field)
+        value = row.get(column) if column else None
+        return '' if value is None else str(value)
+    return ImportEntry(get('name').strip(), get('url').strip(), get('account').strip(),
+                       get('password'), get('note').strip(), line)
+
+
+# ======================= 读取 =======================
+def iter_csv(f):
+    """逐行读取CSV导出文件，产出 ImportEntry"""
+    reader = csv.reader(f)
+    try:
+        header = next(reader, None)
+        if header is None:
+            return
+        fmt, mapping = detect_csv_format(header)
+        logger.info("导入格式: %s", fmt)
+        columns = [str(column).strip().lower() for column in header]
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            values = dict(zip(columns, row))
+            # Bitwarden 导出中还有安全笔记、银行卡等非登录项
+            if fmt == 'bitwarden' and values.get('type', 'login') not in ('', 'login'):
+                continue
+            yield _entry(mapping, values, reader.line_num)
+    except csv.Error as e:
+        raise ImportFormatError(f"CSV格式错误（第 {reader.line_num} 行）: {e}") from e
+
+
+def _expect(value, kind, line, what):
+    """JSON导出中某一层的类型不符合预期时抛出 ImportFormatError，否则原样返回"""
+    if not isinstance(value, kind):
+        raise ImportFormatError(f"JSON格式错误（第 {line} 条记录）: {what}")
+    return value
+
+
+def iter_json(data):
+    """读取已解析的JSON导出内容，产出 ImportEntry；结构不符合预期时抛出 ImportFormatError"""
+    if isinstance(data, dict) and '记录网站' in data:
+        line = 0
+        for site in _expect(data['记录网站'], dict, 1, "记录网站 不是对象").values():
+            _expect(site, dict, line + 1, "网站不是对象")
+            for account in _expect(site.get('列表', []), list, line + 1, "列表 不是数组"):
+                line += 1
+                _expect(account, dict, line, "账号不是对象")
+                yield ImportEntry(str(site.get('网站名', '')).strip(), str(site.get('网址', '')).strip(),
+                                  str(account.get('账号', '')).strip(), str(account.get('密码', '')),
+                                  str(account.get('备注', '')).strip(), line)
+        return
+    if isinstance(data, dict) and 'items' in data:
+        if data.get('encrypted'):
+            raise ImportFormatError("不支持加密的Bitwarden导出，请导出为未加密的JSON")
+        for line, item in enumerate(_expect(data['items'], list, 1, "items 不是数组"), 1):
+            _expect(item, dict, line, "条目不是对象")
+            # type 1 为登录项
+            if item.get('type') != 1:
+                continue
+            login = _expect(item.get('login') or {}, dict, line, "login 不是对象")
+            uris = _expect(login.get('uris') or [{}], list, line, "uris 不是数组")
+            _expect(uris[0], dict, line, "uri 不是对象")
+            yield ImportEntry(str(item.get('name') or '').strip(), str(uris[0].get('uri') or '').strip(),
+                              str(login.get('username') or '').strip(), str(login.get('password') or ''),
+                              str(item.get('notes') or '').strip(), line)
+        return
+    if isinstance(data, list):
+        mapping = None
+        for line, row in enumerate(data, 1):
+            if not isinstance(row, dict):
+                continue
+            row = {str(k).strip().lower(): v for k, v in row.items()}
+            if mapping is None:
+                _, mapping = detect_csv_format(row.keys())
+            yield _entry(mapping, row, line)
+        return
+    raise ImportFormatError("无法识别的JSON导出格式")
+
+
+def iter_import_file(path):
+    """按扩展名（.json 或 CSV）读取导出文件，产出 ImportEntry"""
+    if os.path.splitext(path)[1].lower() == '.json':
+        # JSON导出是一个整体，只能一次性解析
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ImportFormatError(f"JSON格式错误: {e}") from e
+        yield from iter_json(data)
+        return
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        yield from iter_csv(f)
+
+
+# ======================= 合并 =======================
+class ImportResult:
+    """导入结果统计"""
+    def __init__(self):
+        self.added = 0          # 新增的账号数
+        self.updated = 0        # 更新了密码/备注的已有账号数
+        self.duplicates = 0     # 与已有账号完全相同而跳过的记录数
+        self.conflicts = 0      # 账号已存在但密码不同、未更新的记录数
+        self.invalid = 0        # 校验失败的记录数
+        self.errors = []        # [(行号, 原因), ...]，最多 MAX_REPORTED_ERRORS 条
+        self.new_sites = []     # 新建的网站id
+        self.changed_sites = set()  # 新增或修改了账号的网站id
+
+    def reject(self, entry, reason):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((entry.line, reason))
+
+    def summary(self):
+        """一行文字的统计摘要"""
+        text = f"新增 {self.added} 个账号，新建 {len(self.new_sites)} 个网站"
+        if self.updated:
+            text += f"，更新 {self.updated} 个"
+        if self.duplicates:
+            text += f"，跳过重复 {self.duplicates} 个"
+        if self.conflicts:
+            text += f"，{self.conflicts} 个账号已存在但密码不同（未修改）"
+        if self.invalid:
+            text += f"，{self.invalid} 条无效"
+        return text
+
+
+def validate_batch(entries, result):
+    """
+    校验一批记录，返回有效的记录（与手动添加的规则一致：账号和密码不能为空）
+    没有网站名时用网址的主机名代替
+    """
+    valid = []
+    for entry in entries:
+        if not entry.account or not entry.password:
+            result.reject(entry, "账号和密码不能为空")
+            continue
+        if not entry.site_name:
+            name = site_name_from_url(entry.url)
+            if not name:
+                result.reject(entry, "缺少网站名和网址")
+                continue
+            entry = entry._replace(site_name=name)
+        valid.append(entry)
+    return valid
+
+
+class _MergeIndex:
+    """
+    导入去重用的索引：网站按主机名（没有网址时按网站名）定位，账号按账号名定位
+    网站的账号只在第一次有记录导入到该网站时读取（按需解密的数据模型中不会解密无关的网站）
+    """
+    def __init__(self, vault):
+        self.vault = vault
+        self._sites = {}     # 网站键 -> 网站id
+        self._accounts = {}  # 网站id -> {账号: 账号id}
+        # 撤销记录：导入中途出错时恢复数据模型
+        self.added = []      # 新建的网站id（str）和新增的账号id（int），按发生顺序
+        self.updated = []    # (账号id, 修改前的账号信息, 修改前不存在的字段)
+        for site_id in vault.site_ids():
+            self._sites.setdefault(self._site_key(vault.site(site_id)), site_id)
+
+    @staticmethod
+    def _site_key(site):
+        host = site_name_from_url(site.get('网址', ''))
+        if host:
+            return 'host:' + host.lower()
+        return 'name:' + str(site.get('网站名', '')).strip().lower()
+
+    def site_for(self, entry, result):
+        """记录所属的网站id，不存在时新建网站"""
+        key = self._site_key({'网址': entry.url, '网站名': entry.site_name})
+        site_id = self._sites.get(key)
+        if site_id is None and not entry.url:
+            site_id = self.vault.find_site_by_name(entry.site_name)
+        if site_id is None or site_id not in self.vault:
+            site_id = self.vault.add_site(entry.site_name, entry.url)
+            self.added.append(site_id)
+            result.new_sites.append(site_id)
+            self._accounts[site_id] = {}
+        self._sites[key] = site_id
+        return site_id
+
+    def accounts_of(self, site_id):
+        accounts = self._accounts.get(site_id)
+        if accounts is None:
+            accounts = self._accounts[site_id] = {
+                account.get('账号'): account_id for account_id, account in self.vault.accounts(site_id)}
+        return accounts
+
+    def rollback(self, result):
+        """撤销本次导入对数据模型的所有修改"""
+        for account_id, before, absent in reversed(self.updated):
+            self.vault.update_account(account_id, before, removed=absent)
+        for item in reversed(self.added):
+            if isinstance(item, int):
+                self.vault.remove_account(item)
+            elif item in self.vault:
+                self.vault.remove_site(item)
+        result.changed_sites.clear()
+        result.new_sites.clear()
+
+
+def import_entries(vault, entries, update_existing=False, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    把导入记录合并到数据模型（不保存；调用方用 result.changed_sites 统一保存一次）
+    参数:
+    vault: Vault - 数据模型
+    entries: iterable - ImportEntry（可以是生成器，按批读取）
+    update_existing: bool - 同一网站下账号已存在但密码或备注不同时是否覆盖
+    batch_size: int - 每批校验和合并的记录数
+    progress: callable - 每批完成后调用 progress(已处理记录数)
+    返回:
+    ImportResult - 导入结果统计
+    读取或合并中途出错时撤销已合并的记录，数据模型保持导入前的状态，然后重新抛出异常
+    """
+    result = ImportResult()
+    index = _MergeIndex(vault)
+    try:
+        _merge(vault, iter(entries), index, result, update_existing, batch_size, progress)
+    except BaseException:
+        index.rollback(result)
+        raise
+    return result
+
+
+def _merge(vault, entries, index, result, update_existing, batch_size, progress):
+    processed = 0
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            break
+        for entry in validate_batch(batch, result):
+            site_id = index.site_for(entry, result)
+            accounts = index.accounts_of(site_id)
+            account_id = accounts.get(entry.account)
+            if account_id is None:
+                record = {'账号': entry.account, '密码': entry.password}
+                if entry.note:
+                    record['备注'] = entry.note
+                accounts[entry.account] = vault.add_account(site_id, record)
+                index.added.append(accounts[entry.account])
+                result.added += 1
+                result.changed_sites.add(site_id)
+                continue
+            existing = vault.account(account_id)
+            if existing.get('密码') == entry.password and (not entry.note or existing.get('备注') == entry.note):
+                result.duplicates += 1
+            elif update_existing:
+                fields = {'密码': entry.password}
+                if entry.note:
+                    fields['备注'] = entry.note
+                index.updated.append((account_id, {field: existing[field] for field in fields if field in existing},
+                                      [field for field in fields if field not in existing]))
+                vault.update_account(account_id, fields)
+                result.updated += 1
+                result.changed_sites.add(site_id)
+            else:
+                result.conflicts += 1
+        processed += len(batch)
+        if progress:
+            progress(processed)
+
+
+def import_file(vault, path, update_existing=False, progress=None):
+    """读取导出文件并合并到数据模型，参数和返回值同 import_entries()"""
+    return import_entries(vault, iter_import_file(path), update_existing, progress=progress)
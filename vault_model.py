@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+数据模型 - 带哈希索引的网站/账号数据（不依赖PyQt6）
+"""
+
+import heapq
+from itertools import islice
+from collections import OrderedDict
+
+from vault_search import SearchIndex, split_terms
+
+# 参与搜索的字段及权重
+ACCOUNT_SEARCH_FIELDS = (('账号', 1.0), ('备注', 0.6))
+SITE_SEARCH_FIELDS = (('网站名', 0.9), ('网址', 0.7))
+# 只有网站名/网址匹配时，网站下账号的得分折扣
+SITE_MATCH_FACTOR = 0.8
+# 界面空闲时每批建立索引的账号数
+SEARCH_INDEX_BATCH = 1000
+# 默认返回的搜索结果数
+SEARCH_LIMIT = 200
+# 单次搜索最多计分的候选账号数（匹配极多时只在部分结果中排序）
+MAX_SEARCH_CANDIDATES = 1000
+# 匹配但未单独计分的记录的得分
+UNRANKED_SCORE = 1.0
+# 按需解密时同时保留明文账号列表的网站数（最近使用的优先保留）
+SEGMENT_CACHE_SIZE = 8
+
+
+class Vault:
+    """
+    网站与账号数据模型
+
+    按网站id、网站名、账号id建立哈希索引，查找和修改都直接定位到对应记录，
+    不再遍历所有网站；两个网站存在同名账号时也不会误改。
+    网站id沿用数据文件中的键值（"1"、"2"...），账号id只在内存中使用。
+
+    指定 segments（提供 load_segment/segment_count 的存储）时，不含 "列表" 的网站
+    在第一次访问账号时才解密；最近使用的 cache_size 个网站保留明文，
+    更早的网站丢弃明文，再次访问时重新解密。账号有修改的网站在 mark_saved() 之前不会丢弃，
+    调用方还可以用 can_evict(网站id) 阻止丢弃（例如正在显示的网站）。
+    丢弃后账号id保持不变，搜索索引中只保留账号和备注，不含密码。
+    """
+
+    def __init__(self, website_data=None, segments=None, cache_size=SEGMENT_CACHE_SIZE):
+        self._sites = {}          # 网站id -> 网站信息（不含列表）
+        self._accounts = {}       # 网站id -> {账号id: 账号信息}，尚未解密时为None
+        self._account_site = {}   # 账号id -> 网站id
+        self._site_by_name = {}   # 网站名 -> {网站id}
+        self._next_site_id = 1
+        self._next_account_id = 1
+        # 按需解密
+        self._segments = segments
+        self.cache_size = cache_size
+        self.can_evict = None
+        self._recent = OrderedDict()  # 已解密的网站id（最近使用的在最后）
+        self._segment_ids = {}        # 已丢弃明文的网站id -> 账号id列表（重新解密时沿用）
+        self._modified = set()        # 账号有修改、尚未保存的网站id
+        # 搜索索引，第一次搜索时建立，之后随增删改增量更新
+        self._account_index = None
+        self._site_index = None
+        self._index_backlog = []  # 分批建立索引时尚未索引的网站id（str）和账号id（int）
+        if website_data:
+            for site_id, info in website_data.items():
+                self._insert_site(str(site_id), info)
+
+    # ---------- 内部工具 ----------
+    def _insert_site(self, site_id, info):
+        meta = {k: v for k, v in info.items() if k != '列表'}
+        self._sites[site_id] = meta
+        lazy = self._segments is not None and '列表' not in info
+        self._accounts[site_id] = None if lazy else {}
+        self._site_by_name.setdefault(meta.get('网站名'), set()).add(site_id)
+        self._index_site(site_id)
+        if site_id.isdigit():
+            self._next_site_id = max(self._next_site_id, int(site_id) + 1)
+        if lazy and self._account_index is not None:
+            self._index_backlog.append(site_id)
+        for account in info.get('列表', []):
+            self._insert_account(site_id, dict(account))
+
+    def _insert_account(self, site_id, account):
+        account_id = self._next_account_id
+        self._next_account_id += 1
+        self._accounts[site_id][account_id] = account
+        self._account_site[account_id] = site_id
+        self._index_account(account_id)
+        return account_id
+
+    def _unindex_name(self, site_id):
+        name = self._sites[site_id].get('网站名')
+        ids = self._site_by_name.get(name)
+        if ids:
+            ids.discard(site_id)
+            if not ids:
+                del self._site_by_name[name]
+
+    def _index_site(self, site_id):
+        if self._site_index is not None:
+            meta = self._sites[site_id]
+            self._site_index.add(site_id, [meta.get(field, '') for field, _ in SITE_SEARCH_FIELDS])
+
+    def _index_account(self, account_id):
+        if self._account_index is not None:
+            account = self.account(account_id)
+            self._account_index.add(account_id, [account.get(field, '') for field, _ in ACCOUNT_SEARCH_FIELDS])
+
+    def _unindex(self, site_id=None, account_ids=()):
+        if self._account_index is None:
+            return
+        if site_id is not None:
+            self._site_index.remove(site_id)
+        for account_id in account_ids:
+            self._account_index.remove(account_id)
+
+    def _account_ids(self, site_id):
+        """网站下已分配的账号id（不解密；从未解密过的网站返回空列表）"""
+        accounts = self._accounts[site_id]
+        if accounts is not None:
+            return list(accounts)
+        return self._segment_ids.get(site_id, [])
+
+    def _forget_site_accounts(self, site_id):
+        """移除网站下所有账号的id和索引（删除或整体替换网站时）"""
+        account_ids = self._account_ids(site_id)
+        self._unindex(site_id, account_ids)
+        for account_id in account_ids:
+            del self._account_site[account_id]
+        self._recent.pop(site_id, None)
+        self._segment_ids.pop(site_id, None)
+        self._modified.discard(site_id)
+
+    # ---------- 按需解密 ----------
+    def _site_accounts(self, site_id):
+        """网站的账号字典，尚未解密时解密并放入最近使用缓存"""
+        accounts = self._accounts[site_id]
+        if accounts is None:
+            accounts = self._decrypt_site(site_id)
+            self._recent[site_id] = None
+            self._evict_segments()
+        elif site_id in self._recent:
+            self._recent.move_to_end(site_id)
+        return accounts
+
+    def _decrypt_site(self, site_id):
+        """解密网站的账号列表；之前丢弃过明文时沿用原来的账号id"""
+        records = self._segments.load_segment(site_id)
+        accounts = self._accounts[site_id] = {}
+        account_ids = self._segment_ids.pop(site_id, None)
+        if account_ids is not None and len(account_ids) != len(records):
+            # 数据文件被外部修改过，重新分配账号id
+            self._unindex(account_ids=account_ids)
+            for account_id in account_ids:
+                del self._account_site[account_id]
+            account_ids = None
+        if account_ids is None:
+            for account in records:
+                self._insert_account(site_id, dict(account))
+        else:
+            for account_id, account in zip(account_ids, records):
+                accounts[account_id] = dict(account)
+        return accounts
+
+    def _drop_site(self, site_id):
+        """丢弃网站账号列表的明文，保留账号id"""
+        self._segment_ids[site_id] = list(self._accounts[site_id])
+        self._accounts[site_id] = None
+        self._recent.pop(site_id, None)
+
+    def _evict_segments(self):
+        """缓存超出大小时丢弃最久未使用的网站明文（刚解密的、有未保存修改的和不允许丢弃的网站除外）"""
+        excess = len(self._recent) - self.cache_size
+        for site_id in list(self._recent)[:-1]:
+            if excess <= 0:
+                break
+            if site_id in self._modified:
+                continue
+            if self.can_evict is None or self.can_evict(site_id):
+                self._drop_site(site_id)
+                excess -= 1
+
+    def is_decrypted(self, site_id):
+        """网站的账号列表是否已在内存中（访问账号时不需要解密）"""
+        return self._accounts[site_id] is not None
+
+    def has_encrypted_sites(self):
+        """是否还有账号列表未解密的网站"""
+        return any(accounts is None for accounts in self._accounts.values())
+
+    def mark_saved(self, site_ids=None):
+        """网站的修改已交给存储写入，之后允许丢弃其明文（site_ids 为None时表示所有网站）"""
+        if site_ids is None:
+            self._modified.clear()
+        else:
+            self._modified.difference_update(site_ids)
+
+    # ---------- 查询 ----------
+    def __contains__(self, site_id):
+        return site_id in self._sites
+
+    def __len__(self):
+        return len(self._sites)
+
+    def site_ids(self):
+        """按显示顺序返回所有网站id"""
+        return list(self._sites)
+
+    def site(self, site_id):
+        """网站信息（网站名、网址等，不含账号列表）"""
+        return self._sites[site_id]
+
+    def find_site_by_name(self, name):
+        """按网站名查找网站id（同名时返回最早添加的），找不到返回None"""
+        ids = self._site_by_name.get(name)
+        if not ids:
+            return None
+        return min(ids, key=lambda k: (not k.isdigit(), int(k) if k.isdigit() else 0, k))
+
+    def accounts(self, site_id):
+        """网站下的账号列表，返回 [(账号id, 账号信息), ...]"""
+        return list(self._site_accounts(site_id).items())
+
+    def account_count(self, site_id):
+        accounts = self._accounts[site_id]
+        if accounts is None:
+            return self._segments.segment_count(site_id)
+        return len(accounts)
+
+    def account(self, account_id):
+        """按账号id获取账号信息，找不到返回None"""
+        site_id = self._account_site.get(account_id)
+        if site_id is None:
+            return None
+        return self._site_accounts(site_id)[account_id]
+
+    def site_of(self, account_id):
+        """账号所属的网站id"""
+        return self._account_site.get(account_id)
+
+    def site_record(self, site_id, decrypt=True):
+        """
+        可直接序列化的网站数据（与数据文件中的格式一致）
+        decrypt 为False时不解密：账号列表不在内存中的网站不含 "列表"（保存时沿用文件中的账号数据）
+        """
+        record = dict(self._sites[site_id])
+        if decrypt or self._accounts[site_id] is not None:
+            record['列表'] = list(self._site_accounts(site_id).values())
+        return record
+
+    def to_dict(self, decrypt=True):
+        """完整的网站数据字典（与数据文件中 "记录网站" 的格式一致），decrypt 同 site_record()"""
+        return {site_id: self.site_record(site_id, decrypt) for site_id in self._sites}
+
+    # ---------- 修改 ----------
+    def new_site_id(self):
+        """分配新的网站id（单调递增，删除后不会复用）"""
+        site_id = str(self._next_site_id)
+        self._next_site_id += 1
+        return site_id
+
+    def add_site(self, name, url='', site_id=None):
+        """添加网站，返回网站id"""
+        if site_id is None:
+            site_id = self.new_site_id()
+        if site_id in self._sites:
+            raise KeyError(f"网站已存在: {site_id}")
+        self._insert_site(site_id, {'网站名': name, '网址': url, '列表': []})
+        return site_id
+
+    def put_site_record(self, site_id, record):
+        """
+        添加网站，或用数据文件格式的记录整体替换已有网站（替换时保持显示顺序）
+        记录不含 "列表" 时账号列表按需解密
+        """
+        if site_id in self._sites:
+            self._unindex_name(site_id)
+            self._forget_site_accounts(site_id)
+        self._insert_site(site_id, record)
+
+    def update_site(self, site_id, **fields):
+        """修改网站信息（网站名、网址）"""
+        self._unindex_name(site_id)
+        self._sites[site_id].update(fields)
+        self._site_by_name.setdefault(self._sites[site_id].get('网站名'), set()).add(site_id)
+        self._index_site(site_id)
+
+    def remove_site(self, site_id):
+        """删除网站及其所有账号"""
+        self._unindex_name(site_id)
+        self._forget_site_accounts(site_id)
+        del self._accounts[site_id]
+        del self._sites[site_id]
+
+    def add_account(self, site_id, account):
+        """向网站添加账号，返回账号id"""
+        self._site_accounts(site_id)
+        self._modified.add(site_id)
+        return self._insert_account(site_id, dict(account))
+
+    def update_account(self, account_id, fields, removed=()):
+        """修改账号信息（removed 中的字段被删除），返回所属网站id"""
+        site_id = self._account_site[account_id]
+        account = self._site_accounts(site_id)[account_id]
+        account.update(fields)
+        for field in removed:
+            account.pop(field, None)
+        self._modified.add(site_id)
+        self._index_account(account_id)
+        return site_id
+
+    def remove_account(self, account_id):
+        """删除账号，返回所属网站id"""
+        site_id = self._account_site[account_id]
+        accounts = self._site_accounts(site_id)
+        self._unindex(account_ids=(account_id,))
+        del self._account_site[account_id]
+        del accounts[account_id]
+        self._modified.add(site_id)
+        return site_id
+
+    # ---------- 搜索 ----------
+    def index_search_step(self, batch_size=SEARCH_INDEX_BATCH):
+        """
+        分批建立搜索索引（界面空闲时调用），返回是否还有未索引的账号
+        索引对象在第一批时创建，之后的增删改会直接更新索引，不会遗漏；
+        账号列表不在内存中的网站临时解密一次建立索引，之后立即丢弃明文（不占用最近使用缓存）
+        """
+        if self._account_index is None:
+            self._site_index = SearchIndex(weight for _, weight in SITE_SEARCH_FIELDS)
+            self._account_index = SearchIndex(weight for _, weight in ACCOUNT_SEARCH_FIELDS)
+            for site_id in self._sites:
+                self._index_site(site_id)
+            self._index_backlog = list(reversed(self._sites))
+        backlog = self._index_backlog
+        done = 0
+        while backlog and done < batch_size:
+            item = backlog.pop()
+            if isinstance(item, int):
+                if item in self._account_site and item not in self._account_index:
+                    self._index_account(item)
+                done += 1
+            elif item not in self._sites:
+                continue
+            elif self._accounts[item] is None:
+                accounts = self._decrypt_site(item)
+                for account_id in accounts:
+                    if account_id not in self._account_index:
+                        self._index_account(account_id)
+                self._drop_site(item)
+                done += len(accounts)
+            else:
+                backlog.extend(self._accounts[item])
+        return bool(backlog)
+
+    def build_search_index(self):
+        """建立搜索索引的剩余部分（搜索时自动调用）"""
+        while self.index_search_step(len(self._account_site) + len(self._sites) + 1):
+            pass
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """
+        在所有网站中模糊搜索账号（匹配网站名、网址、账号、备注）
+        参数:
+        query: str - 搜索内容，空格分隔的多个关键词需要同时匹配
+        limit: int - 最多返回的结果数
+        返回:
+        list - 按相关度排序的账号id
+        """
+        terms = split_terms(query)
+        if not terms:
+            return []
+        if self._account_index is None or self._index_backlog:
+            self.build_search_index()
+        per_term = [self._account_index.match(term) + self._site_index.match(term) for term in terms]
+        # 从匹配最少的关键词开始枚举候选，其余关键词只用于过滤和计分
+        if len(per_term) > 1:
+            per_term.sort(key=lambda r: len(r[1]) + sum(self.account_count(site_id) for site_id in r[3]))
+
+        def score_of(account_id, site_id):
+            total = 0.0
+            for account_scores, accounts_matched, site_scores, sites_matched in per_term:
+                score = account_scores.get(account_id)
+                if score is None:
+                    score = UNRANKED_SCORE if account_id in accounts_matched else 0.0
+                if site_id in sites_matched:
+                    score = max(score, site_scores.get(site_id, UNRANKED_SCORE) * SITE_MATCH_FACTOR)
+                if not score:
+                    return 0.0
+                total += score
+            return total
+
+        def candidates():
+            account_scores, accounts_matched, site_scores, sites_matched = per_term[0]
+            yield from account_scores
+            # 只有计算了得分的网站需要排序（最多 RANK_LIMIT 个），其余网站按原顺序排在后面
+            ranked_sites = [site_id for site_id in sites_matched if site_id in site_scores]
+            ranked_sites.sort(key=site_scores.get, reverse=True)
+            for site_id in ranked_sites:
+                yield from self._account_ids(site_id)
+            for site_id in sites_matched:
+                if site_id not in site_scores:
+                    yield from self._account_ids(site_id)
+            yield from accounts_matched
+
+        scored = {}
+        for account_id in islice(candidates(), MAX_SEARCH_CANDIDATES):
+            if account_id not in scored:
+                score = score_of(account_id, self._account_site[account_id])
+                if score:
+                    scored[account_id] = score
+        ranked = heapq.nlargest(limit, scored.items(), key=lambda item: (item[1], -item[0]))
+        return [account_id for account_id, _ in ranked]
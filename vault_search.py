@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+搜索索引 - 三元组/前缀索引和模糊匹配排序（不依赖PyQt6）
+
+每条记录由若干字段组成，字段文本按单词切分后建立:
+    - 三元组索引：单词中所有连续3个字符，用于3个字符及以上的查询（可匹配单词中间，并容忍少量错字）
+    - 前缀索引：单词的前1~2个字符，用于1~2个字符的短查询（中文按单字和相邻两字索引）
+查询时先取最稀有的几个三元组对应的记录作为候选，只对候选计算得分，
+不会逐条扫描所有记录；记录的增删改只更新该记录自身的索引项。
+最近查询过的关键词的匹配结果会缓存（逐字输入第二个关键词时不必重新计算第一个），记录变化时清空。
+"""
+
+import re
+import math
+import unicodedata
+from itertools import islice
+
+# 单词分隔符（\w 包含中文等字符）
+_WORD_SPLIT_RE = re.compile(r'[^\w]+')
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7f]')
+
+# 模糊匹配时至少需要命中的三元组比例
+MIN_GRAM_RATIO = 0.6
+# 模糊匹配最多检查的候选数（关键词过于常见时只做精确匹配）
+FUZZY_CANDIDATE_LIMIT = 5000
+# 每个关键词最多计算得分的记录数
+RANK_LIMIT = 400
+# 缓存匹配结果的关键词数
+MATCH_CACHE_SIZE = 64
+
+_EMPTY = frozenset()
+
+
+def normalize(text):
+    """统一全角/半角、大小写，便于匹配"""
+    return unicodedata.normalize('NFKC', str(text or '')).lower().strip()
+
+
+def split_terms(query):
+    """把查询拆分为多个关键词（以空白分隔，所有关键词都需要匹配）"""
+    return [term for term in normalize(query).split() if term]
+
+
+def _words(text):
+    return [word for word in _WORD_SPLIT_RE.split(text) if word]
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _doc_grams(fields):
+    """
+    记录的所有索引项：单词内的三元组，以及以空格开头的前缀项（" a"、" ab"）
+    中文等不以空格分词的文字，每个位置都视为单词开头
+    """
+    grams = set()
+    for text in fields:
+        for word in _words(text):
+            starts = range(len(word)) if _NON_ASCII_RE.search(word) else (0,)
+            for i in starts:
+                grams.add(' ' + word[i:i + 1])
+                if i + 2 <= len(word):
+                    grams.add(' ' + word[i:i + 2])
+            grams |= _trigrams(word)
+    return grams
+
+
+class SearchIndex:
+    """
+    多字段模糊搜索索引
+    参数:
+    weights: tuple - 各字段的权重，字段顺序与 add() 传入的一致
+    """
+    def __init__(self, weights):
+        self.weights = tuple(weights)
+        self._docs = {}      # 记录id -> 规范化后的字段文本
+        self._postings = {}  # 索引项 -> {记录id}
+        self._matches = {}   # 关键词 -> match() 的结果
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._docs
+
+    # ---------- 维护 ----------
+    def add(self, doc_id, fields):
+        """添加或更新一条记录"""
+        if doc_id in self._docs:
+            self.remove(doc_id)
+        if self._matches:
+            self._matches.clear()
+        fields = tuple(normalize(text) for text in fields)
+        self._docs[doc_id] = fields
+        postings = self._postings
+        for gram in _doc_grams(fields):
+            ids = postings.get(gram)
+            if ids is None:
+                postings[gram] = {doc_id}
+            else:
+                ids.add(doc_id)
+
+    def remove(self, doc_id):
+        """删除一条记录（不存在时忽略）"""
+        fields = self._docs.pop(doc_id, None)
+        if fields is None:
+            return
+        if self._matches:
+            self._matches.clear()
+        for gram in _doc_grams(fields):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self._postings[gram]
+
+    # ---------- 查询 ----------
+    def _field_score(self, fields, term):
+        """字段匹配得分：字段或单词以关键词开头 > 包含关键词"""
+        best = 0.0
+        for weight, text in zip(self.weights, fields):
+            pos = text.find(term)
+            if pos < 0:
+                continue
+            if pos == 0:
+                score = weight * 2.0
+            elif not text[pos - 1].isalnum():
+                score = weight * 1.5
+            else:
+                score = weight
+            if score > best:
+                best = score
+        return best
+
+    def match(self, term):
+        """
+        单个关键词的匹配结果
+        参数:
+        term: str - 已规范化的关键词
+        返回:
+        (dict, set) - (得分, 所有匹配的记录id)
+            完全包含关键词的记录得分在1以上，只模糊命中的记录得分低于1；
+            匹配的记录很多时只为其中 RANK_LIMIT 条（优先单词开头匹配的）计算得分，
+            其余记录只出现在集合中；结果会被缓存，调用方不能修改
+        """
+        result = self._matches.get(term)
+        if result is None:
+            if len(self._matches) >= MATCH_CACHE_SIZE:
+                self._matches.clear()
+            result = self._matches[term] = self._match(term)
+        return result
+
+    def _match(self, term):
+        words = _words(term)
+        if not words:
+            return {}, set()
+        grams = set()
+        for word in words:
+            grams |= _trigrams(word)
+        if grams:
+            lists = sorted((self._postings.get(gram, _EMPTY) for gram in grams), key=len)
+            exact = lists[0].intersection(*lists[1:]) if len(lists) > 1 else lists[0]
+            fuzzy = self._fuzzy_scores(lists, exact) if len(exact) < RANK_LIMIT else {}
+        else:
+            # 1~2个字符的关键词：匹配单词开头（中文等文字可匹配任意位置）
+            exact = self._postings.get(' ' + max(words, key=len), _EMPTY)
+            fuzzy = {}
+
+        docs = self._docs
+        scores = {doc_id: 1.0 + self._field_score(docs[doc_id], term)
+                  for doc_id in self._rank_sample(exact, words[0])}
+        scores.update(fuzzy)
+        matched = exact | fuzzy.keys() if fuzzy else exact
+        return scores, matched
+
+    def _rank_sample(self, exact, word):
+        """匹配的记录过多时，只取 RANK_LIMIT 条计算得分（单词以关键词开头的优先）"""
+        if len(exact) <= RANK_LIMIT:
+            return exact
+        prefix = self._postings.get(' ' + word[:2], _EMPTY)
+        sample = set(islice((doc_id for doc_id in exact if doc_id in prefix), RANK_LIMIT))
+        for doc_id in exact:
+            if len(sample) >= RANK_LIMIT:
+                break
+            sample.add(doc_id)
+        return sample
+
+    def _fuzzy_scores(self, lists, exact):
+        """只命中部分三元组的记录，得分为命中比例（低于1）"""
+        need = max(1, math.ceil(len(lists) * MIN_GRAM_RATIO))
+        if need >= len(lists):
+            return {}
+        # 至少命中need个三元组的记录，必然出现在最稀有的 len-need+1 个列表之一中
+        candidates = set()
+        for ids in lists[:len(lists) - need + 1]:
+            candidates |= ids
+        candidates -= exact
+        if len(candidates) > FUZZY_CANDIDATE_LIMIT:
+            return {}
+        scores = {}
+        for doc_id in candidates:
+            hits = sum(1 for ids in lists if doc_id in ids)
+            if hits >= need:
+                scores[doc_id] = hits / len(lists)
+        return scores
@@ -0,0 +1,817 @@
+#!/usr/bin/env python3
+"""
+存储模块 - 数据文件读写相关工具（不依赖PyQt6）
+"""
+
+import os
+import sys
+import json
+import base64
+import hashlib
+import logging
+import threading
+import contextlib
+from collections import deque
+from datetime import datetime
+
+from vault_crypto import kdf_needs_upgrade
+from perf_metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# 日志格式的文件标识和版本
+VAULT_MAGIC = b'AMVAULT'
+VAULT_FORMAT_VERSION = 2
+
+# 被覆盖的记录数超过该值（且超过有效记录数）时触发后台压缩
+COMPACT_MIN_GARBAGE = 64
+
+
+# 数据目录（可用环境变量指定，例如基准测试时使用临时目录）
+DATA_DIR_ENV = 'ACCOUNT_MANAGER_DATA_DIR'
+
+
+def get_data_dir():
+    """获取数据文件所在目录（适配PyInstaller打包环境）"""
+    if os.environ.get(DATA_DIR_ENV):
+        return os.environ[DATA_DIR_ENV]
+    if hasattr(sys, '_MEIPASS'):
+        # 当程序被PyInstaller打包后
+        return os.path.dirname(sys.executable)
+    # 开发模式
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def get_data_file_path():
+    """获取数据文件路径"""
+    return os.path.join(get_data_dir(), 'data.json')
+
+
+def file_hash(path):
+    """计算文件内容的SHA-256哈希对象（可继续追加更新）"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            h.update(chunk)
+    return h
+
+
+def file_digest(path):
+    """计算文件内容的SHA-256摘要"""
+    return file_hash(path).hexdigest()
+
+
+class VaultConflictError(OSError):
+    """
+    数据文件已被其他程序（另一个窗口或命令行）修改，且无法与本次写入合并，需要重新加载
+    keys 为双方都修改过的网站键值，为空表示文件被整体重写
+    """
+
+    def __init__(self, message, keys=()):
+        super().__init__(message)
+        self.keys = list(keys)
+
+
+# ---------- 进程间文件锁 ----------
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock_file(f):
+        # LK_LOCK 等待约10秒仍未获得锁时抛出 OSError
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def atomic_write(path, data: bytes):
+    """原子写入：先写临时文件并fsync，再rename覆盖目标文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    # 同步目录项，确保rename本身落盘（Windows不支持打开目录）
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class DataFileMonitor:
+    """
+    数据文件变更检测
+
+    在本程序读取或写入数据文件后记录其指纹（修改时间、大小、内容摘要），
+    之后可判断文件是否在磁盘上被外部修改过，从而避免无谓的重新加载。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._stat = None
+        self._hash = None
+
+    def _read_stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def remember(self, appended: bytes = None, digest=None, stat=None):
+        """
+        记录当前文件指纹（在本程序读写文件之后调用）
+        参数:
+            appended: 本次追加写入的字节，提供时增量更新摘要而不重新读取整个文件
+            digest: 读取文件时已计算好的完整内容摘要（hashlib对象），提供时不再重新读取
+            stat: 与 digest 对应的 (修改时间, 大小)，读取时记下，避免把读取之后的修改当作已读取
+        """
+        previous_stat = self._stat
+        self._stat = stat if stat is not None else self._read_stat()
+        if self._stat is None:
+            self._hash = None
+        elif digest is not None:
+            self._hash = digest
+        elif (appended is not None and self._hash is not None and previous_stat
+                and previous_stat[1] + len(appended) == self._stat[1]):
+            self._hash.update(appended)
+        else:
+            self._hash = file_hash(self.path)
+
+    def appended_since(self, data: bytes):
+        """data 以上次记录的文件内容开头时返回之后追加的部分，否则（文件被重写）返回None"""
+        if self._stat is None or self._hash is None or len(data) < self._stat[1]:
+            return None
+        if hashlib.sha256(data[:self._stat[1]]).hexdigest() != self._hash.hexdigest():
+            return None
+        return data[self._stat[1]:]
+
+    def has_changed(self):
+        """文件自上次记录后是否发生了变化"""
+        current = self._read_stat()
+        if current == self._stat:
+            return False
+        if current is None or self._stat is None:
+            return True
+        if current[1] != self._stat[1]:
+            return True
+        # 修改时间变化但大小相同：比较内容摘要，避免仅被touch时重新加载
+        if self._hash is None or file_digest(self.path) != self._hash.hexdigest():
+            return True
+        self._stat = current
+        return False
+
+
+# ======================= 追加日志存储格式 =======================
+#
+# 文件结构（每行一条，均为ASCII）：
+#   AMVAULT 2 {"kdf": "pbkdf2-sha256", "iterations": 100000, "salt": "..."}
+#             自描述的文件头：标识、格式版本、密钥派生算法、成本参数和盐，
+#             例如 {"kdf": "argon2id", "time_cost": 3, "memory_cost": 65536, "parallelism": 1, "salt": "..."}
+#   H <令牌>          加密的文件头，用于校验密码
+#   P <网站键值> <目录令牌> <账号令牌>
+#                     写入/覆盖一个网站：目录令牌只含网站信息（网站名、网址）、账号数和账号令牌的摘要，
+#                     账号令牌是该网站的账号列表（独立加密的分段，按需解密）
+#   D <网站键值> <令牌> 删除一个网站
+# 令牌均为Fernet令牌（自带认证），解密后记录中的操作和键值必须与行首一致，
+# 同一网站的记录序号必须递增（防止旧记录被重放）。
+# 解锁时只解密目录令牌（网站列表），账号令牌在打开网站时才解密，其摘要必须与目录中的一致。
+# 版本1的文件中 P 行只有一个令牌（包含完整的网站数据），仍可读取，下次保存时整体重写为版本2。
+# 追加时只写入变化的网站；被覆盖的记录累积到一定数量后在后台压缩重写。
+# 未以AMVAULT开头的文件按旧格式（16字节盐 + 单个Fernet令牌）读取。
+# 首选的密钥派生设置与文件头不一致（或为旧格式）时，解锁后用新的盐和参数重新派生密钥，
+# 并在下次保存时整体重写文件。
+# 多个程序（两个窗口，或窗口和命令行）可同时打开同一文件：写入和压缩都持有数据文件旁的
+# .lock 文件锁，写入前先合并其他程序追加（或压缩后）的记录，与本次写入的网站重叠时拒绝写入。
+
+def is_log_format(data: bytes) -> bool:
+    """判断文件内容是否为追加日志格式"""
+    return data.startswith(VAULT_MAGIC + b' ')
+
+
+def _site_meta(site: dict) -> dict:
+    """网站信息（不含账号列表）"""
+    return {k: v for k, v in site.items() if k != '列表'}
+
+
+class VaultStore:
+    """
+    加密追加日志存储
+
+    每次修改只追加变化网站的加密记录（fsync保证落盘），
+    新建、迁移和压缩时通过临时文件+rename原子地重写整个文件。
+    兼容读取旧的单块加密格式，旧格式在下次保存时自动升级。
+    """
+
+    def __init__(self, path, session):
+        self.path = path
+        self.session = session
+        self.monitor = DataFileMonitor(path)
+        self.format = None  # 'log' / 'legacy' / None(文件不存在)
+        self.needs_rewrite = True
+        self._lock = threading.RLock()
+        self._header = []  # 文件头两行，压缩时原样写回
+        self._live = {}  # 网站键值 -> 当前有效记录行（按显示顺序）
+        # 网站键值 -> (类型, 数据, 账号数)，用于按需解密账号列表:
+        #   'seg': (账号令牌, 摘要)  'record': 版本1的完整记录行  'plain': 已解密的账号列表
+        # 整体替换而不原地修改
+        self._segments = {}
+        # 正在读取的文件的账号列表信息：加载时逐条填入（后台解密期间主线程即可读取），
+        # 完整读取后才与 _live、_seq 一起替换 _segments
+        self._loading_segments = None
+        self._seq = 0
+        self._key_seq = {}  # 网站键值 -> 文件中该网站最后一条记录的序号（合并时校验递增）
+        self._garbage = 0
+        self._compacting = None
+        self._lock_file = None  # 持有文件锁时为打开的 .lock 文件
+        # 写入前合并进来的其他程序的修改 (操作, 网站键值, 网站信息)，由 take_external_events 取走
+        self._external_events = deque()
+        # 返回首选密钥派生参数的函数（可能需要自动校准，因此延迟到解锁时调用）
+        self.kdf_policy = None
+
+    # ---------- 读取 ----------
+    def _read_file(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    @contextlib.contextmanager
+    def _file_lock(self, optional=False):
+        """
+        进程间的写锁（数据文件旁的 .lock 文件），持有存储锁时使用，同一线程可重入
+        参数:
+            optional: 无法创建锁文件时（如只读目录）不加锁继续，仅用于读取
+        """
+        if self._lock_file is not None:
+            yield
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            f = open(f"{self.path}.lock", 'a+b')
+        except OSError:
+            if not optional:
+                raise
+            yield
+            return
+        try:
+            _lock_file(f)
+            self._lock_file = f
+            try:
+                yield
+            finally:
+                self._lock_file = None
+                _unlock_file(f)
+        finally:
+            f.close()
+
+    def _read_snapshot(self):
+        """读取整个文件，返回 (内容, 读取时的 (修改时间, 大小))"""
+        with open(self.path, 'rb') as f:
+            data = f.read()
+            st = os.fstat(f.fileno())
+        return data, (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _parse_header(first_line: bytes) -> tuple:
+        """解析文件头，返回 (密钥派生参数, 盐)"""
+        parts = first_line.split(b' ', 2)
+        if len(parts) != 3 or parts[0] != VAULT_MAGIC:
+            raise ValueError("无效的数据格式")
+        if int(parts[1]) > VAULT_FORMAT_VERSION:
+            raise ValueError("数据文件版本过新，请升级程序")
+        header = json.loads(parts[2])
+        salt = base64.b64decode(header.pop('salt'))
+        return header, salt
+
+    def file_salt(self):
+        """数据文件使用的盐（无需密码，用于向解锁代理查找密钥），文件不存在或无法识别时返回None"""
+        try:
+            with open(self.path, 'rb') as f:
+                first_line = f.readline(64 * 1024)
+                if not is_log_format(first_line):
+                    # 旧格式：前16字节为盐
+                    f.seek(0)
+                    salt = f.read(16)
+                    return salt if len(salt) == 16 else None
+        except OSError:
+            return None
+        try:
+            return self._parse_header(first_line.rstrip(b'\n'))[1]
+        except (ValueError, KeyError):
+            return None
+
+    def preferred_kdf(self):
+        """首选的密钥派生参数，未设置时返回None"""
+        return self.kdf_policy() if self.kdf_policy else None
+
+    def _maybe_upgrade_kdf(self, password: str):
+        """首选密钥派生设置与当前文件不一致时重新派生密钥，下次保存时整体重写"""
+        preferred = self.preferred_kdf()
+        if kdf_needs_upgrade(self.session.kdf_params, preferred):
+            logger.info("升级密钥派生设置: %s -> %s", self.session.kdf_params, preferred)
+            # 换用新密钥后旧的账号令牌无法再解密，先全部解密留到重写时使用
+            self._segments = {key: ('plain', self.load_segment(key), entry[2])
+                              for key, entry in self._segments.items()}
+            self.session.start(password, preferred)
+            self.needs_rewrite = True
+
+    def unlock(self, password: str):
+        """仅校验密码并解锁会话，不解析网站记录；密码错误时抛出 ValueError"""
+        data = self._read_file()
+        if not is_log_format(data):
+            self.session.unlock(data, password)
+            return
+        lines = data.split(b'\n', 2)
+        if len(lines) < 2 or not lines[1].startswith(b'H '):
+            raise ValueError("无效的数据格式")
+        kdf_params, salt = self._parse_header(lines[0])
+        self.session.unlock_with_token(password, salt, lines[1][2:], kdf_params)
+
+    @timed('vault.load')
+    def load(self, password: str = None, lazy=False) -> dict:
+        """
+        读取数据文件，返回网站数据字典
+
+        参数:
+            password: 用户密码；为None时使用已解锁的会话（用于重新加载）
+            lazy: 为True时网站数据不含 "列表"，账号列表之后用 load_segment() 按需解密
+        """
+        website_data = {}
+        for op, key, site in self.iter_load(password, lazy):
+            if op == 'put':
+                website_data[key] = site
+            else:
+                website_data.pop(key, None)
+        return website_data
+
+    def iter_load(self, password: str = None, lazy=False):
+        """
+        逐条读取并解密数据文件，每解密一个网站记录就产出一次
+
+        产出 (操作, 网站键值, 网站数据)，操作为 'put'（新增或整体替换）或 'del'，
+        按顺序应用即可得到完整数据。持有存储锁一次读入文件（密文），之后在锁外逐条解密，
+        同一时间只有一条记录的明文在解析；存储状态在完整读取后才一次性替换，
+        中途停止迭代时保持原状。密码错误时在产出任何数据前抛出 ValueError
+
+        参数:
+            password: 用户密码；为None时使用已解锁的会话（用于重新加载）
+            lazy: 为True时只解密网站目录，产出的网站数据不含 "列表"
+        """
+        with self._lock, self._file_lock(optional=True):
+            data, stat = self._read_snapshot()
+        segments = {}
+        state = {}
+        self._loading_segments = segments
+        try:
+            if is_log_format(data):
+                events = self._iter_log(data, password, segments, state)
+            else:
+                events = self._iter_legacy(data, password, segments, state)
+            for op, key, site in events:
+                if op == 'put':
+                    if lazy:
+                        site = _site_meta(site)
+                    elif '列表' not in site:
+                        site = dict(site, 列表=self._decrypt_segment(key, segments[key]))
+                yield op, key, site
+            with self._lock:
+                self.format = state['format']
+                self.needs_rewrite = state['needs_rewrite']
+                self._header = state['header']
+                self._live = state['live']
+                self._seq = state['seq']
+                self._key_seq = state['key_seq']
+                self._garbage = state['garbage']
+                self._segments = segments
+                self._external_events.clear()
+                self.monitor.remember(digest=hashlib.sha256(data), stat=stat)
+        finally:
+            if self._loading_segments is segments:
+                self._loading_segments = None
+        if password is not None:
+            self._maybe_upgrade_kdf(password)
+
+    def _iter_legacy(self, data: bytes, password, segments, state):
+        """旧的单块加密格式：整体解密后逐个产出（账号列表同时留作按需读取）"""
+        if password is None:
+            decrypted = self.session.decrypt_data(data)
+        else:
+            decrypted = self.session.unlock(data, password)
+        website_data = json.loads(decrypted).get('记录网站', {})
+        for key, site in website_data.items():
+            accounts = site.get('列表', [])
+            segments[key] = ('plain', accounts, len(accounts))
+            yield 'put', key, site
+        state.update(format='legacy', needs_rewrite=True, header=[], live={}, seq=0, key_seq={}, garbage=0)
+
+    def _iter_log(self, data: bytes, password, segments, state):
+        """按行解密追加日志，读取完毕后把存储状态填入 state"""
+        lines = data.split(b'\n')
+        header_line, token_line = (lines + [b''])[:2]
+        kdf_params, salt = self._parse_header(header_line)
+        version = int(header_line.split(b' ', 2)[1])
+        if not token_line.startswith(b'H '):
+            raise ValueError("无效的数据格式")
+        if password is None:
+            if self.session.salt != salt:
+                raise ValueError("数据不属于当前会话")
+            self.session.decrypt_token(token_line[2:])
+        else:
+            self.session.unlock_with_token(password, salt, token_line[2:], kdf_params)
+
+        live = {}
+        last_seq = {}
+        garbage = 0
+        # 最后一行没有换行符：写入中断留下的残缺记录
+        torn = len(lines) > 2 and lines[-1] != b''
+        for line in lines[2:]:
+            if not line:
+                continue
+            record = self._decode_record(line, last_seq)
+            if record is None:
+                garbage += 1
+                continue
+            key = record['key']
+            last_seq[key] = record['seq']
+            garbage += self._apply_record(record, line, live, segments)
+            if record['op'] == 'put':
+                yield 'put', key, record['site']
+            else:
+                yield 'del', key, None
+
+        # 版本1的文件在下次保存时整体重写为分段格式
+        state.update(format='log', needs_rewrite=torn or version < VAULT_FORMAT_VERSION,
+                     header=[header_line, token_line], live=live,
+                     seq=max(last_seq.values(), default=0), key_seq=last_seq, garbage=garbage)
+
+    @staticmethod
+    def _apply_record(record, line, live, segments) -> int:
+        """把一条已校验的记录应用到有效记录和账号列表信息上，返回因此作废的记录数"""
+        key = record['key']
+        garbage = 1 if key in live else 0
+        if record['op'] == 'put':
+            live[key] = line
+            if 'seg' in record:
+                segments[key] = ('seg', (record.pop('_token'), record['seg']), record.get('count', 0))
+            else:
+                segments[key] = ('record', line, len(record['site'].get('列表', [])))
+        else:
+            live.pop(key, None)
+            segments.pop(key, None)
+            garbage += 1
+        return garbage
+
+    def _decode_record(self, line: bytes, last_seq: dict):
+        """
+        解密并校验一条记录，无效（如写入中断的残缺行）时返回None
+        分段格式的记录只解密目录令牌，账号令牌放在记录的 '_token' 中
+        """
+        try:
+            op, key, token, *segment = line.split(b' ', 3)
+            key = key.decode('utf-8')
+            record = json.loads(self.session.decrypt_token(token))
+            if (record.get('op') != {b'P': 'put', b'D': 'del'}[op]
+                    or record.get('key') != key
+                    or record.get('seq', 0) <= last_seq.get(key, 0)
+                    or ('seg' in record) != bool(segment)):
+                raise ValueError("记录校验失败")
+            if segment:
+                record['_token'] = segment[0]
+            return record
+        except (ValueError, KeyError) as e:
+            logger.warning("忽略无效的数据记录: %s", e)
+            return None
+
+    # ---------- 按需解密账号列表 ----------
+    def _segment_entry(self, key):
+        """网站的账号列表信息（正在加载时优先使用本次读取的内容）"""
+        loading = self._loading_segments
+        if loading is not None and key in loading:
+            return loading[key]
+        return self._segments[key]
+
+    def segment_count(self, key) -> int:
+        """网站的账号数（无需解密账号列表）"""
+        return self._segment_entry(key)[2]
+
+    def load_segment(self, key) -> list:
+        """
+        解密一个网站的账号列表
+        不持有存储锁，后台加载或保存期间主线程也可调用；会话锁定时抛出 RuntimeError，
+        账号令牌与目录不一致或无法解密时抛出 ValueError
+        """
+        return self._decrypt_segment(key, self._segment_entry(key))
+
+    def _decrypt_segment(self, key, entry) -> list:
+        kind, data, _ = entry
+        if kind == 'plain':
+            return [dict(account) for account in data]
+        if kind == 'record':
+            record = self._decode_record(data, {})
+            if record is None:
+                raise ValueError(f"网站 {key} 的数据已损坏")
+            return record['site'].get('列表', [])
+        token, digest = data
+        if hashlib.sha256(token).hexdigest() != digest:
+            raise ValueError(f"网站 {key} 的账号数据校验失败")
+        segment = json.loads(self.session.decrypt_token(token))
+        if segment.get('key') != key:
+            raise ValueError(f"网站 {key} 的账号数据校验失败")
+        return segment['列表']
+
+    # ---------- 导出 ----------
+    def _snapshot(self):
+        """当前有效记录的快照（记录行和账号列表信息），之后的保存不影响快照"""
+        with self._lock:
+            if self.format != 'log':
+                raise RuntimeError("数据文件尚未保存为追加日志格式")
+            return dict(self._live), dict(self._segments)
+
+    def record_digests(self) -> dict:
+        """每个网站当前记录行的摘要（不需要解密），记录被重写或修改后摘要随之改变，用于增量备份"""
+        lines, _ = self._snapshot()
+        return {key: hashlib.sha256(line).hexdigest()[:32] for key, line in lines.items()}
+
+    def iter_sites(self, keys=None):
+        """
+        按显示顺序逐个解密网站（含账号列表），产出 (网站键值, 网站数据)
+        开始时取快照，同一时间只有一个网站的明文；keys 指定时只读取这些网站
+        """
+        lines, segments = self._snapshot()
+        for key, line in lines.items():
+            if keys is not None and key not in keys:
+                continue
+            record = self._decode_record(line, {})
+            if record is None:
+                raise ValueError(f"网站 {key} 的数据已损坏")
+            site = _site_meta(record['site'])
+            site['列表'] = self._decrypt_segment(key, segments[key])
+            yield key, site
+
+    def _segment_token(self, key, accounts):
+        """返回 (账号令牌, 账号数)；accounts 为None表示账号未修改，复用文件中的令牌"""
+        if accounts is None:
+            kind, data, count = self._segments[key]
+            if kind == 'seg':
+                return data[0], count
+            accounts = self.load_segment(key)
+        payload = {"key": key, "列表": accounts}
+        token = self.session.encrypt_token(json.dumps(payload, ensure_ascii=False, separators=(',', ':')))
+        return token, len(accounts)
+
+    # ---------- 合并其他程序的修改 ----------
+    def merge_external_changes(self, keys=()) -> list:
+        """
+        合并其他程序写入的修改，返回尚未取走的 [(操作, 网站键值, 网站信息)]（包括保存时合并的），
+        网站信息不含 "列表"。keys 中的网站也被其他程序修改过时抛出 VaultConflictError
+        """
+        with self._lock, self._file_lock():
+            self._merge_external(keys)
+        return self.take_external_events()
+
+    def take_external_events(self) -> list:
+        """取走写入或压缩时合并的其他程序的修改（不读取文件，也不等待存储锁）"""
+        events = []
+        while self._external_events:
+            events.append(self._external_events.popleft())
+        return events
+
+    def _merge_external(self, keys=()):
+        """文件自上次读写后被其他程序修改时，把新的记录合并进内存状态（持有存储锁和文件锁时调用）"""
+        if self.format is None or not self.monitor.has_changed() or not os.path.exists(self.path):
+            return
+        if self.format != 'log':
+            raise VaultConflictError("数据文件已被其他程序修改，请重新加载后再修改")
+        data, stat = self._read_snapshot()
+        lines = data.split(b'\n')
+        if lines[:2] != self._header or (len(lines) > 2 and lines[-1] != b''):
+            # 被重写（如修改了主密码）或末尾有写入中断的记录
+            raise VaultConflictError("数据文件已被其他程序重写，请重新加载后再修改")
+
+        segments = dict(self._segments)
+        tail = self.monitor.appended_since(data)
+        if tail is not None:
+            # 其他程序只在末尾追加了记录
+            live = dict(self._live)
+            records = tail.split(b'\n')
+            garbage = self._garbage
+        else:
+            # 其他程序压缩过文件：已知的记录行原样保留，只解密新的记录
+            live = {}
+            records = lines[2:]
+            garbage = 0
+        known = set(self._live.values())
+        last_seq = dict(self._key_seq)
+        events = []
+        for line in records:
+            if not line:
+                continue
+            if tail is None and line in known:
+                live[line.split(b' ', 2)[1].decode('utf-8')] = line
+                continue
+            record = self._decode_record(line, last_seq)
+            if record is None:
+                garbage += 1
+                continue
+            key = record['key']
+            last_seq[key] = record['seq']
+            garbage += self._apply_record(record, line, live, segments)
+            events.append((record['op'], key, _site_meta(record['site']) if record['op'] == 'put' else None))
+        for key in self._live:
+            if key not in live and last_seq.get(key) == self._key_seq.get(key):
+                # 压缩前已被删除
+                segments.pop(key, None)
+                events.append(('del', key, None))
+
+        overlap = sorted({key for _, key, _ in events} & set(keys))
+        if overlap:
+            raise VaultConflictError(
+                f"网站 {', '.join(overlap)} 已被其他程序修改，请重新加载后再修改", overlap)
+        logger.info("合并其他程序写入的 %s 条修改", len(events))
+        self._live = live
+        self._segments = segments
+        # 其他程序压缩时可能丢弃了序号最大的删除记录，序号只需按网站递增
+        self._seq = max(self._seq, max(last_seq.values(), default=0))
+        self._key_seq = last_seq
+        self._garbage = garbage
+        self._external_events.extend(events)
+        self.monitor.remember(digest=hashlib.sha256(data), stat=stat)
+
+    # ---------- 写入 ----------
+    def _encode_record(self, op: str, key: str, site=None, segments=None) -> bytes:
+        """
+        加密一条记录，返回记录行
+        写入网站时 site 不含 "列表" 表示账号未修改，沿用文件中的账号令牌；
+        新的账号令牌信息写入 segments
+        """
+        if not key or any(c.isspace() for c in key):
+            raise ValueError(f"无效的网站键值: {key!r}")
+        self._seq += 1
+        record = {"seq": self._seq, "op": op, "key": key}
+        segment = b''
+        if op == 'put':
+            segment, count = self._segment_token(key, site.get('列表'))
+            record.update(site=_site_meta(site), count=count, seg=hashlib.sha256(segment).hexdigest())
+            segments[key] = ('seg', (segment, record['seg']), count)
+            segment = b' ' + segment
+        token = self.session.encrypt_token(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        return b'%s %s %s%s' % (b'P' if op == 'put' else b'D', key.encode('utf-8'), token, segment)
+
+    def _header_lines(self) -> list:
+        header = self.session.kdf_params
+        header["salt"] = base64.b64encode(self.session.salt).decode('ascii')
+        encrypted_header = json.dumps({"format": VAULT_FORMAT_VERSION, "created": datetime.now().isoformat()})
+        return [
+            VAULT_MAGIC + b' %d ' % VAULT_FORMAT_VERSION + json.dumps(header).encode('ascii'),
+            b'H ' + self.session.encrypt_token(encrypted_header),
+        ]
+
+    @timed('vault.rewrite')
+    def rewrite(self, website_data: dict) -> int:
+        """
+        原子地重写整个文件（新建、旧格式升级或修复残缺记录时使用），返回写入的字节数
+        不含 "列表" 的网站沿用（或重新加密）原有的账号列表；
+        已读取的文件被其他程序修改过时抛出 VaultConflictError（整体重写会丢失那些修改）
+        """
+        with self._lock, self._file_lock():
+            if self.format is not None and os.path.exists(self.path) and self.monitor.has_changed():
+                raise VaultConflictError("数据文件已被其他程序修改，请重新加载后再修改")
+            seq = self._seq
+            self._seq = 0
+            segments = {}
+            try:
+                live = {key: self._encode_record('put', key, site, segments) for key, site in website_data.items()}
+                key_seq = {key: i for i, key in enumerate(live, 1)}
+                header = self._header_lines()
+                data = b'\n'.join(header + list(live.values())) + b'\n'
+                atomic_write(self.path, data)
+            except BaseException:
+                # 写入失败时文件保持原样，内存中的状态也不变
+                self._seq = seq
+                raise
+            self._header = header
+            self._live = live
+            self._key_seq = key_seq
+            self._segments = segments
+            self._garbage = 0
+            self._external_events.clear()
+            self.format = 'log'
+            self.needs_rewrite = False
+            self.monitor.remember()
+            return len(data)
+
+    @timed('vault.write_changes')
+    def write_changes(self, website_data: dict, changed=(), deleted=()) -> int:
+        """
+        只追加变化的网站记录，返回写入的字节数
+
+        参数:
+            website_data: 完整的网站数据（需要整体重写时使用）；不含 "列表" 的网站只更新网站信息
+            changed: 新增或修改的网站键值
+            deleted: 删除的网站键值
+        追加前先合并其他程序写入的记录，它们也修改了这些网站时抛出 VaultConflictError
+        """
+        with self._lock, self._file_lock():
+            if self.needs_rewrite or self.format != 'log' or not os.path.exists(self.path):
+                return self.rewrite(website_data)
+            self._merge_external([*changed, *deleted])
+            # 新记录先暂存，追加并fsync成功后才更新内存中的状态
+            seq = self._seq
+            staged = []  # [(网站键值, 新记录行, 序号)]，记录行为None表示删除
+            pending = {}  # 暂存后各网站是否仍然存在
+            new_lines = []
+            segments = dict(self._segments)
+            garbage = 0
+            try:
+                for key in deleted:
+                    if pending.get(key, key in self._live):
+                        new_lines.append(self._encode_record('del', key))
+                        staged.append((key, None, self._seq))
+                        pending[key] = False
+                        segments.pop(key, None)
+                        garbage += 2
+                for key in changed:
+                    if key not in website_data:
+                        continue
+                    line = self._encode_record('put', key, website_data[key], segments)
+                    if pending.get(key, key in self._live):
+                        garbage += 1
+                    staged.append((key, line, self._seq))
+                    pending[key] = True
+                    new_lines.append(line)
+                if not new_lines:
+                    return 0
+                appended = b'\n'.join(new_lines) + b'\n'
+            except BaseException:
+                self._seq = seq
+                raise
+            try:
+                with open(self.path, 'ab') as f:
+                    f.write(appended)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except BaseException:
+                # 文件末尾可能留下部分写入的记录，下次保存时整体重写
+                self._seq = seq
+                self.needs_rewrite = True
+                with contextlib.suppress(OSError):
+                    # 残缺的记录是本程序写入的，整体重写时不视为其他程序的修改
+                    self.monitor.remember()
+                raise
+            for key, line, record_seq in staged:
+                if line is None:
+                    del self._live[key]
+                else:
+                    self._live[key] = line
+                self._key_seq[key] = record_seq
+            self._garbage += garbage
+            self._segments = segments
+            self.monitor.remember(appended)
+        self.maybe_compact()
+        return len(appended)
+
+    # ---------- 压缩 ----------
+    @timed('vault.compact')
+    def compact(self):
+        """丢弃被覆盖的记录，原子地重写文件（无需重新加密）；先合并其他程序写入的记录"""
+        with self._lock, self._file_lock():
+            if self.format != 'log' or not self._header:
+                return
+            try:
+                self._merge_external()
+            except VaultConflictError as e:
+                logger.warning("跳过压缩: %s", e)
+                return
+            data = b'\n'.join(self._header + list(self._live.values())) + b'\n'
+            atomic_write(self.path, data)
+            self._garbage = 0
+            self.monitor.remember()
+            logger.info("数据文件压缩完成，有效记录 %s 条", len(self._live))
+
+    def maybe_compact(self):
+        """被覆盖记录过多时在后台线程中压缩"""
+        if self._garbage < max(COMPACT_MIN_GARBAGE, len(self._live)):
+            return
+        if self._compacting is not None and self._compacting.is_alive():
+            return
+        self._compacting = threading.Thread(target=self.compact, name='vault-compact', daemon=True)
+        self._compacting.start()
+
+    def wait_for_compaction(self):
+        """等待后台压缩完成（命令行等很快退出的进程在退出前调用，避免压缩被中断）"""
+        if self._compacting is not None:
+            self._compacting.join()
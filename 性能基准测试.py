@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准测试脚本（无界面运行，QT_QPA_PLATFORM=offscreen）
+
+生成 10 / 1千 / 1万 / 10万 个账号的模拟数据，分别测量:
+    - PasswordBasedEncryption 加密/解密往返（含密钥派生）及会话密钥加解密
+    - _save_data 整体重写、单个网站的增量保存，_load_data / VaultStore.load 读取
+    - display_accounts 渲染耗时（大网站和普通网站）及切换网站的延迟
+    - 建立搜索索引及搜索的耗时
+    - 进程峰值内存(RSS)
+每个规模在独立的子进程中运行（峰值内存互不影响），数据写在临时目录，不会改动真实的 data.json。
+结果写入JSON文件，可与之前的结果比较找出性能退化:
+
+    python 性能基准测试.py
+    python 性能基准测试.py --sizes 10,1000 --repeat 3 --output bench.json
+    python 性能基准测试.py --baseline 上次结果.json --threshold 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+DEFAULT_SIZES = (10, 1000, 10000, 100000)
+DEFAULT_REPEAT = 5
+DEFAULT_OUTPUT = 'benchmark_results.json'
+DEFAULT_THRESHOLD = 0.2  # 中位数变慢超过20%视为退化
+
+BENCH_PASSWORD = 'benchmark-password'
+ACCOUNTS_PER_SITE = 50  # 普通网站的账号数；另有一个大网站包含一半的账号
+SITE_SWITCHES = 20  # 每轮测量切换网站的次数
+
+
+# ======================= 模拟数据 =======================
+def generate_website_data(total_accounts, seed=0):
+    """
+    生成模拟的网站数据（与数据文件中 "记录网站" 的格式一致）
+    第一个网站包含一半的账号，用于测量大网站的渲染；其余账号每 ACCOUNTS_PER_SITE 个一个网站
+    """
+    rng = random.Random(seed)
+    website_data = {}
+
+    def add_site(name, count):
+        site_id = str(len(website_data) + 1)
+        website_data[site_id] = {
+            "网站名": name,
+            "网址": f"https://{name.lower()}.example.com",
+            "列表": [
+                {
+                    "账号": f"user{rng.randrange(10 ** 8)}@example.com",
+                    "密码": ''.join(rng.choice('abcdefghijkmnpqrstuvwxyz23456789') for _ in range(16)),
+                    "备注": rng.choice(('', '工作', '个人账号', '备用邮箱 ' * 3)),
+                }
+                for _ in range(count)
+            ],
+        }
+
+    big = max(1, total_accounts // 2)
+    add_site("BigSite", big)
+    remaining = total_accounts - big
+    while remaining > 0:
+        count = min(ACCOUNTS_PER_SITE, remaining)
+        add_site(f"Site{len(website_data) + 1}", count)
+        remaining -= count
+    return website_data
+
+
+# ======================= 测量工具 =======================
+def peak_rss_mb():
+    """进程峰值内存(MB)，无法获取时返回None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为KB，macOS 为字节
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def measure(results, name, fn, repeat, setup=None):
+    """执行 fn repeat 次，把耗时汇总写入 results[name]"""
+    from perf_metrics import Histogram
+    histogram = Histogram()
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        histogram.add((time.perf_counter() - start) * 1000)
+    results[name] = histogram.to_dict()
+    print(f"  {name}: 中位数 {results[name]['p50_ms']} ms", file=sys.stderr)
+
+
+# ======================= 单个规模（子进程中运行） =======================
+def run_size(total_accounts, repeat):
+    """在临时数据目录中测量一个规模，返回结果字典"""
+    data_dir = tempfile.mkdtemp(prefix='account_bench_')
+    os.environ['ACCOUNT_MANAGER_DATA_DIR'] = data_dir
+
+    from PyQt6.QtWidgets import QApplication
+    import perf_metrics
+    from vault_crypto import PasswordBasedEncryption, UnlockSession
+    from vault_storage import VaultStore, get_data_file_path
+    from vault_model import Vault
+
+    website_data = generate_website_data(total_accounts)
+    plain = json.dumps({"记录网站": website_data}, ensure_ascii=False)
+    metrics = {}
+
+    # 预先写好数据文件，窗口启动时走正常的解锁流程
+    store = VaultStore(get_data_file_path(), UnlockSession())
+    store.session.start(BENCH_PASSWORD)
+    store.rewrite(website_data)
+
+    # ---------- 加密 ----------
+    cipher = PasswordBasedEncryption()
+    token = cipher.encrypt_data(plain, BENCH_PASSWORD)
+    measure(metrics, 'crypto.encrypt_data', lambda: cipher.encrypt_data(plain, BENCH_PASSWORD), repeat)
+    measure(metrics, 'crypto.decrypt_data', lambda: cipher.decrypt_data(token, BENCH_PASSWORD), repeat)
+    measure(metrics, 'crypto.session_roundtrip',
+            lambda: store.session.decrypt_data(store.session.encrypt_data(plain)), repeat)
+
+    # ---------- 界面 ----------
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    import main
+
+    class BenchWindow(main.TitleBarColorWindow):
+        """用固定密码代替密码输入框"""
+        def _get_password_from_user(self):
+            return BENCH_PASSWORD
+
+    window = BenchWindow()
+    window.resize(1200, 800)
+    app.processEvents()
+
+    # ---------- 保存/读取 ----------
+    def full_save():
+        window._save_data()
+        window._flush_pending_saves()
+
+    big_key = '1'
+    small_key = window.vault.site_ids()[-1]
+    first_account = window.vault.accounts(small_key)[0][0]
+
+    def incremental_save():
+        window.vault.update_account(first_account, {'备注': str(time.perf_counter())})
+        window._save_data(changed=[small_key])
+        window._flush_pending_saves()
+
+    measure(metrics, 'save.full', full_save, repeat)
+    measure(metrics, 'save.incremental', incremental_save, repeat)
+    measure(metrics, 'load.store', lambda: window.store.load(BENCH_PASSWORD), repeat)
+    measure(metrics, 'load._load_data', window._load_data, repeat)
+
+    # ---------- 渲染 ----------
+    def render(key):
+        window.display_accounts(key)
+        app.processEvents()
+
+    measure(metrics, 'render.big_site', lambda: render(big_key), repeat, setup=lambda: render(small_key))
+    measure(metrics, 'render.small_site', lambda: render(small_key), repeat, setup=lambda: render(big_key))
+
+    # ---------- 搜索 ----------
+    # 包含建立数据模型本身的耗时
+    measure(metrics, 'search.build_index', lambda: Vault(website_data).build_search_index(), 1)
+    # 索引在界面空闲时建立（需要逐个解密网站的账号列表），只测量查询本身
+    measure(metrics, 'search.query', lambda: window.vault.search('user12'), repeat,
+            setup=window.vault.build_search_index)
+
+    site_ids = window.vault.site_ids()
+    cycle = [site_ids[i % len(site_ids)] for i in range(SITE_SWITCHES)]
+
+    from perf_metrics import Histogram
+    switches = Histogram()
+    for _ in range(repeat):
+        for key in cycle:
+            start = time.perf_counter()
+            window.on_list_item_clicked(window.site_items[key])
+            app.processEvents()
+            switches.add((time.perf_counter() - start) * 1000)
+    metrics['site_switch'] = switches.to_dict()
+    print(f"  site_switch: 中位数 {metrics['site_switch']['p50_ms']} ms", file=sys.stderr)
+
+    window.close()
+    app.processEvents()
+
+    result = {
+        "accounts": total_accounts,
+        "sites": len(website_data),
+        "big_site_accounts": len(website_data['1']['列表']),
+        "plain_json_bytes": len(plain.encode('utf-8')),
+        "data_file_bytes": os.path.getsize(get_data_file_path()),
+        "repeat": repeat,
+        "metrics": metrics,
+        "spans": perf_metrics.registry.snapshot(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    shutil.rmtree(data_dir, ignore_errors=True)
+    return result
+
+
+# ======================= 汇总与比较 =======================
+def run_all(sizes, repeat):
+    """每个规模启动一个子进程，收集结果"""
+    results = {}
+    for size in sizes:
+        print(f"规模 {size} 个账号...", file=sys.stderr)
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', str(size), '--repeat', str(repeat)],
+            stdout=subprocess.PIPE, text=True, encoding='utf-8')
+        if proc.returncode != 0:
+            results[str(size)] = {"accounts": size, "error": f"子进程退出码 {proc.returncode}"}
+            continue
+        results[str(size)] = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "generated": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """与基线结果比较，返回中位数变慢超过阈值的项 [(规模, 指标, 基线ms, 当前ms), ...]"""
+    regressions = []
+    for size, current in report["results"].items():
+        old = baseline.get("results", {}).get(size)
+        if not old or "metrics" not in current or "metrics" not in old:
+            continue
+        for name, summary in current["metrics"].items():
+            before = old["metrics"].get(name, {}).get("p50_ms")
+            now = summary["p50_ms"]
+            if before and now > before * (1 + threshold):
+                regressions.append((size, name, before, now))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="账号管理器性能基准测试")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="账号数量，逗号分隔（默认 10,1000,10000,100000）")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="每项测量的重复次数")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="结果JSON文件路径")
+    parser.add_argument('--baseline', help="用于比较的旧结果JSON文件")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="判定为退化的变慢比例")
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child is not None:
+        print(json.dumps(run_size(args.child, args.repeat), ensure_ascii=False))
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    report = run_all(sizes, args.repeat)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for size, name, before, now in regressions:
+            print(f"性能退化: {size} 个账号 {name} {before} ms -> {now} ms")
+        if regressions:
+            return 1
+        print("未发现性能退化")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -120,7 +120,17 @@ class PackageBuilder:
             'version.json',
             'requirements.txt',
             'img/ico.ico',  # 修正图标文件路径
-            'usage_stats.py'  # 添加统计模块
+            'usage_stats.py',  # 添加统计模块
+            'vault_crypto.py',  # 加密模块
+            'vault_storage.py',  # 存储模块
+            'vault_model.py',  # 数据模型
+            'vault_search.py',  # 搜索索引
+            'perf_metrics.py',  # 性能统计
+            'app_logging.py',  # 日志配置
+            'vault_import.py',  # 批量导入
+            'vault_export.py',  # 导出与备份
+            'vault_cli.py',  # 命令行工具
+            'vault_agent.py'  # 解锁代理
         ]
         
         # 检查文件是否存在
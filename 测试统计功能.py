@@ -7,8 +7,47 @@
 
 import os
 import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from usage_stats import record_app_launch, record_feature_usage, get_stats_summary
 
+class LocalStatsEndpoint:
+    """
+    本地统计接收端（离线测试用）
+    在本机端口上接收 send_batch 发送的事件并保存在 received 中
+    用法: endpoint = LocalStatsEndpoint().start()，将 endpoint.url 设为统计接收地址
+    """
+    def __init__(self, host='127.0.0.1', port=0):
+        self.received = []
+        received = self.received
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    received.extend(json.loads(self.rfile.read(length)).get('events', []))
+                    self.send_response(204)
+                except ValueError:
+                    self.send_response(400)
+                self.end_headers()
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}/events"
+        self._thread = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
 def test_stats():
     """测试统计功能"""
     print("=== 测试用户使用数量统计功能 ===")
@@ -40,7 +79,7 @@ def test_stats():
     print(f"添加网站次数: {stats.get('add_website', 0)}")
     
     # 检查数据文件
-    stats_file = os.path.join(os.path.dirname(__file__), "usage_stats.json")
+    stats_file = os.path.join(os.path.dirname(__file__), "usage_stats.jsonl")
     if os.path.exists(stats_file):
         print(f"\n✓ 统计数据文件已创建: {stats_file}")
         print(f"文件大小: {os.path.getsize(stats_file)} 字节")
@@ -49,6 +88,27 @@ def test_stats():
     
     print("\n=== 测试完成 ===")
 
+def test_send():
+    """测试发送统计（发送到本地接收端，不访问网络）"""
+    import usage_stats
+    print("\n=== 测试发送统计 ===")
+    endpoint = LocalStatsEndpoint().start()
+    os.environ[usage_stats.SEND_ENV] = '1'
+    os.environ[usage_stats.ENDPOINT_ENV] = endpoint.url
+    try:
+        record_feature_usage("send_test")
+        usage_stats.stats.flush(5.0)
+    finally:
+        del os.environ[usage_stats.SEND_ENV]
+        del os.environ[usage_stats.ENDPOINT_ENV]
+        endpoint.stop()
+    actions = [event.get("action") for event in endpoint.received]
+    if "feature_send_test" in actions:
+        print(f"✓ 本地接收端收到 {len(actions)} 个事件")
+    else:
+        print(f"✗ 本地接收端未收到事件（发送失败 {usage_stats.stats.send_failures} 次）")
+
 if __name__ == "__main__":
     test_stats()
+    test_send()
     input("按任意键退出...")
\ No newline at end of file